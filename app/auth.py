@@ -3,16 +3,31 @@ import bcrypt
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.config import settings
-from app.utils.dependencies import get_rbac_data
+from app.utils.password import hash_password, precisa_rehash, rehash_password
 from app.utils.password_validator import validate_password
+from app.utils.jwt_keys import encode_token, decode_token
+from app.utils.rbac_index import get_rbac_index, permission_epoch
+from app.utils.storage_io import run_io
+from app.utils.rbac_mmap import get_rbac_usuario
+from app.utils.session_store import session_store
 import logging
+import secrets
 from datetime import datetime, timedelta
-from typing import Optional, Tuple, List, Union
+from typing import Any, Dict, Optional, Tuple, List, Union
 
 security = HTTPBearer()
 logger = logging.getLogger(__name__)
 
-ALGORITHM = "HS256"
+ALGORITHM = settings.JWT_ALGORITHM
+
+# Extensões de OpenAPI que declaram o que uma rota exige além de um token válido.
+# São lidas pelo manifesto MCP para listar a cada cliente apenas o que ele pode chamar.
+REQUER_ADMIN = {"x-papel-minimo": "admin"}
+REQUER_ADMIN_GLOBAL = {"x-papel-minimo": "global_admin"}
+
+
+def requer_ferramenta(ferramenta: str) -> Dict[str, str]:
+    return {"x-ferramenta": ferramenta}
 
 # Função auxiliar para verificar senhas com suporte legado
 def verify_password(plain_password: str, stored_password: str) -> bool:
@@ -51,68 +66,118 @@ def validate_and_hash_password(password: str) -> Tuple[bool, Union[str, List[str
     
     # Fazer hash da senha com bcrypt
     try:
-        hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-        return True, hashed.decode('utf-8')  # Retorna como string em vez de bytes
+        return True, hash_password(password)
     except Exception as e:
         logger.error(f"Erro ao criar hash da senha: {e}")
         return False, ["Erro interno ao processar senha. Por favor, tente novamente."]
 
 # Função para autenticação de usuário (login)
 def authenticate_user(username: str, password: str):
-    rbac = get_rbac_data()
-    user = rbac["usuarios"].get(username)
+    # Apenas o registro do usuário é lido (índice mapeado se RBAC_MMAP_INDEX=true)
+    user = get_rbac_usuario(username)
     if not user or not verify_password(password, user["senha"]):
         return None
+    # Senha correta em mãos: atualiza hashes legados ou com custo abaixo do atual
+    if precisa_rehash(user["senha"]):
+        rehash_password(username, password, user["senha"])
     return user
 
 # Função para gerar JWT para usuário
-def create_jwt_for_user(username: str, expires_delta: Optional[timedelta] = None) -> str:
-    rbac = get_rbac_data()
-    user = rbac["usuarios"].get(username)
-    if not user:
+def create_jwt_for_user(username: str, expires_delta: Optional[timedelta] = None, sid: Optional[str] = None) -> str:
+    # Papel e grupos vêm do índice em memória; o rbac.json só é relido quando muda
+    entry = get_rbac_index().usuarios.get(username)
+    if not entry:
         raise ValueError("Usuário não encontrado")
-    
-    logger.info(f"Auth: Creating JWT. Key used (first 10 chars): {settings.SECRET_KEY[:10] if settings.SECRET_KEY else 'None'}")
+    papel, grupos = entry
+
+    logger.info(f"Auth: Creating JWT ({ALGORITHM}) for '{username}'")
 
+    now = datetime.utcnow()
     to_encode = {
         "sub": username,
-        "grupos": user["grupos"],
-        "papel": user["papel"],
-        "exp": datetime.utcnow() + (expires_delta or timedelta(hours=1))
+        "grupos": list(grupos),
+        "papel": papel,
+        # Época de permissões: se papel/grupos mudarem, o token é reconciliado com o RBAC atual
+        "pe": permission_epoch(papel, grupos),
+        "iat": now,
+        "jti": secrets.token_hex(8),
+        "exp": now + (expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
     }
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
+    if sid:
+        # Sessão de origem: permite revogar o token antes da expiração
+        to_encode["sid"] = sid
+    encoded_jwt = encode_token(to_encode)
     logger.info(f"Auth: Generated JWT (first 20 chars): {encoded_jwt[:20]}...")
     return encoded_jwt
 
+class IncompleteTokenError(jwt.InvalidTokenError):
+    """Token com assinatura válida, mas sem os campos obrigatórios (sub, grupos, papel)."""
+
+
+class RevokedSessionError(jwt.InvalidTokenError):
+    """Token de uma sessão encerrada (logout, reuso de refresh token ou revogação administrativa)."""
+
+
+class UnknownUserError(jwt.InvalidTokenError):
+    """Token válido de um usuário que não existe mais no RBAC."""
+
+
+# Função para validar um JWT de acesso e retornar seu payload
+def decode_access_token(token: str) -> Dict[str, Any]:
+    """
+    Verifica assinatura e expiração do token e garante os campos obrigatórios.
+
+    Raises:
+        jwt.ExpiredSignatureError: Token expirado
+        IncompleteTokenError: Payload sem sub, grupos ou papel
+        RevokedSessionError: A sessão do token foi revogada
+        UnknownUserError: O usuário do token foi removido
+        jwt.PyJWTError: Qualquer outra falha de validação
+    """
+    payload = decode_token(
+        token,
+        options={"verify_signature": True, "verify_exp": True}
+    )
+    username = payload.get("sub")
+    grupos = payload.get("grupos")
+    papel = payload.get("papel")
+    if not username or grupos is None or not papel:  # Modificado de not grupos para grupos is None (permite lista vazia)
+        logger.warning(f"Auth: Invalid token payload - missing fields. username={username}, grupos={grupos}, papel={papel}")
+        raise IncompleteTokenError("dados incompletos")
+    sid = payload.get("sid")
+    if sid and session_store.is_revoked(sid):
+        raise RevokedSessionError("sessão revogada")
+
+    # Comparação O(1) da época: grupos/papel do token só valem se ainda forem os atuais
+    index = get_rbac_index()
+    epoca = index.epocas.get(username)
+    if epoca is None:
+        raise UnknownUserError("usuário removido")
+    if payload.get("pe") != epoca:
+        papel_atual, grupos_atuais = index.usuarios[username]
+        logger.info(f"Auth: Permissões de '{username}' mudaram desde a emissão do token; usando RBAC atual")
+        payload["papel"] = papel_atual
+        payload["grupos"] = list(grupos_atuais)
+        payload["pe"] = epoca
+    return payload
+
 # Função para extrair usuário do JWT
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     token = credentials.credentials
-    logger.info(f"Auth: Validating JWT. Key used (first 10 chars): {settings.SECRET_KEY[:10] if settings.SECRET_KEY else 'None'}")
     logger.info(f"Auth: Received token for validation (first 20 chars): {token[:20]}...")
     try:
-        # Verificar versão do PyJWT e ajustar parâmetros conforme necessário
-        import jwt
-        logger.info(f"Auth: Using PyJWT version {jwt.__version__}")
-        
-        # Modificado para incluir mais opções para compatibilidade
-        # Ajustado para lidar melhor com diferentes formatos de token
-        payload = jwt.decode(
-            token, 
-            settings.SECRET_KEY, 
-            algorithms=[ALGORITHM],
-            options={"verify_signature": True, "verify_exp": True}
-        )
-        
-        # Log adicional para ver o payload decodificado
+        # Consulta de sessão (SQLite) e do índice RBAC fora do event loop
+        payload = await run_io(decode_access_token, token)
         logger.info(f"Auth: Successfully decoded payload: sub={payload.get('sub')}, papel={payload.get('papel')}")
-        
-        username = payload.get("sub")
-        grupos = payload.get("grupos")
-        papel = payload.get("papel")
-        if not username or grupos is None or not papel:  # Modificado de not grupos para grupos is None (permite lista vazia)
-            logger.warning(f"Auth: Invalid token payload - missing fields. username={username}, grupos={grupos}, papel={papel}")
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido: dados incompletos")
-        return {"username": username, "grupos": grupos, "papel": papel}
+        return {"username": payload["sub"], "grupos": payload["grupos"], "papel": payload["papel"], "sid": payload.get("sid")}
+    except IncompleteTokenError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido: dados incompletos")
+    except RevokedSessionError:
+        logger.warning("Token de sessão revogada apresentado")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Sessão revogada")
+    except UnknownUserError:
+        logger.warning("Token de usuário removido apresentado")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido: usuário não encontrado")
     except jwt.ExpiredSignatureError:
         logger.warning("Token expirado")
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expirado")
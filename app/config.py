@@ -2,6 +2,7 @@ import os
 import sys
 from dotenv import load_dotenv
 from pathlib import Path
+from typing import List, Optional
 
 # Verifica se estamos em ambiente de teste
 is_testing = 'pytest' in sys.modules
@@ -31,11 +32,81 @@ else:
 
 class Settings:
     SECRET_KEY: str = os.getenv('SECRET_KEY', 'changeme')
+    # Assinatura JWT: RS256/EdDSA usam o key ring em JWT_KEYS_DIR (publicado em /.well-known/jwks.json);
+    # HS256 mantém o segredo compartilhado SECRET_KEY
+    JWT_ALGORITHM: str = os.getenv('ALGORITHM', 'RS256')
+    JWT_KEYS_DIR: str = os.getenv('JWT_KEYS_DIR', str(Path(__file__).parent.parent / 'data' / 'jwt_keys'))
+    JWT_KEYS_RETAINED: int = int(os.getenv('JWT_KEYS_RETAINED', '3'))
     RBAC_FILE: str = os.getenv('RBAC_FILE', str(Path(__file__).parent.parent / 'data' / 'rbac.json'))
+    # Log de alterações (write-ahead) e snapshots do RBAC; por padrão em <RBAC_FILE>.wal/
+    RBAC_WAL_ENABLED: bool = os.getenv('RBAC_WAL_ENABLED', 'true').lower() == 'true'
+    RBAC_WAL_DIR: str = os.getenv('RBAC_WAL_DIR', '')
+    RBAC_SNAPSHOT_INTERVAL: int = int(os.getenv('RBAC_SNAPSHOT_INTERVAL', '100'))
+    RBAC_SNAPSHOT_RETENTION: int = int(os.getenv('RBAC_SNAPSHOT_RETENTION', '10'))
+    # Auditoria (segmentos NDJSON rotativos gravados em lote)
+    AUDIT_DIR: str = os.getenv('AUDIT_DIR', str(Path(__file__).parent.parent / 'data' / 'audit'))
+    AUDIT_BUFFER_SIZE: int = int(os.getenv('AUDIT_BUFFER_SIZE', '10000'))
+    AUDIT_BATCH_SIZE: int = int(os.getenv('AUDIT_BATCH_SIZE', '500'))
+    AUDIT_FLUSH_INTERVAL: float = float(os.getenv('AUDIT_FLUSH_INTERVAL', '1.0'))
+    AUDIT_SEGMENT_MAX_BYTES: int = int(os.getenv('AUDIT_SEGMENT_MAX_BYTES', str(10 * 1024 * 1024)))
+    AUDIT_MAX_SEGMENTS: int = int(os.getenv('AUDIT_MAX_SEGMENTS', '100'))
+    # Tokens de acesso curtos + refresh tokens opacos rotativos (sessões em SQLite)
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv('ACCESS_TOKEN_EXPIRE_MINUTES', '15'))
+    REFRESH_TOKEN_EXPIRE_DAYS: int = int(os.getenv('REFRESH_TOKEN_EXPIRE_DAYS', '7'))
+    SESSIONS_DB: str = os.getenv('SESSIONS_DB', str(Path(__file__).parent.parent / 'data' / 'sessions.db'))
+    SESSION_REVOCATION_SYNC_SECONDS: float = float(os.getenv('SESSION_REVOCATION_SYNC_SECONDS', '1.0'))
+    # Matriz de permissões com IDs internados e bitmaps (bases com muitos usuários/grupos)
+    RBAC_BITMAP_INDEX: bool = os.getenv('RBAC_BITMAP_INDEX', 'false').lower() == 'true'
+    # Threads dedicadas às leituras/escritas de armazenamento feitas a partir dos handlers assíncronos
+    STORAGE_IO_THREADS: int = int(os.getenv('STORAGE_IO_THREADS', '8'))
+    # Índice binário mapeado em memória (rbac.json.idx) para ler um único usuário/grupo sem carregar o JSON
+    RBAC_MMAP_INDEX: bool = os.getenv('RBAC_MMAP_INDEX', 'false').lower() == 'true'
+    # Codec JSON de armazenamento e respostas: auto (orjson se instalado), orjson ou stdlib
+    JSON_CODEC: str = os.getenv('JSON_CODEC', 'auto')
+    # Arquivos de dados indentados (legíveis) em vez de compactos
+    JSON_STORAGE_PRETTY: bool = os.getenv('JSON_STORAGE_PRETTY', 'false').lower() == 'true'
+    # Introspecção de tokens para backends de ferramentas (itens por requisição)
+    INTROSPECT_MAX_BATCH: int = int(os.getenv('INTROSPECT_MAX_BATCH', '100'))
+    # Proxy para os backends das ferramentas: base para `url_base` relativas (vazio = só URLs absolutas) e timeout
+    TOOLS_UPSTREAM_BASE_URL: str = os.getenv('TOOLS_UPSTREAM_BASE_URL', '')
+    PROXY_TIMEOUT_SECONDS: float = float(os.getenv('PROXY_TIMEOUT_SECONDS', '30'))
+    # Execução em lote pelo proxy: chamadas por requisição e chamadas simultâneas por ferramenta
+    PROXY_BATCH_MAX_CALLS: int = int(os.getenv('PROXY_BATCH_MAX_CALLS', '32'))
+    PROXY_BATCH_CONCURRENCY_PER_TOOL: int = int(os.getenv('PROXY_BATCH_CONCURRENCY_PER_TOOL', '4'))
+    # Respostas de backend até este tamanho (com Content-Length) são bufferizadas e coalescidas; as demais são transmitidas
+    PROXY_BUFFER_MAX_BYTES: int = int(os.getenv('PROXY_BUFFER_MAX_BYTES', str(1024 * 1024)))
+    PROXY_STREAM_CHUNK_BYTES: int = int(os.getenv('PROXY_STREAM_CHUNK_BYTES', str(64 * 1024)))
+    # Respostas do transporte HTTP do MCP em SSE, o que permite entregar notificações de progresso
+    MCP_HTTP_SSE: bool = os.getenv('MCP_HTTP_SSE', 'true').lower() == 'true'
+    # Frontend estático: arquivos até este tamanho ficam em memória (0 = só as versões comprimidas geradas na inicialização)
+    STATIC_MEMORY_MAX_BYTES: int = int(os.getenv('STATIC_MEMORY_MAX_BYTES', str(64 * 1024)))
+    # Compressão das respostas (gzip/brotli negociados) a partir deste tamanho; 0 desativa
+    COMPRESSION_MIN_BYTES: int = int(os.getenv('COMPRESSION_MIN_BYTES', '1024'))
+    COMPRESSION_GZIP_LEVEL: int = int(os.getenv('COMPRESSION_GZIP_LEVEL', '6'))
+    COMPRESSION_BROTLI_QUALITY: int = int(os.getenv('COMPRESSION_BROTLI_QUALITY', '4'))
+    # CORS: origens separadas por vírgula ("*" libera todas), regex opcional de origens e validade do preflight no navegador
+    CORS_ALLOW_ORIGINS: List[str] = [o.strip() for o in os.getenv('CORS_ALLOW_ORIGINS', 'http://localhost:5173,http://localhost:3000').split(',') if o.strip()]
+    CORS_ALLOW_ORIGIN_REGEX: Optional[str] = os.getenv('CORS_ALLOW_ORIGIN_REGEX') or None
+    CORS_ALLOW_METHODS: List[str] = [m.strip() for m in os.getenv('CORS_ALLOW_METHODS', 'GET,POST,PUT,DELETE,OPTIONS').split(',') if m.strip()]
+    CORS_ALLOW_HEADERS: List[str] = [h.strip() for h in os.getenv('CORS_ALLOW_HEADERS', 'Authorization,Content-Type,Mcp-Session-Id,Mcp-Protocol-Version').split(',') if h.strip()]
+    CORS_EXPOSE_HEADERS: List[str] = [h.strip() for h in os.getenv('CORS_EXPOSE_HEADERS', 'ETag,Mcp-Session-Id').split(',') if h.strip()]
+    CORS_MAX_AGE: int = int(os.getenv('CORS_MAX_AGE', '86400'))
+    # Proteção do login contra força bruta: falhas na janela por usuário e por IP (generoso, por causa de NAT) e bloqueio progressivo
+    LOGIN_GUARD_WINDOW_SECONDS: float = float(os.getenv('LOGIN_GUARD_WINDOW_SECONDS', '900'))
+    LOGIN_GUARD_MAX_FAILURES_USER: int = int(os.getenv('LOGIN_GUARD_MAX_FAILURES_USER', '5'))
+    LOGIN_GUARD_MAX_FAILURES_IP: int = int(os.getenv('LOGIN_GUARD_MAX_FAILURES_IP', '100'))
+    LOGIN_GUARD_LOCKOUT_SECONDS: float = float(os.getenv('LOGIN_GUARD_LOCKOUT_SECONDS', '60'))
+    LOGIN_GUARD_LOCKOUT_MAX_SECONDS: float = float(os.getenv('LOGIN_GUARD_LOCKOUT_MAX_SECONDS', '3600'))
+    # Custo bcrypt de novos hashes: número fixo ou "auto" (calibrado na inicialização para levar ~BCRYPT_TARGET_MS no host)
+    BCRYPT_ROUNDS: Optional[int] = None if os.getenv('BCRYPT_ROUNDS', 'auto').strip().lower() == 'auto' else int(os.getenv('BCRYPT_ROUNDS'))
+    BCRYPT_TARGET_MS: float = float(os.getenv('BCRYPT_TARGET_MS', '250'))
+    BCRYPT_MIN_ROUNDS: int = int(os.getenv('BCRYPT_MIN_ROUNDS', '10'))
+    BCRYPT_MAX_ROUNDS: int = int(os.getenv('BCRYPT_MAX_ROUNDS', '16'))
 
     def __init__(self):
         # Exibe informações de diagnóstico na inicialização
         print(f"CONFIG: SECRET_KEY definida como: {self.SECRET_KEY[:5]}{'*' * 10}")
         print(f"CONFIG: RBAC_FILE definido como: {self.RBAC_FILE}")
+        print(f"CONFIG: Algoritmo JWT: {self.JWT_ALGORITHM}")
 
 settings = Settings()
@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timezone
+
+from app.auth import get_current_user, REQUER_ADMIN_GLOBAL
+from app.utils.audit import audit_log
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/auditoria",
+    tags=["Auditoria"],
+)
+
+
+def _to_naive_utc(ts: Optional[datetime]) -> Optional[datetime]:
+    if ts is not None and ts.tzinfo is not None:
+        return ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+@router.get("/", response_model=List[Dict[str, Any]], summary="Consultar eventos de auditoria", description="Lista eventos de auditoria (execuções de ferramentas e ações administrativas), mais recentes primeiro. Acesso restrito ao admin global.", openapi_extra=REQUER_ADMIN_GLOBAL)
+async def consultar_auditoria(
+    usuario: Optional[str] = None,
+    ferramenta: Optional[str] = None,
+    evento: Optional[str] = None,
+    inicio: Optional[datetime] = None,
+    fim: Optional[datetime] = None,
+    limite: int = Query(100, ge=1, le=1000),
+    user=Depends(get_current_user)
+):
+    """
+    Consulta os segmentos de auditoria filtrando por usuário, ferramenta, tipo de evento e período (UTC).
+    """
+    if user["papel"] != "global_admin":
+        raise HTTPException(status_code=403, detail="Acesso restrito ao admin global.")
+    return await audit_log.query(
+        usuario=usuario,
+        ferramenta=ferramenta,
+        evento=evento,
+        inicio=_to_naive_utc(inicio),
+        fim=_to_naive_utc(fim),
+        limite=limite
+    )
+
+
+@router.get("/status", summary="Status da auditoria", description="Retorna o estado do buffer de auditoria. Acesso restrito ao admin global.", openapi_extra=REQUER_ADMIN_GLOBAL)
+async def status_auditoria(user=Depends(get_current_user)):
+    if user["papel"] != "global_admin":
+        raise HTTPException(status_code=403, detail="Acesso restrito ao admin global.")
+    return audit_log.stats()
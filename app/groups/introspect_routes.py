@@ -0,0 +1,94 @@
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+
+import jwt
+
+from app.auth import decode_access_token, IncompleteTokenError, RevokedSessionError, UnknownUserError
+from app.config import settings
+from app.utils.rbac_index import get_rbac_index_async
+from app.utils.storage_io import run_io
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/introspect",
+    tags=["Autenticação"],
+)
+
+
+class IntrospectItem(BaseModel):
+    token: str
+    ferramenta: Optional[str] = None
+
+
+class IntrospectRequest(BaseModel):
+    itens: List[IntrospectItem] = Field(..., min_length=1)
+
+
+class IntrospectResult(BaseModel):
+    ativo: bool
+    erro: Optional[str] = None
+    usuario: Optional[str] = None
+    papel: Optional[str] = None
+    grupos: Optional[List[str]] = None
+    exp: Optional[int] = None
+    ferramenta: Optional[str] = None
+    autorizado: Optional[bool] = None
+
+
+class IntrospectResponse(BaseModel):
+    versao_rbac: int
+    resultados: List[IntrospectResult]
+
+
+def _validar(token: str) -> Dict[str, Any]:
+    """Valida um token e retorna as claims, ou o motivo da rejeição."""
+    try:
+        payload = decode_access_token(token)
+    except IncompleteTokenError:
+        return {"ativo": False, "erro": "Token inválido: dados incompletos"}
+    except RevokedSessionError:
+        return {"ativo": False, "erro": "Sessão revogada"}
+    except UnknownUserError:
+        return {"ativo": False, "erro": "Token inválido: usuário não encontrado"}
+    except jwt.ExpiredSignatureError:
+        return {"ativo": False, "erro": "Token expirado"}
+    except jwt.PyJWTError:
+        return {"ativo": False, "erro": "Token inválido"}
+    return {
+        "ativo": True,
+        "usuario": payload["sub"],
+        "papel": payload["papel"],
+        "grupos": list(payload["grupos"]),
+        "exp": payload.get("exp"),
+    }
+
+
+def _validar_lote(tokens: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Valida os tokens distintos do lote (verificações de assinatura bloqueantes, fora do event loop)."""
+    return {token: _validar(token) for token in tokens}
+
+
+@router.post("", response_model=IntrospectResponse, summary="Introspecção de tokens em lote", description="Valida um lote de tokens e, opcionalmente, decide se cada um pode usar uma ferramenta. Destinado aos backends das ferramentas, que assim não precisam reimplementar a validação do gateway. Os resultados seguem a ordem dos itens enviados.")
+async def introspect(body: IntrospectRequest):
+    if len(body.itens) > settings.INTROSPECT_MAX_BATCH:
+        raise HTTPException(status_code=413, detail=f"Máximo de {settings.INTROSPECT_MAX_BATCH} itens por requisição.")
+
+    # Um único snapshot do índice responde o lote inteiro, garantindo decisões consistentes entre si
+    index = await get_rbac_index_async()
+    # Até INTROSPECT_MAX_BATCH verificações RS256: feitas no pool de threads, não no event loop
+    validados = await run_io(_validar_lote, list(dict.fromkeys(item.token for item in body.itens)))
+    resultados = []
+    for item in body.itens:
+        claims = validados[item.token]
+        resultado = dict(claims)
+        if item.ferramenta is not None:
+            resultado["ferramenta"] = item.ferramenta
+            resultado["autorizado"] = claims["ativo"] and index.pode_usar(claims["papel"], claims["grupos"], item.ferramenta)
+        resultados.append(resultado)
+
+    logger.info(f"Introspecção de {len(body.itens)} itens ({len(validados)} tokens distintos)")
+    return {"versao_rbac": index.versao, "resultados": resultados}
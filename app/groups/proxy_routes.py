@@ -0,0 +1,343 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, Field
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+import asyncio
+import httpx
+import re
+import weakref
+from urllib.parse import quote, unquote
+
+from app.auth import get_current_user
+from app.config import settings
+from app.utils import json_codec
+from app.utils.audit import audit_log
+from app.utils.compression import codificacoes_aceitas
+from app.utils.rbac_index import RBACIndex, get_rbac_index, get_rbac_index_async
+from app.utils.single_flight import AsyncSingleFlight
+from app.utils.upstream import get_upstream_client, upstream_base
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/proxy",
+    tags=["Ferramentas"],
+)
+
+# Cabeçalhos da resposta do backend repassados ao cliente
+_HEADERS_REPASSADOS = ("content-type", "cache-control", "etag", "last-modified")
+
+# GETs idênticos em andamento compartilham uma única chamada ao backend
+_get_flight = AsyncSingleFlight()
+
+# Limite de chamadas simultâneas por ferramenta nas execuções em lote (semáforos por event loop)
+_limites: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+
+
+class ChamadaLote(BaseModel):
+    ferramenta: str
+    path: str = ""
+    query: Dict[str, str] = Field(default_factory=dict)
+
+
+class LoteRequest(BaseModel):
+    chamadas: List[ChamadaLote] = Field(..., min_length=1)
+
+
+class RespostaFerramenta:
+    """
+    Resposta de um backend de ferramenta: corpo em memória (`corpo`) ou, para respostas
+    grandes, de tamanho desconhecido ou SSE, a resposta httpx ainda aberta (`upstream`),
+    lida em blocos de `PROXY_STREAM_CHUNK_BYTES` conforme o cliente consome.
+    Só respostas em memória podem ser compartilhadas entre chamadores. Com `codificado`,
+    os blocos saem como o backend os enviou (ex.: gzip) e `headers` inclui o
+    `content-encoding`, evitando descomprimir e recomprimir no gateway.
+    Uma falha do backend no meio da transmissão vira `HTTPException` 502 em `blocos()`,
+    para que quem consome não trate o corpo truncado como completo.
+    """
+
+    def __init__(self, status_code: int, headers: Dict[str, str], corpo: bytes = b"", upstream: Optional[httpx.Response] = None, codificado: bool = False):
+        self.status_code = status_code
+        self.headers = headers
+        self.corpo = corpo
+        self.upstream = upstream
+        self.codificado = codificado
+
+    async def blocos(self) -> AsyncIterator[bytes]:
+        if self.upstream is None:
+            if self.corpo:
+                yield self.corpo
+            return
+        try:
+            leitura = self.upstream.aiter_raw if self.codificado else self.upstream.aiter_bytes
+            async for bloco in leitura(settings.PROXY_STREAM_CHUNK_BYTES):
+                yield bloco
+        except httpx.HTTPError as e:
+            logger.error(f"Transmissão do backend interrompida ({self.upstream.url}): {e}")
+            raise HTTPException(status_code=502, detail="Transmissão do backend da ferramenta interrompida.")
+        finally:
+            await self.fechar()
+
+    async def ler(self, limite: int) -> Tuple[bytes, bool]:
+        """Corpo até `limite` bytes e se foi truncado (a transmissão é encerrada no limite)."""
+        partes: List[bytes] = []
+        total = 0
+        blocos = self.blocos()
+        try:
+            async for bloco in blocos:
+                partes.append(bloco)
+                total += len(bloco)
+                if total > limite:
+                    return b"".join(partes)[:limite], True
+        finally:
+            await blocos.aclose()
+            # Um gerador fechado antes da primeira iteração não executa o seu `finally`
+            await self.fechar()
+        return b"".join(partes), False
+
+    async def fechar(self) -> None:
+        if self.upstream is not None:
+            await self.upstream.aclose()
+
+    @property
+    def sse(self) -> bool:
+        return self.headers.get("content-type", "").startswith("text/event-stream")
+
+
+async def _transmitir(resposta: RespostaFerramenta) -> AsyncIterator[bytes]:
+    """
+    Corpo repassado ao cliente em `proxy_get`. Se o backend falhar no meio da transmissão,
+    um SSE recebe um evento `error`; os demais corpos são abortados (a exceção derruba a
+    conexão), já que o status 200 e parte do corpo já foram enviados.
+    """
+    try:
+        async for bloco in resposta.blocos():
+            yield bloco
+    except HTTPException as e:
+        if not resposta.sse or resposta.codificado:
+            raise
+        yield b"event: error\ndata: " + json_codec.dumps({"status": e.status_code, "detail": e.detail}) + b"\n\n"
+
+
+def _bufferizavel(resposta: httpx.Response) -> bool:
+    if resposta.headers.get("content-type", "").startswith("text/event-stream"):
+        return False
+    tamanho = resposta.headers.get("content-length", "")
+    return tamanho.isdigit() and int(tamanho) <= settings.PROXY_BUFFER_MAX_BYTES
+
+
+async def _fetch(url: str, query: str, aceitas: Sequence[str] = ()) -> RespostaFerramenta:
+    """`aceitas`: codificações que o cliente aceita receber sem decodificação no gateway."""
+    client = get_upstream_client()
+    requisicao = client.build_request("GET", httpx.URL(url, query=query.encode("utf-8")) if query else url)
+    resposta = await client.send(requisicao, stream=True)
+    headers = {k: resposta.headers[k] for k in _HEADERS_REPASSADOS if k in resposta.headers}
+    if not _bufferizavel(resposta):
+        codificacao = resposta.headers.get("content-encoding", "").lower()
+        if codificacao and codificacao in aceitas:
+            headers["content-encoding"] = codificacao
+            return RespostaFerramenta(resposta.status_code, headers, upstream=resposta, codificado=True)
+        return RespostaFerramenta(resposta.status_code, headers, upstream=resposta)
+    try:
+        return RespostaFerramenta(resposta.status_code, headers, await resposta.aread())
+    finally:
+        await resposta.aclose()
+
+
+def _montar_url(base: str, path: str) -> str:
+    """
+    URL do backend para `path` sob `base` (o `url_base` da ferramenta).
+
+    Segmentos `.`/`..`, inclusive percent-encoded, são recusados: o httpx os normaliza e a
+    chamada sairia do `url_base`, alcançando qualquer caminho do host do backend.
+
+    `path` chega já decodificado pelo roteamento; ele é recodificado antes de ir para a URL, senão
+    um `%3F`/`%23` do cliente viraria `?`/`#` e injetaria query ou fragmento na chamada ao backend.
+
+    Raises:
+        HTTPException: 400 se o caminho sair do `url_base`
+    """
+    decodificado, anterior = path, None
+    # Decodifica até estabilizar: "%252e%252e" vira "%2e%2e" e depois ".."
+    while decodificado != anterior:
+        anterior, decodificado = decodificado, unquote(decodificado)
+    if any(segmento in (".", "..") for segmento in re.split(r"[/\\]", decodificado)):
+        raise HTTPException(status_code=400, detail="Caminho inválido para a ferramenta.")
+    raiz = base.rstrip("/")
+    url = raiz + ("/" + quote(path.lstrip("/"), safe="/") if path else "")
+    try:
+        destino, origem = httpx.URL(url), httpx.URL(raiz + "/")
+    except httpx.InvalidURL:
+        raise HTTPException(status_code=400, detail="Caminho inválido para a ferramenta.")
+    if destino.host != origem.host or not (destino.path + "/").startswith(origem.path):
+        raise HTTPException(status_code=400, detail="Caminho inválido para a ferramenta.")
+    return url
+
+
+def _resolver_ferramenta(tool_id: str, user: dict, index: Optional[RBACIndex] = None) -> str:
+    """Valida a ferramenta e a permissão do usuário e retorna a URL base do backend."""
+    index = index or get_rbac_index()
+    tool = index.ferramentas.get(tool_id)
+    if tool is None:
+        raise HTTPException(status_code=404, detail=f"Ferramenta '{tool_id}' não encontrada.")
+    if not index.usuario_pode_usar(user, tool_id):
+        raise HTTPException(status_code=403, detail="Acesso negado")
+    base = upstream_base(tool)
+    if base is None:
+        raise HTTPException(status_code=404, detail=f"Ferramenta '{tool_id}' não tem backend HTTP configurado.")
+    return base
+
+
+async def _executar(tool_id: str, base: str, path: str, query: str, aceitas: Sequence[str] = ()) -> RespostaFerramenta:
+    """
+    GET ao backend; falhas de rede viram 502/504. GETs idênticos simultâneos são coalescidos
+    quando a resposta cabe em memória; se o backend transmitir, cada chamador abre a sua.
+    """
+    url = _montar_url(base, path)
+    transmissoes: List[RespostaFerramenta] = []
+    abandonada = False
+
+    async def _lider() -> RespostaFerramenta:
+        resposta = await _fetch(url, query, aceitas)
+        if resposta.upstream is not None:
+            transmissoes.append(resposta)
+            if abandonada:
+                # O chamador que abriu a transmissão foi cancelado antes de recebê-la
+                await resposta.fechar()
+        return resposta
+
+    try:
+        resposta = await _get_flight.do((tool_id, url, query), _lider)
+        if resposta.upstream is not None and not transmissoes:
+            resposta = await _fetch(url, query, aceitas)
+        return resposta
+    except asyncio.CancelledError:
+        # A tarefa do single-flight sobrevive ao cancelamento; a transmissão aberta para
+        # este chamador não tem mais dono e precisa ser fechada aqui ou ao ficar pronta
+        abandonada = True
+        for transmissao in transmissoes:
+            asyncio.ensure_future(transmissao.fechar())
+        raise
+    except httpx.TimeoutException:
+        logger.error(f"Tempo limite excedido no backend de {tool_id}: {url}")
+        raise HTTPException(status_code=504, detail="Tempo limite do backend da ferramenta excedido.")
+    except httpx.HTTPError as e:
+        logger.error(f"Falha ao contatar o backend de {tool_id} ({url}): {e}")
+        raise HTTPException(status_code=502, detail="Falha ao contatar o backend da ferramenta.")
+
+
+async def abrir_ferramenta(tool_id: str, path: str, query: str, user: dict, aceitas: Sequence[str] = ()) -> RespostaFerramenta:
+    """
+    Autoriza e executa um GET ao backend da ferramenta, registrando a auditoria.
+    `aceitas` são as codificações que podem ser repassadas sem decodificar (ver `RespostaFerramenta`).
+
+    Raises:
+        HTTPException: 403/404 (permissão ou ferramenta) e 502/504 (backend)
+    """
+    try:
+        base = _resolver_ferramenta(tool_id, user, await get_rbac_index_async())
+    except HTTPException as e:
+        if e.status_code == 403:
+            logger.warning(f"Acesso negado ao proxy de {tool_id} para {user['username']}")
+            await audit_log.record("acesso_negado", usuario=user["username"], ferramenta=tool_id)
+        raise
+    resposta = await _executar(tool_id, base, path, query, aceitas)
+    try:
+        await audit_log.record("ferramenta_executada", usuario=user["username"], ferramenta=tool_id, detalhes={"proxy": path, "status": resposta.status_code})
+    except BaseException:
+        # Cancelado à espera do buffer de auditoria: a transmissão não chegará a ser consumida
+        await resposta.fechar()
+        raise
+    return resposta
+
+
+def _limite(tool_id: str) -> asyncio.Semaphore:
+    semaforos = _limites.setdefault(asyncio.get_running_loop(), {})
+    semaforo = semaforos.get(tool_id)
+    if semaforo is None:
+        semaforo = semaforos[tool_id] = asyncio.Semaphore(settings.PROXY_BATCH_CONCURRENCY_PER_TOOL)
+    return semaforo
+
+
+async def executar_lote(chamadas: List[ChamadaLote], user: dict) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Executa as chamadas de um lote em paralelo e produz cada resultado assim que fica pronto.
+
+    Todas as chamadas são autorizadas de uma vez contra o mesmo índice RBAC; as negadas ou
+    inválidas geram um resultado de erro sem ir ao backend. Cada ferramenta tem no máximo
+    `PROXY_BATCH_CONCURRENCY_PER_TOOL` chamadas simultâneas. Os resultados trazem o
+    `indice` da chamada no lote, já que chegam na ordem em que terminam.
+    """
+    index = await get_rbac_index_async()
+    resolvidas: List[Tuple[int, ChamadaLote, str]] = []
+    erros: List[Dict[str, Any]] = []
+    for i, chamada in enumerate(chamadas):
+        try:
+            resolvidas.append((i, chamada, _resolver_ferramenta(chamada.ferramenta, user, index)))
+        except HTTPException as e:
+            if e.status_code == 403:
+                logger.warning(f"Acesso negado ao proxy de {chamada.ferramenta} para {user['username']} (lote)")
+                await audit_log.record("acesso_negado", usuario=user["username"], ferramenta=chamada.ferramenta)
+            erros.append({"indice": i, "ferramenta": chamada.ferramenta, "status": e.status_code, "erro": e.detail})
+    for erro in erros:
+        yield erro
+
+    async def _uma(i: int, chamada: ChamadaLote, base: str) -> Dict[str, Any]:
+        query = str(httpx.QueryParams(chamada.query))
+        try:
+            async with _limite(chamada.ferramenta):
+                resposta = await _executar(chamada.ferramenta, base, chamada.path, query)
+                corpo, truncado = await resposta.ler(settings.PROXY_BUFFER_MAX_BYTES)
+        except HTTPException as e:
+            return {"indice": i, "ferramenta": chamada.ferramenta, "status": e.status_code, "erro": e.detail}
+        await audit_log.record("ferramenta_executada", usuario=user["username"], ferramenta=chamada.ferramenta, detalhes={"proxy": chamada.path, "status": resposta.status_code, "lote": True})
+        resultado = {
+            "indice": i,
+            "ferramenta": chamada.ferramenta,
+            "status": resposta.status_code,
+            "content_type": resposta.headers.get("content-type"),
+            "corpo": corpo.decode("utf-8", errors="replace"),
+        }
+        if truncado:
+            resultado["truncado"] = True
+        return resultado
+
+    tarefas = [asyncio.ensure_future(_uma(i, chamada, base)) for i, chamada, base in resolvidas]
+    try:
+        for proxima in asyncio.as_completed(tarefas):
+            yield await proxima
+    finally:
+        for tarefa in tarefas:
+            tarefa.cancel()
+
+
+@router.post("/lote", summary="Executar chamadas a ferramentas em lote", description="Executa várias chamadas GET aos backends das ferramentas em uma única requisição: o token é validado uma vez, todas as chamadas são autorizadas contra o índice RBAC e executadas em paralelo (com limite de chamadas simultâneas por ferramenta). A resposta é NDJSON (`application/x-ndjson`), uma linha por chamada na ordem em que terminam, com `indice`, `ferramenta`, `status` e `corpo` (ou `erro`). Chamadas sem permissão recebem `status` 403 sem afetar as demais.\n\n**Códigos de resposta:**\n- 413: Mais chamadas que `PROXY_BATCH_MAX_CALLS`\n")
+async def proxy_lote(body: LoteRequest, user=Depends(get_current_user)):
+    if len(body.chamadas) > settings.PROXY_BATCH_MAX_CALLS:
+        raise HTTPException(status_code=413, detail=f"Máximo de {settings.PROXY_BATCH_MAX_CALLS} chamadas por lote.")
+
+    async def _linhas() -> AsyncIterator[bytes]:
+        async for resultado in executar_lote(body.chamadas, user):
+            yield json_codec.dumps(resultado) + b"\n"
+
+    return StreamingResponse(_linhas(), media_type="application/x-ndjson")
+
+
+@router.get("/{tool_id}/{path:path}", summary="Proxy GET para o backend da ferramenta", description="Repassa um GET ao `url_base` da ferramenta, se o usuário tiver permissão. Requisições idênticas (mesma ferramenta, caminho e query) simultâneas são atendidas por uma única chamada ao backend, cujo resultado é compartilhado; por isso o backend não recebe as credenciais do usuário e sua resposta não deve depender de quem chama (use `POST /tools/introspect` quando precisar da identidade). Respostas sem `Content-Length`, maiores que `PROXY_BUFFER_MAX_BYTES` ou SSE (`text/event-stream`) não são coalescidas: são transmitidas ao cliente bloco a bloco, à medida que o backend produz (se o backend já comprimiu o corpo e o cliente aceita a codificação, ele é repassado sem descompressão).\n\n**Códigos de resposta:**\n- 400: Caminho com segmentos `.`/`..` (sairia do `url_base`)\n- 403: Sem permissão para a ferramenta\n- 404: Ferramenta inexistente ou sem backend HTTP\n- 502: Falha ao contatar o backend\n- 504: Tempo limite do backend excedido\n")
+async def proxy_get(tool_id: str, path: str, request: Request, user=Depends(get_current_user)):
+    aceitas = codificacoes_aceitas(request.headers.get("accept-encoding", ""))
+    # request.url é remontada a partir do caminho já decodificado, então um "%3F" no caminho
+    # apareceria em request.url.query; a query original vem intacta em query_string
+    query = request.scope.get("query_string", b"").decode("latin-1")
+    resposta = await abrir_ferramenta(tool_id, path, query, user, aceitas)
+    if resposta.upstream is None:
+        return Response(content=resposta.corpo, status_code=resposta.status_code, headers=resposta.headers)
+    headers = dict(resposta.headers)
+    if resposta.sse:
+        # Evita que proxies reversos acumulem os eventos antes de repassá-los
+        headers["x-accel-buffering"] = "no"
+    return StreamingResponse(_transmitir(resposta), status_code=resposta.status_code, headers=headers, background=BackgroundTask(resposta.fechar))
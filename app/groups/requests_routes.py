@@ -1,15 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException
 from typing import List
 
-from app.auth import get_current_user
-from app.utils.dependencies import get_rbac_data
+from app.auth import get_current_user, REQUER_ADMIN
+from app.utils.rbac_index import get_rbac_index_async
+from app.utils.audit import audit_log
+from app.utils.rbac_utils import is_group_admin_or_global
 from app.utils.request_manager import (
-    create_access_request, 
-    get_request_by_id, 
-    get_requests_by_user,
-    get_pending_requests_by_admin,
-    review_access_request,
-    apply_approved_request
+    create_access_request_async,
+    get_request_by_id_async,
+    get_requests_by_user_async,
+    get_pending_requests_by_admin_async,
+    review_access_request_async,
+    apply_approved_request_async
 )
 from app.models.requests import (
     GroupAccessRequestCreate, 
@@ -34,22 +36,23 @@ async def create_request(request: GroupAccessRequestCreate, user=Depends(get_cur
     Cria uma nova solicitação de acesso a um grupo.
     Os usuários não podem solicitar acesso a grupos que já participam.
     """
-    rbac = get_rbac_data()
+    index = await get_rbac_index_async()
     username = user["username"]
     grupo = request.grupo
     
     # Verificar se grupo existe
-    if grupo not in rbac["grupos"]:
+    if not index.existe_grupo(grupo):
         logger.warning(f"Solicitação para grupo inexistente: {grupo} por {username}")
         raise HTTPException(status_code=404, detail=f"Grupo '{grupo}' não encontrado")
     
-    # Verificar se usuário já pertence ao grupo
-    if grupo in rbac["usuarios"][username]["grupos"]:
+    # Verificar se usuário já pertence ao grupo (conjunto do índice, O(1))
+    if index.pertence(username, grupo):
         logger.warning(f"Usuário {username} já pertence ao grupo {grupo}")
         raise HTTPException(status_code=400, detail=f"Você já pertence ao grupo '{grupo}'")
     
     # Criar solicitação
-    access_request = create_access_request(username, grupo, request.justificativa)
+    access_request = await create_access_request_async(username, grupo, request.justificativa)
+    await audit_log.record("solicitacao_criada", usuario=username, alvo=grupo, detalhes={"request_id": access_request.request_id})
     
     # Converter para modelo de resposta
     return GroupAccessRequestResponse(
@@ -70,7 +73,7 @@ async def get_my_requests(user=Depends(get_current_user)):
     Lista todas as solicitações de acesso feitas pelo usuário atual.
     """
     username = user["username"]
-    user_requests = get_requests_by_user(username)
+    user_requests = await get_requests_by_user_async(username)
     
     # Converter para modelo de resposta
     return [
@@ -87,21 +90,20 @@ async def get_my_requests(user=Depends(get_current_user)):
         ) for req in user_requests
     ]
 
-@router.get("/admin", response_model=List[GroupAccessRequestResponse], summary="Solicitações pendentes", description="Lista solicitações pendentes para grupos onde o usuário é admin")
+@router.get("/admin", response_model=List[GroupAccessRequestResponse], summary="Solicitações pendentes", description="Lista solicitações pendentes para grupos onde o usuário é admin", openapi_extra=REQUER_ADMIN)
 async def get_admin_requests(user=Depends(get_current_user)):
     """
     Lista todas as solicitações pendentes para grupos onde o usuário é administrador.
     Administradores globais podem ver solicitações para todos os grupos.
     """
     username = user["username"]
-    rbac = get_rbac_data()
     
     # Verificar se usuário é admin (global ou de grupo)
     if user["papel"] not in ["admin", "global_admin"]:
         raise HTTPException(status_code=403, detail="Acesso restrito a administradores")
     
     # Obter solicitações pendentes para os grupos do admin
-    admin_requests = get_pending_requests_by_admin(username, rbac)
+    admin_requests = await get_pending_requests_by_admin_async(username)
     
     # Converter para modelo de resposta
     return [
@@ -126,10 +128,9 @@ async def get_request(request_id: str, user=Depends(get_current_user)):
     Administradores podem ver solicitações dos grupos que administram.
     """
     username = user["username"]
-    rbac = get_rbac_data()
     
     # Buscar solicitação
-    request = get_request_by_id(request_id)
+    request = await get_request_by_id_async(request_id)
     if not request:
         raise HTTPException(status_code=404, detail="Solicitação não encontrada")
     
@@ -140,8 +141,7 @@ async def get_request(request_id: str, user=Depends(get_current_user)):
             pass  # Global admin pode ver qualquer solicitação
         elif user["papel"] == "admin":
             # Admin de grupo só pode ver solicitações do seu grupo
-            grupo_admins = rbac["grupos"].get(request.grupo, {}).get("admins", [])
-            if username not in grupo_admins:
+            if not is_group_admin_or_global(user, request.grupo, index=await get_rbac_index_async()):
                 raise HTTPException(status_code=403, detail="Sem permissão para acessar esta solicitação")
         else:
             # Usuário comum tentando acessar solicitação de outro
@@ -160,21 +160,20 @@ async def get_request(request_id: str, user=Depends(get_current_user)):
         review_comment=request.review_comment
     )
 
-@router.post("/{request_id}/review", response_model=GroupAccessRequestResponse, summary="Revisar solicitação", description="Aprova ou rejeita uma solicitação de acesso")
+@router.post("/{request_id}/review", response_model=GroupAccessRequestResponse, summary="Revisar solicitação", description="Aprova ou rejeita uma solicitação de acesso", openapi_extra=REQUER_ADMIN)
 async def review_request(request_id: str, review: GroupAccessRequestReview, user=Depends(get_current_user)):
     """
     Aprova ou rejeita uma solicitação de acesso a grupo.
     Apenas admins do grupo ou admins globais podem revisar solicitações.
     """
     username = user["username"]
-    rbac = get_rbac_data()
     
     # Verificar se usuário é admin (global ou de grupo)
     if user["papel"] not in ["admin", "global_admin"]:
         raise HTTPException(status_code=403, detail="Acesso restrito a administradores")
     
     # Buscar solicitação
-    request = get_request_by_id(request_id)
+    request = await get_request_by_id_async(request_id)
     if not request:
         raise HTTPException(status_code=404, detail="Solicitação não encontrada")
     
@@ -184,12 +183,11 @@ async def review_request(request_id: str, review: GroupAccessRequestReview, user
     
     # Verificar se admin tem permissão neste grupo
     if user["papel"] == "admin":
-        grupo_admins = rbac["grupos"].get(request.grupo, {}).get("admins", [])
-        if username not in grupo_admins:
+        if not is_group_admin_or_global(user, request.grupo, index=await get_rbac_index_async()):
             raise HTTPException(status_code=403, detail="Sem permissão para administrar este grupo")
     
     # Processar revisão
-    updated_request = review_access_request(
+    updated_request = await review_access_request_async(
         request_id=request_id,
         reviewer=username,
         status=review.status,
@@ -198,10 +196,11 @@ async def review_request(request_id: str, review: GroupAccessRequestReview, user
     
     if not updated_request:
         raise HTTPException(status_code=500, detail="Erro ao processar revisão")
+    await audit_log.record("solicitacao_revisada", usuario=username, alvo=request.grupo, detalhes={"request_id": request_id, "solicitante": request.username, "status": review.status.value})
     
     # Se aprovado, adicionar usuário ao grupo
     if review.status == RequestStatus.APPROVED:
-        if not apply_approved_request(request_id, rbac):
+        if not await apply_approved_request_async(request_id):
             # A solicitação foi aprovada, mas houve erro ao adicionar ao grupo
             logger.error(f"Erro ao adicionar usuário {request.username} ao grupo {request.grupo}")
             raise HTTPException(
@@ -4,13 +4,27 @@ from fastapi.exceptions import RequestValidationError
 from fastapi.encoders import jsonable_encoder
 from fastapi import Request
 from fastapi.exception_handlers import request_validation_exception_handler
-from app.auth import authenticate_user, create_jwt_for_user, get_current_user, validate_and_hash_password, verify_password
-from app.utils.dependencies import get_rbac_data
-from app.utils.password import hash_password, migrate_rbac_passwords
+from app.config import settings
+from app.auth import authenticate_user, create_jwt_for_user, get_current_user, validate_and_hash_password, verify_password, REQUER_ADMIN, REQUER_ADMIN_GLOBAL, requer_ferramenta
+from app.utils.dependencies import get_rbac_data_async
+from app.utils.rbac_store import update_rbac_async, update_rbac_model_async, NoChange
+from app.models.rbac import RBACModel
+from app.utils.request_manager import close_group_requests_async, rename_group_requests_async
+from app.utils.rbac_wal import replay_rbac
+from app.utils.rbac_index import RBACIndex, get_rbac_index, get_rbac_index_async
+from app.utils.rbac_mmap import get_rbac_grupo_async, get_rbac_usuario_async
+from app.utils.storage_io import run_io
+from app.utils.login_guard import login_guard
+from app.utils.password import bcrypt_stats, hash_password, migrate_rbac_passwords
 from app.utils.rbac_utils import is_group_admin_or_global
+from app.utils.audit import audit_log
+from app.utils import json_codec
+from app.utils.jwt_keys import get_keyring
+from app.utils.session_store import session_store, InvalidRefreshToken, RefreshTokenReuse
 import logging
+import math
 from typing import Optional, List, Dict, Any
-from datetime import timedelta
+from datetime import datetime
 from pydantic import BaseModel
 
 logger = logging.getLogger(__name__)
@@ -55,8 +69,8 @@ class UserUpdateRequest(BaseModel):
     ferramentas_disponiveis: List[ToolResponseSchema]
 
 # Rotas de autenticação e ferramentas
-@router.post('/login', tags=["Auth"], summary="Login de usuário", description="Autentica usuário e retorna JWT.\n\n**Exemplo de request:**\n```json\n{\n  \"username\": \"usuario1\",\n  \"password\": \"senha123\"\n}\n```\n\n**Exemplo de resposta (200):**\n```json\n{\n  \"access_token\": \"<jwt>\",\n  \"token_type\": \"bearer\"\n}\n```\n\n**Códigos de resposta:**\n- 200: Sucesso\n- 400: Usuário e senha obrigatórios\n- 401: Usuário ou senha inválidos\n- 500: Erro interno\n")
-async def login(data: dict):
+@router.post('/login', tags=["Auth"], summary="Login de usuário", description="Autentica usuário e retorna JWT.\n\n**Exemplo de request:**\n```json\n{\n  \"username\": \"usuario1\",\n  \"password\": \"senha123\"\n}\n```\n\n**Exemplo de resposta (200):**\n```json\n{\n  \"access_token\": \"<jwt>\",\n  \"token_type\": \"bearer\",\n  \"refresh_token\": \"<opaco>\",\n  \"expires_in\": 900\n}\n```\n\n**Códigos de resposta:**\n- 200: Sucesso\n- 400: Usuário e senha obrigatórios\n- 401: Usuário ou senha inválidos\n- 429: Muitas tentativas falhas para o usuário ou IP (ver `Retry-After`)\n- 500: Erro interno\n")
+async def login(data: dict, request: Request):
     username: Optional[str] = data.get("username")
     password: Optional[str] = data.get("password")
 
@@ -64,27 +78,92 @@ async def login(data: dict):
         logger.warning("Tentativa de login sem usuário ou senha.")
         raise HTTPException(status_code=400, detail="Usuário e senha obrigatórios.")
 
+    # Bloqueio verificado antes do bcrypt: tentativas em massa não consomem CPU do hash
+    ip = request.client.host if request.client else None
+    restante = login_guard.bloqueio(username, ip)
+    if restante > 0:
+        logger.warning(f"Login bloqueado para usuário '{username}' (IP {ip}) por mais {restante:.0f}s")
+        await audit_log.record("login_bloqueado", usuario=username, detalhes={"ip": ip})
+        raise HTTPException(status_code=429, detail="Muitas tentativas de login. Tente novamente mais tarde.", headers={"Retry-After": str(math.ceil(restante))})
+
     try:
-        user = authenticate_user(username, password)
+        user = await run_io(authenticate_user, username, password)
         if not user:
             logger.warning(f"Tentativa de login inválida para usuário '{username}'")
+            login_guard.registrar_falha(username, ip)
+            await audit_log.record("login_falha", usuario=username)
             raise HTTPException(status_code=401, detail="Usuário ou senha inválidos")
-        
-        token = create_jwt_for_user(username)
+        login_guard.registrar_sucesso(username)
+
+        sid, refresh = await run_io(session_store.create_session, username)
+        token = await run_io(create_jwt_for_user, username, sid=sid)
         logger.info(f"Usuário '{username}' autenticado com sucesso")
-        return {"access_token": token, "token_type": "bearer"}
+        await audit_log.record("login_sucesso", usuario=username)
+        return _token_response(token, refresh)
     except HTTPException as http_exc:
         raise http_exc
     except Exception as e:
         logger.error(f"Erro inesperado durante o login para o usuário '{username}': {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Ocorreu um erro interno no servidor durante o login. Verifique os logs do servidor para mais detalhes.")
 
+def _token_response(access_token: str, refresh_token: Optional[str] = None) -> Dict[str, Any]:
+    resposta = {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    }
+    if refresh_token:
+        resposta["refresh_token"] = refresh_token
+    return resposta
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
+
+@router.post('/token/refresh', tags=["Auth"], summary="Rotacionar refresh token", description="Troca um refresh token por um novo par (access token curto + novo refresh token). Cada refresh token vale uma única vez: reapresentar um token já usado revoga a sessão inteira.\n\n**Códigos de resposta:**\n- 200: Sucesso\n- 401: Refresh token inválido, expirado, reutilizado ou de sessão revogada\n")
+async def rotacionar_refresh_token(data: RefreshTokenRequest):
+    try:
+        sid, username, novo_refresh = await run_io(session_store.rotate, data.refresh_token)
+    except RefreshTokenReuse as e:
+        logger.warning(f"Reuso de refresh token detectado para '{e.username}'; sessão {e.sid} revogada")
+        await audit_log.record("refresh_token_reutilizado", usuario=e.username, alvo=e.sid)
+        raise HTTPException(status_code=401, detail="Refresh token reutilizado; sessão revogada.")
+    except InvalidRefreshToken:
+        raise HTTPException(status_code=401, detail="Refresh token inválido ou expirado.")
+
+    try:
+        token = await run_io(create_jwt_for_user, username, sid=sid)
+    except ValueError:
+        # Usuário removido após o login
+        await run_io(session_store.revoke_session, sid)
+        raise HTTPException(status_code=401, detail="Refresh token inválido ou expirado.")
+    return _token_response(token, novo_refresh)
+
+@router.post('/logout', tags=["Auth"], summary="Encerrar sessão", description="Revoga a sessão do token atual: o refresh token deixa de funcionar e os access tokens da sessão passam a ser rejeitados.")
+async def logout(user=Depends(get_current_user)):
+    if user.get("sid"):
+        await run_io(session_store.revoke_session, user["sid"])
+    await audit_log.record("logout", usuario=user["username"], alvo=user.get("sid"))
+    return {"message": "Sessão encerrada."}
+
+@router.post('/usuarios/{username_param}/sessoes/revogar', tags=["Admin"], summary="Revogar sessões de um usuário", description="Admin global encerra todas as sessões ativas do usuário; os tokens já emitidos passam a ser rejeitados imediatamente.", openapi_extra=REQUER_ADMIN_GLOBAL)
+async def revogar_sessoes_usuario(username_param: str, user=Depends(get_current_user)):
+    if user["papel"] != "global_admin":
+        raise HTTPException(status_code=403, detail="Acesso restrito ao admin global.")
+    revogadas = await run_io(session_store.revoke_user, username_param)
+    logger.info(f"{revogadas} sessões de '{username_param}' revogadas por {user['username']}")
+    await audit_log.record("sessoes_revogadas", usuario=user["username"], alvo=username_param, detalhes={"sessoes": revogadas})
+    return {"revogadas": revogadas}
+
 # Endpoint para renovar token JWT (token refresh)
-@router.post('/refresh-token', tags=["Auth"], summary="Renovar token", description="Renova o token JWT do usuário atual.")
+@router.post('/refresh-token', tags=["Auth"], summary="Renovar token", description="Renova o access token do usuário atual na mesma sessão, que precisa estar ativa e dentro da validade; a renovação não estende a sessão. Prefira `POST /tools/token/refresh` com o refresh token.\n\n**Códigos de resposta:**\n- 200: Sucesso\n- 401: Token sem sessão ou sessão expirada/revogada\n- 500: Erro interno\n")
 async def refresh_token(user=Depends(get_current_user)):
+    # Sem esta checagem, encadear renovações manteria o acesso além da validade da sessão
+    sid = user.get("sid")
+    if not sid or not await run_io(session_store.is_active, sid, user["username"]):
+        raise HTTPException(status_code=401, detail="Sessão expirada ou inválida; faça login novamente.")
     try:
-        token = create_jwt_for_user(user["username"], expires_delta=timedelta(hours=24))
-        return {"access_token": token, "token_type": "bearer"}
+        token = await run_io(create_jwt_for_user, user["username"], sid=user.get("sid"))
+        return _token_response(token)
     except Exception as e:
         logger.error(f"Erro ao renovar token: {e}")
         raise HTTPException(
@@ -98,9 +177,9 @@ async def health():
     return {"status": "ok"}
 
 # Exemplo de rota para listar grupos (apenas admin global)
-@router.get('/grupos', tags=["Admin"], summary="Listar grupos", description="Lista todos os grupos com detalhes.\n\n**Exemplo de resposta:**\n```json\n[\n  {\n    \"nome\": \"grupo1\",\n    \"descricao\": \"Grupo de exemplo\",\n    \"administradores\": [\"admin1\"],\n    \"usuarios\": [\"user1\", \"admin1\"],\n    \"ferramentas_disponiveis\": [\n      {\n        \"id\": \"tool_x\",\n        \"nome\": \"Ferramenta X\",\n        \"url_base\": \"/tools/ferramenta_x\",\n        \"descricao\": \"Ferramenta de Teste X\"\n      }\n    ]\n  }\n]\n```\n\n**Códigos de resposta:**\n- 200: Sucesso\n- 403: Acesso restrito ao admin global\n")
+@router.get('/grupos', tags=["Admin"], summary="Listar grupos", description="Lista todos os grupos com detalhes.\n\n**Exemplo de resposta:**\n```json\n[\n  {\n    \"nome\": \"grupo1\",\n    \"descricao\": \"Grupo de exemplo\",\n    \"administradores\": [\"admin1\"],\n    \"usuarios\": [\"user1\", \"admin1\"],\n    \"ferramentas_disponiveis\": [\n      {\n        \"id\": \"tool_x\",\n        \"nome\": \"Ferramenta X\",\n        \"url_base\": \"/tools/ferramenta_x\",\n        \"descricao\": \"Ferramenta de Teste X\"\n      }\n    ]\n  }\n]\n```\n\n**Códigos de resposta:**\n- 200: Sucesso\n- 403: Acesso restrito ao admin global\n", openapi_extra=REQUER_ADMIN_GLOBAL)
 async def listar_grupos(user=Depends(get_current_user)):
-    rbac = get_rbac_data()
+    rbac = await get_rbac_data_async()
     if user["papel"] != "global_admin":
         raise HTTPException(status_code=403, detail="Acesso restrito ao admin global.")
     grupos = []
@@ -127,9 +206,8 @@ class CreateGroupRequest(BaseModel):
     nome: str
     descricao: Optional[str] = None
 
-@router.post('/grupos', tags=["Admin"], summary="Criar grupo", description="Admin global pode criar um novo grupo.")
+@router.post('/grupos', tags=["Admin"], summary="Criar grupo", description="Admin global pode criar um novo grupo.", openapi_extra=REQUER_ADMIN_GLOBAL)
 async def criar_grupo(data: CreateGroupRequest, user=Depends(get_current_user)):
-    rbac = get_rbac_data()
     if user["papel"] != "global_admin":
         raise HTTPException(status_code=403, detail="Acesso restrito ao admin global.")
     
@@ -138,21 +216,20 @@ async def criar_grupo(data: CreateGroupRequest, user=Depends(get_current_user)):
 
     if not nome:
         raise HTTPException(status_code=400, detail="Nome do grupo é obrigatório.")
-    if nome in rbac["grupos"]:
-        raise HTTPException(status_code=409, detail="Grupo já existe.")
-    
-    rbac["grupos"][nome] = {
-        "descricao": descricao if descricao is not None else "",
-        "admins": [], 
-        "users": [], 
-        "ferramentas": []
-    }
-    from app.config import settings
-    import json
-    rbac_path = settings.RBAC_FILE
-    with open(rbac_path, 'w', encoding='utf-8') as f:
-        json.dump(rbac, f, indent=2, ensure_ascii=False)
+
+    def _criar(rbac):
+        if nome in rbac["grupos"]:
+            raise HTTPException(status_code=409, detail="Grupo já existe.")
+        rbac["grupos"][nome] = {
+            "descricao": descricao if descricao is not None else "",
+            "admins": [], 
+            "users": [], 
+            "ferramentas": []
+        }
+
+    await update_rbac_async(_criar)
     logger.info(f"Grupo '{nome}' criado por {user['username']}")
+    await audit_log.record("grupo_criado", usuario=user["username"], alvo=nome)
     return {"message": f"Grupo '{nome}' criado com sucesso."}
 
 # RF02: Editar grupo (admin global)
@@ -160,328 +237,293 @@ class EditGroupRequest(BaseModel):
     nome: Optional[str] = None
     descricao: Optional[str] = None
 
-@router.put('/grupos/{grupo}', tags=["Admin"], summary="Editar grupo", description="Admin global pode editar nome e/ou descrição do grupo.")
+@router.put('/grupos/{grupo}', tags=["Admin"], summary="Editar grupo", description="Admin global pode editar nome e/ou descrição do grupo.", openapi_extra=REQUER_ADMIN_GLOBAL)
 async def editar_grupo(grupo: str, data: EditGroupRequest, user=Depends(get_current_user)):
-    rbac = get_rbac_data()
     if user["papel"] != "global_admin":
         raise HTTPException(status_code=403, detail="Acesso restrito ao admin global.")
-    if grupo not in rbac["grupos"]:
-        raise HTTPException(status_code=404, detail="Grupo não encontrado.")
 
-    group_data_to_update = rbac["grupos"][grupo]
-    
     novo_nome = data.nome
     nova_descricao = data.descricao
-    updated = False
-
-    if nova_descricao is not None:
-        group_data_to_update["descricao"] = nova_descricao
-        updated = True
-
-    if novo_nome and novo_nome != grupo:
-        if novo_nome in rbac["grupos"]:
-            raise HTTPException(status_code=409, detail=f"Já existe um grupo com o nome '{novo_nome}'.")
-        
-        for username, user_details in rbac.get("usuarios", {}).items():
-            if "grupos" in user_details and grupo in user_details["grupos"]:
-                user_details["grupos"].remove(grupo)
-                user_details["grupos"].append(novo_nome)
-        
-        if "join_requests" in rbac and grupo in rbac["join_requests"]:
-            rbac["join_requests"][novo_nome] = rbac["join_requests"].pop(grupo)
-
-        rbac["grupos"][novo_nome] = rbac["grupos"].pop(grupo)
-        group_data_to_update = rbac["grupos"][novo_nome]
-        grupo = novo_nome
-        updated = True
-    
-    if not updated and novo_nome is None and nova_descricao is None:
+
+    renomear = bool(novo_nome) and novo_nome != grupo
+
+    def _editar(rbac: RBACModel):
+        if grupo not in rbac.grupos:
+            raise HTTPException(status_code=404, detail="Grupo não encontrado.")
+
+        updated = False
+
+        if nova_descricao is not None:
+            rbac.grupos[grupo].descricao = nova_descricao
+            updated = True
+
+        if renomear:
+            if novo_nome in rbac.grupos:
+                raise HTTPException(status_code=409, detail=f"Já existe um grupo com o nome '{novo_nome}'.")
+            # Só os membros do grupo são atualizados, sem percorrer todos os usuários
+            rbac.rename_group(grupo, novo_nome)
+            updated = True
+
+        if not updated:
+            return NoChange(False)
+        return True
+
+    if not await update_rbac_model_async(_editar) and novo_nome is None and nova_descricao is None:
          return JSONResponse(content={"message": "Nenhuma alteração fornecida."}, status_code=200)
 
-    from app.config import settings
-    import json
-    rbac_path = settings.RBAC_FILE
-    with open(rbac_path, 'w', encoding='utf-8') as f:
-        json.dump(rbac, f, indent=2, ensure_ascii=False)
+    if renomear:
+        # Solicitações do grupo (pendentes e histórico) passam a apontar para o novo nome
+        await rename_group_requests_async(grupo, novo_nome)
+        grupo = novo_nome
     logger.info(f"Grupo '{grupo}' editado por {user['username']}")
+    await audit_log.record("grupo_editado", usuario=user["username"], alvo=grupo, detalhes=data.model_dump(exclude_none=True))
     return {"message": f"Grupo '{grupo}' editado com sucesso."}
 
 # RF02: Remover grupo (admin global)
-@router.delete('/grupos/{grupo}', tags=["Admin"], summary="Remover grupo", description="Admin global pode remover grupo.")
+@router.delete('/grupos/{grupo}', tags=["Admin"], summary="Remover grupo", description="Admin global pode remover grupo.", openapi_extra=REQUER_ADMIN_GLOBAL)
 async def remover_grupo(grupo: str, user=Depends(get_current_user)):
-    rbac = get_rbac_data()
     if user["papel"] != "global_admin":
         raise HTTPException(status_code=403, detail="Acesso restrito ao admin global.")
-    if grupo not in rbac["grupos"]:
-        raise HTTPException(status_code=404, detail="Grupo não encontrado.")
-    # Remover grupo da lista de grupos e admin_de_grupos dos usuários
-    for username, user_data in rbac["usuarios"].items():
-        if "grupos" in user_data and grupo in user_data["grupos"]:
-            user_data["grupos"].remove(grupo)
-        if "admin_de_grupos" in user_data and grupo in user_data["admin_de_grupos"]:
-            user_data["admin_de_grupos"].remove(grupo)
-    # Remove group from rbac
-    rbac["grupos"].pop(grupo)
-    from app.config import settings
-    import json
-    rbac_path = settings.RBAC_FILE
-    with open(rbac_path, 'w', encoding='utf-8') as f:
-        json.dump(rbac, f, indent=2, ensure_ascii=False)
+
+    def _remover(rbac: RBACModel):
+        if grupo not in rbac.grupos:
+            raise HTTPException(status_code=404, detail="Grupo não encontrado.")
+        # Remove o grupo e a referência a ele (grupos e admin_de_grupos) apenas nos seus membros
+        rbac.remove_group(grupo)
+
+    await update_rbac_model_async(_remover)
+    # Solicitações pendentes para o grupo removido não têm mais quem as aprove
+    await close_group_requests_async(grupo, user["username"])
     logger.info(f"Grupo '{grupo}' removido por {user['username']}")
+    await audit_log.record("grupo_removido", usuario=user["username"], alvo=grupo)
     return {"message": f"Grupo '{grupo}' removido com sucesso."}
 
 # RF02: Designar admin de grupo (admin global)
-@router.post('/grupos/{grupo}/admins', tags=["Admin"], summary="Designar admin de grupo", description="Admin global pode designar admin de grupo.")
+@router.post('/grupos/{grupo}/admins', tags=["Admin"], summary="Designar admin de grupo", description="Admin global pode designar admin de grupo.", openapi_extra=REQUER_ADMIN_GLOBAL)
 async def designar_admin_grupo(grupo: str, data: dict, user=Depends(get_current_user)):
-    rbac = get_rbac_data()
     if user["papel"] != "global_admin":
         raise HTTPException(status_code=403, detail="Acesso restrito ao admin global.")
-    if grupo not in rbac["grupos"]:
-        raise HTTPException(status_code=404, detail="Grupo não encontrado.")
     novo_admin = data.get("username")
-    if not novo_admin or novo_admin not in rbac["usuarios"]:
-        raise HTTPException(status_code=400, detail="Usuário inválido.")
-    # Mensagem de erro exata para usuário não-membro
-    if novo_admin not in rbac["grupos"][grupo]["users"]:
-        raise HTTPException(status_code=400, detail=f"Usuário '{novo_admin}' não é membro do grupo '{grupo}'. Adicione como membro primeiro.")
-    if novo_admin not in rbac["grupos"][grupo]["admins"]:
-        rbac["grupos"][grupo]["admins"].append(novo_admin)
-    if grupo not in rbac["usuarios"][novo_admin]["grupos"]:
-        rbac["usuarios"][novo_admin]["grupos"].append(grupo)
-    rbac["usuarios"][novo_admin]["papel"] = "admin"
-    from app.config import settings
-    import json
-    rbac_path = settings.RBAC_FILE
-    with open(rbac_path, 'w', encoding='utf-8') as f:
-        json.dump(rbac, f, indent=2, ensure_ascii=False)
+
+    def _designar(rbac):
+        if grupo not in rbac["grupos"]:
+            raise HTTPException(status_code=404, detail="Grupo não encontrado.")
+        if not novo_admin or novo_admin not in rbac["usuarios"]:
+            raise HTTPException(status_code=400, detail="Usuário inválido.")
+        # Mensagem de erro exata para usuário não-membro
+        if novo_admin not in rbac["grupos"][grupo]["users"]:
+            raise HTTPException(status_code=400, detail=f"Usuário '{novo_admin}' não é membro do grupo '{grupo}'. Adicione como membro primeiro.")
+        if novo_admin not in rbac["grupos"][grupo]["admins"]:
+            rbac["grupos"][grupo]["admins"].append(novo_admin)
+        if grupo not in rbac["usuarios"][novo_admin]["grupos"]:
+            rbac["usuarios"][novo_admin]["grupos"].append(grupo)
+        rbac["usuarios"][novo_admin]["papel"] = "admin"
+
+    await update_rbac_async(_designar)
     logger.info(f"Usuário '{novo_admin}' designado admin do grupo '{grupo}' por {user['username']}")
+    await audit_log.record("admin_designado", usuario=user["username"], alvo=grupo, detalhes={"admin": novo_admin})
     return {"message": f"Usuário '{novo_admin}' agora é admin do grupo '{grupo}'"}
 
-@router.delete('/grupos/{grupo}/admins/{username_param}', tags=["Admin"], summary="Remover admin de grupo", description="Admin global ou outro admin do grupo pode remover um admin (não a si mesmo, a menos que seja o último e admin global).")
+@router.delete('/grupos/{grupo}/admins/{username_param}', tags=["Admin"], summary="Remover admin de grupo", description="Admin global ou outro admin do grupo pode remover um admin (não a si mesmo, a menos que seja o último e admin global).", openapi_extra=REQUER_ADMIN)
 async def remover_admin_de_grupo(grupo: str, username_param: str, current_user_identity=Depends(get_current_user)):
-    rbac = get_rbac_data()
-    
-    if grupo not in rbac.get("grupos", {}):
-        raise HTTPException(status_code=404, detail=f"Grupo '{grupo}' não encontrado.")
-    
-    group_admins = rbac["grupos"][grupo].get("admins", [])
-    
-    is_global_admin = current_user_identity["papel"] == "global_admin"
-    is_group_admin = current_user_identity["username"] in group_admins
+    def _remover_admin(rbac):
+        if grupo not in rbac.get("grupos", {}):
+            raise HTTPException(status_code=404, detail=f"Grupo '{grupo}' não encontrado.")
 
-    if not (is_global_admin or is_group_admin):
-        raise HTTPException(status_code=403, detail="Acesso restrito ao admin global ou admin do grupo.")
+        group_admins = rbac["grupos"][grupo].get("admins", [])
 
-    if username_param not in rbac.get("usuarios", {}):
-        raise HTTPException(status_code=404, detail=f"Usuário admin '{username_param}' não encontrado.")
+        is_global_admin = current_user_identity["papel"] == "global_admin"
+        is_group_admin = current_user_identity["username"] in group_admins
 
-    if username_param not in group_admins:
-        raise HTTPException(status_code=404, detail=f"Usuário '{username_param}' não é admin do grupo '{grupo}'.")
+        if not (is_global_admin or is_group_admin):
+            raise HTTPException(status_code=403, detail="Acesso restrito ao admin global ou admin do grupo.")
 
-    if len(group_admins) == 1 and username_param == group_admins[0]:
-        if not is_global_admin:
-            raise HTTPException(status_code=400, detail="Não é possível remover o último administrador do grupo.")
+        if username_param not in rbac.get("usuarios", {}):
+            raise HTTPException(status_code=404, detail=f"Usuário admin '{username_param}' não encontrado.")
 
-    rbac["grupos"][grupo]["admins"].remove(username_param)
+        if username_param not in group_admins:
+            raise HTTPException(status_code=404, detail=f"Usuário '{username_param}' não é admin do grupo '{grupo}'.")
 
-    is_admin_elsewhere = False
-    if rbac["usuarios"][username_param].get("papel") == "global_admin":
-        is_admin_elsewhere = True
-    else:
-        for g_name, g_details in rbac.get("grupos", {}).items():
-            if username_param in g_details.get("admins", []):
-                is_admin_elsewhere = True
-                break
-    
-    if not is_admin_elsewhere:
-        rbac["usuarios"][username_param]["papel"] = "user"
-
-    from app.config import settings
-    import json
-    rbac_path = settings.RBAC_FILE
-    with open(rbac_path, 'w', encoding='utf-8') as f:
-        json.dump(rbac, f, indent=2, ensure_ascii=False)
-    
+        if len(group_admins) == 1 and username_param == group_admins[0]:
+            if not is_global_admin:
+                raise HTTPException(status_code=400, detail="Não é possível remover o último administrador do grupo.")
+
+        rbac["grupos"][grupo]["admins"].remove(username_param)
+
+        is_admin_elsewhere = False
+        if rbac["usuarios"][username_param].get("papel") == "global_admin":
+            is_admin_elsewhere = True
+        else:
+            for g_name, g_details in rbac.get("grupos", {}).items():
+                if username_param in g_details.get("admins", []):
+                    is_admin_elsewhere = True
+                    break
+
+        if not is_admin_elsewhere:
+            rbac["usuarios"][username_param]["papel"] = "user"
+
+    await update_rbac_async(_remover_admin)
     logger.info(f"Usuário '{username_param}' removido como admin do grupo '{grupo}' por {current_user_identity['username']}.")
+    await audit_log.record("admin_removido", usuario=current_user_identity["username"], alvo=grupo, detalhes={"admin": username_param})
     return {"message": f"Usuário '{username_param}' não é mais admin do grupo '{grupo}'."}
 
 # RF03: Adicionar usuário ao grupo (admin do grupo ou global)
-@router.post('/grupos/{grupo}/usuarios', tags=["Admin"], summary="Adicionar usuário ao grupo", description="Admin do grupo ou global pode adicionar usuário ao grupo.")
+@router.post('/grupos/{grupo}/usuarios', tags=["Admin"], summary="Adicionar usuário ao grupo", description="Admin do grupo ou global pode adicionar usuário ao grupo.", openapi_extra=REQUER_ADMIN)
 async def adicionar_usuario_grupo(grupo: str, data: dict, user=Depends(get_current_user)):
-    rbac = get_rbac_data()
-    if not is_group_admin_or_global(user, grupo, rbac):
-        raise HTTPException(status_code=403, detail="Acesso restrito ao admin do grupo ou global.")
-    if grupo not in rbac["grupos"]:
-        raise HTTPException(status_code=404, detail="Grupo não encontrado.")
     username = data.get("username")
-    if not username or username not in rbac["usuarios"]:
-        raise HTTPException(status_code=400, detail="Usuário inválido.")
-    if username in rbac["grupos"][grupo]["users"]:
-        return {"message": f"Usuário '{username}' já está no grupo '{grupo}'"}
-    rbac["grupos"][grupo]["users"].append(username)
-    if grupo not in rbac["usuarios"][username]["grupos"]:
-        rbac["usuarios"][username]["grupos"].append(grupo)
-    if "members" in rbac["grupos"][grupo]:
-        if username not in rbac["grupos"][grupo]["members"]:
-            rbac["grupos"][grupo]["members"].append(username)
-    from app.config import settings
-    import json
-    rbac_path = settings.RBAC_FILE
-    with open(rbac_path, 'w', encoding='utf-8') as f:
-        json.dump(rbac, f, indent=2, ensure_ascii=False)
+
+    def _adicionar(rbac: RBACModel):
+        if not is_group_admin_or_global(user, grupo, rbac):
+            raise HTTPException(status_code=403, detail="Acesso restrito ao admin do grupo ou global.")
+        if grupo not in rbac.grupos:
+            raise HTTPException(status_code=404, detail="Grupo não encontrado.")
+        if not username or username not in rbac.usuarios:
+            raise HTTPException(status_code=400, detail="Usuário inválido.")
+        if not rbac.add_member(grupo, username):
+            return NoChange({"message": f"Usuário '{username}' já está no grupo '{grupo}'"})
+
+    ja_membro = await update_rbac_model_async(_adicionar)
+    if ja_membro:
+        return ja_membro
     logger.info(f"Usuário '{username}' adicionado ao grupo '{grupo}' por {user['username']}")
+    await audit_log.record("usuario_adicionado_grupo", usuario=user["username"], alvo=grupo, detalhes={"membro": username})
     return {"message": f"Usuário '{username}' adicionado ao grupo '{grupo}'"}
 
 # RF03: Remover usuário do grupo (admin do grupo ou global)
-@router.delete('/grupos/{grupo}/usuarios/{username}', tags=["Admin"], summary="Remover usuário do grupo", description="Admin do grupo ou global pode remover usuário do grupo.")
+@router.delete('/grupos/{grupo}/usuarios/{username}', tags=["Admin"], summary="Remover usuário do grupo", description="Admin do grupo ou global pode remover usuário do grupo.", openapi_extra=REQUER_ADMIN)
 async def remover_usuario_grupo(grupo: str, username: str, user=Depends(get_current_user)):
-    rbac = get_rbac_data()
-    if not is_group_admin_or_global(user, grupo, rbac):
-        raise HTTPException(status_code=403, detail="Acesso restrito ao admin do grupo ou global.")
-    if grupo not in rbac["grupos"]:
-        raise HTTPException(status_code=404, detail="Grupo não encontrado.")
-    if username not in rbac["grupos"][grupo]["users"]:
-        raise HTTPException(status_code=404, detail="Usuário não está no grupo.")
-    # Remove usuário do grupo
-    rbac["grupos"][grupo]["users"].remove(username)
-    if grupo in rbac["usuarios"][username]["grupos"]:
-        rbac["usuarios"][username]["grupos"].remove(grupo)
-    # Se for admin do grupo, remove também
-    if username in rbac["grupos"][grupo]["admins"]:
-        rbac["grupos"][grupo]["admins"].remove(username)
-    # Se não restarem grupos, papel volta a 'user'
-    if not rbac["usuarios"][username]["grupos"]:
-        rbac["usuarios"][username]["papel"] = "user"
-        rbac["usuarios"][username]["admin_de_grupos"] = []
-    else:
-        # Remove grupo de admin_de_grupos se necessário
-        if "admin_de_grupos" in rbac["usuarios"][username] and grupo in rbac["usuarios"][username]["admin_de_grupos"]:
-            rbac["usuarios"][username]["admin_de_grupos"].remove(grupo)
-    from app.config import settings
-    import json
-    rbac_path = settings.RBAC_FILE
-    with open(rbac_path, 'w', encoding='utf-8') as f:
-        json.dump(rbac, f, indent=2, ensure_ascii=False)
+    def _remover_usuario(rbac: RBACModel):
+        if not is_group_admin_or_global(user, grupo, rbac):
+            raise HTTPException(status_code=403, detail="Acesso restrito ao admin do grupo ou global.")
+        if grupo not in rbac.grupos:
+            raise HTTPException(status_code=404, detail="Grupo não encontrado.")
+        # Remove usuário do grupo (e de admin); sem grupos restantes, papel volta a 'user'
+        if not rbac.remove_member(grupo, username):
+            raise HTTPException(status_code=404, detail="Usuário não está no grupo.")
+
+    await update_rbac_model_async(_remover_usuario)
     logger.info(f"Usuário '{username}' removido do grupo '{grupo}' por {user['username']}")
+    await audit_log.record("usuario_removido_grupo", usuario=user["username"], alvo=grupo, detalhes={"membro": username})
     return {"message": f"Usuário '{username}' removido do grupo '{grupo}'"}
 
 # RF03: Promover usuário a admin do grupo (admin do grupo ou global)
-@router.post('/grupos/{grupo}/promover-admin', tags=["Admin"], summary="Promover usuário a admin do grupo", description="Admin do grupo ou global pode promover usuário a admin do grupo.")
+@router.post('/grupos/{grupo}/promover-admin', tags=["Admin"], summary="Promover usuário a admin do grupo", description="Admin do grupo ou global pode promover usuário a admin do grupo.", openapi_extra=REQUER_ADMIN)
 async def promover_admin_grupo(grupo: str, data: dict, user=Depends(get_current_user)):
-    rbac = get_rbac_data()
-    if user["papel"] != "global_admin" and (grupo not in user.get("grupos", []) or user["username"] not in rbac["grupos"][grupo]["admins"]):
-        raise HTTPException(status_code=403, detail="Acesso restrito ao admin do grupo ou global.")
-    if grupo not in rbac["grupos"]:
-        raise HTTPException(status_code=404, detail="Grupo não encontrado.")
     novo_admin = data.get("username")
-    if not novo_admin or novo_admin not in rbac["usuarios"]:
-        raise HTTPException(status_code=400, detail="Usuário inválido.")
-    if novo_admin not in rbac["grupos"][grupo]["users"]:
-        raise HTTPException(status_code=400, detail=f"Usuário '{novo_admin}' não é membro do grupo '{grupo}'. Não pode ser promovido.")
-    if novo_admin not in rbac["grupos"][grupo]["admins"]:
-        rbac["grupos"][grupo]["admins"].append(novo_admin)
-    if grupo not in rbac["usuarios"][novo_admin]["grupos"]:
-        rbac["usuarios"][novo_admin]["grupos"].append(grupo)
-    rbac["usuarios"][novo_admin]["papel"] = "admin"
-    from app.config import settings
-    import json
-    rbac_path = settings.RBAC_FILE
-    with open(rbac_path, 'w', encoding='utf-8') as f:
-        json.dump(rbac, f, indent=2, ensure_ascii=False)
+
+    def _promover(rbac):
+        if user["papel"] != "global_admin" and (grupo not in user.get("grupos", []) or user["username"] not in rbac["grupos"][grupo]["admins"]):
+            raise HTTPException(status_code=403, detail="Acesso restrito ao admin do grupo ou global.")
+        if grupo not in rbac["grupos"]:
+            raise HTTPException(status_code=404, detail="Grupo não encontrado.")
+        if not novo_admin or novo_admin not in rbac["usuarios"]:
+            raise HTTPException(status_code=400, detail="Usuário inválido.")
+        if novo_admin not in rbac["grupos"][grupo]["users"]:
+            raise HTTPException(status_code=400, detail=f"Usuário '{novo_admin}' não é membro do grupo '{grupo}'. Não pode ser promovido.")
+        if novo_admin not in rbac["grupos"][grupo]["admins"]:
+            rbac["grupos"][grupo]["admins"].append(novo_admin)
+        if grupo not in rbac["usuarios"][novo_admin]["grupos"]:
+            rbac["usuarios"][novo_admin]["grupos"].append(grupo)
+        rbac["usuarios"][novo_admin]["papel"] = "admin"
+
+    await update_rbac_async(_promover)
     logger.info(f"Usuário '{novo_admin}' promovido a admin do grupo '{grupo}' por {user['username']}")
+    await audit_log.record("admin_promovido", usuario=user["username"], alvo=grupo, detalhes={"admin": novo_admin})
     return {"message": f"Usuário '{novo_admin}' agora é admin do grupo '{grupo}'"}
 
 # Exemplo de rota para listar usuários de um grupo (admin do grupo ou global)
 @router.get('/grupos/{grupo}/usuarios', tags=["Admin"], summary="Listar usuários do grupo", description="Lista administradores e usuários de um grupo.\n\n**Exemplo de resposta:**\n```json\n{\n  \"admins\": [\"admin1\"],\n  \"users\": [\"user1\", \"admin1\"]\n}\n```\n\n**Códigos de resposta:**\n- 200: Sucesso\n- 403: Acesso restrito\n- 404: Grupo não encontrado\n")
 async def listar_usuarios_grupo(grupo: str, user=Depends(get_current_user)):
-    rbac = get_rbac_data()
-    if grupo not in rbac["grupos"]:
+    dados_grupo = await get_rbac_grupo_async(grupo)
+    if dados_grupo is None:
         raise HTTPException(status_code=404, detail="Grupo não encontrado.")
-    if user["papel"] == "global_admin" or (grupo in user.get("grupos", []) and (user["username"] in rbac["grupos"][grupo]["admins"] or user["username"] in rbac["grupos"][grupo]["users"])):
+    if user["papel"] == "global_admin" or (grupo in user.get("grupos", []) and (user["username"] in dados_grupo["admins"] or user["username"] in dados_grupo["users"])):
         return {
-            "admins": rbac["grupos"][grupo]["admins"],
-            "users": rbac["grupos"][grupo]["users"]
+            "admins": dados_grupo["admins"],
+            "users": dados_grupo["users"]
         }
     raise HTTPException(status_code=403, detail="Acesso restrito. Você deve ser membro ou administrador do grupo, ou administrador global.")
 
 # Rota para criar ferramenta (apenas admin do grupo ou global)
-@router.post('/grupos/{grupo}/ferramentas', tags=["Admin"], summary="Adicionar ferramenta ao grupo", description="Admin do grupo ou global pode adicionar uma ferramenta existente ao grupo.")
+@router.post('/grupos/{grupo}/ferramentas', tags=["Admin"], summary="Adicionar ferramenta ao grupo", description="Admin do grupo ou global pode adicionar uma ferramenta existente ao grupo.", openapi_extra=REQUER_ADMIN)
 async def adicionar_ferramenta_ao_grupo(grupo: str, data: dict, user=Depends(get_current_user)):
-    rbac = get_rbac_data()
-    if user["papel"] != "global_admin" and (grupo not in user.get("grupos", []) or user["username"] not in rbac["grupos"].get(grupo, {}).get("admins", [])):
-        raise HTTPException(status_code=403, detail="Acesso restrito ao admin do grupo ou global.")
-    if grupo not in rbac["grupos"]:
-        raise HTTPException(status_code=404, detail="Grupo não encontrado.")
-    
     nome_ferramenta = data.get("tool_id")
-    if not nome_ferramenta:
-        raise HTTPException(status_code=400, detail="ID da ferramenta (tool_id) é obrigatório.")
 
-    if nome_ferramenta not in rbac.get("ferramentas", {}):
-        raise HTTPException(status_code=404, detail=f"Ferramenta com ID '{nome_ferramenta}' não encontrada nas definições globais.")
+    def _adicionar_ferramenta(rbac):
+        if user["papel"] != "global_admin" and (grupo not in user.get("grupos", []) or user["username"] not in rbac["grupos"].get(grupo, {}).get("admins", [])):
+            raise HTTPException(status_code=403, detail="Acesso restrito ao admin do grupo ou global.")
+        if grupo not in rbac["grupos"]:
+            raise HTTPException(status_code=404, detail="Grupo não encontrado.")
 
-    if nome_ferramenta in rbac["grupos"][grupo].get("ferramentas", []):
-        raise HTTPException(status_code=409, detail=f"Ferramenta '{nome_ferramenta}' já existe no grupo '{grupo}'.")
-    
-    rbac["grupos"][grupo].setdefault("ferramentas", []).append(nome_ferramenta)
-    
-    from app.config import settings
-    import json
-    rbac_path = settings.RBAC_FILE
-    with open(rbac_path, 'w', encoding='utf-8') as f:
-        json.dump(rbac, f, indent=2, ensure_ascii=False)
+        if not nome_ferramenta:
+            raise HTTPException(status_code=400, detail="ID da ferramenta (tool_id) é obrigatório.")
+
+        if nome_ferramenta not in rbac.get("ferramentas", {}):
+            raise HTTPException(status_code=404, detail=f"Ferramenta com ID '{nome_ferramenta}' não encontrada nas definições globais.")
+
+        if nome_ferramenta in rbac["grupos"][grupo].get("ferramentas", []):
+            raise HTTPException(status_code=409, detail=f"Ferramenta '{nome_ferramenta}' já existe no grupo '{grupo}'.")
+
+        rbac["grupos"][grupo].setdefault("ferramentas", []).append(nome_ferramenta)
+
+    await update_rbac_async(_adicionar_ferramenta)
     logger.info(f"Ferramenta '{nome_ferramenta}' adicionada ao grupo '{grupo}' por {user['username']}")
+    await audit_log.record("ferramenta_adicionada_grupo", usuario=user["username"], ferramenta=nome_ferramenta, alvo=grupo)
     return {"message": f"Ferramenta '{nome_ferramenta}' adicionada com sucesso ao grupo '{grupo}'"}
 
-@router.delete('/grupos/{grupo}/ferramentas/{tool_id}', tags=["Admin"], summary="Remover ferramenta do grupo", description="Admin do grupo ou global pode remover uma ferramenta do grupo.")
+@router.delete('/grupos/{grupo}/ferramentas/{tool_id}', tags=["Admin"], summary="Remover ferramenta do grupo", description="Admin do grupo ou global pode remover uma ferramenta do grupo.", openapi_extra=REQUER_ADMIN)
 async def remover_ferramenta_do_grupo(grupo: str, tool_id: str, user=Depends(get_current_user)):
-    rbac = get_rbac_data()
-    if user["papel"] != "global_admin" and (grupo not in user.get("grupos", []) or user["username"] not in rbac["grupos"].get(grupo, {}).get("admins", [])):
-        raise HTTPException(status_code=403, detail="Acesso restrito ao admin do grupo ou global.")
-    if grupo not in rbac["grupos"]:
-        raise HTTPException(status_code=404, detail=f"Grupo '{grupo}' não encontrado.")
-    
-    group_tools = rbac["grupos"][grupo].get("ferramentas", [])
-    if tool_id not in group_tools:
-        raise HTTPException(status_code=404, detail=f"Ferramenta '{tool_id}' não encontrada no grupo '{grupo}'.")
+    def _remover_ferramenta(rbac):
+        if user["papel"] != "global_admin" and (grupo not in user.get("grupos", []) or user["username"] not in rbac["grupos"].get(grupo, {}).get("admins", [])):
+            raise HTTPException(status_code=403, detail="Acesso restrito ao admin do grupo ou global.")
+        if grupo not in rbac["grupos"]:
+            raise HTTPException(status_code=404, detail=f"Grupo '{grupo}' não encontrado.")
 
-    rbac["grupos"][grupo]["ferramentas"].remove(tool_id)
-    
-    from app.config import settings
-    import json
-    rbac_path = settings.RBAC_FILE
-    with open(rbac_path, 'w', encoding='utf-8') as f:
-        json.dump(rbac, f, indent=2, ensure_ascii=False)
+        group_tools = rbac["grupos"][grupo].get("ferramentas", [])
+        if tool_id not in group_tools:
+            raise HTTPException(status_code=404, detail=f"Ferramenta '{tool_id}' não encontrada no grupo '{grupo}'.")
+
+        rbac["grupos"][grupo]["ferramentas"].remove(tool_id)
+
+    await update_rbac_async(_remover_ferramenta)
     logger.info(f"Ferramenta '{tool_id}' removida do grupo '{grupo}' por {user['username']}")
+    await audit_log.record("ferramenta_removida_grupo", usuario=user["username"], ferramenta=tool_id, alvo=grupo)
     return {"message": f"Ferramenta '{tool_id}' removida com sucesso do grupo '{grupo}'"}
 
-# Endpoint para listar todas as ferramentas globais definidas
-@router.get("/ferramentas", response_model=List[ToolResponseSchema], tags=["Ferramentas"], summary="Listar todas as ferramentas globais", description="Lista todas as ferramentas definidas globalmente no sistema.")
-async def listar_ferramentas_globais(user=Depends(get_current_user)):
-    rbac = get_rbac_data()
-    all_tools_definitions = rbac.get("ferramentas", {})
+def _catalog_entries(all_tools_definitions: Dict[str, Any]) -> List[Dict[str, Any]]:
     ferramentas_list = []
     for tool_id, tool_def in all_tools_definitions.items():
         if isinstance(tool_def, dict):
-            ferramentas_list.append(ToolResponseSchema(
-                id=tool_id,
-                nome=tool_def.get("nome", tool_id),
-                url_base=tool_def.get("url_base", ""),
-                descricao=tool_def.get("descricao")
-            ))
+            ferramentas_list.append({
+                "id": tool_id,
+                "nome": tool_def.get("nome", tool_id),
+                "url_base": tool_def.get("url_base", ""),
+                "descricao": tool_def.get("descricao")
+            })
         else:
-            ferramentas_list.append(ToolResponseSchema(
-                id=tool_id,
-                nome=tool_id, 
-                url_base="",
-                descricao="Definição da ferramenta inválida"
-            ))
+            ferramentas_list.append({
+                "id": tool_id,
+                "nome": tool_id,
+                "url_base": "",
+                "descricao": "Definição da ferramenta inválida"
+            })
     return ferramentas_list
 
+def _serialize_tools(ferramentas: List[Dict[str, Any]]) -> bytes:
+    # Mesmo formato de ToolResponseSchema, sem construir o modelo a cada requisição
+    return json_codec.dumps(ferramentas)
+
+# Endpoint para listar todas as ferramentas globais definidas
+@router.get("/ferramentas", response_model=List[ToolResponseSchema], tags=["Ferramentas"], summary="Listar todas as ferramentas globais", description="Lista todas as ferramentas definidas globalmente no sistema.")
+async def listar_ferramentas_globais(user=Depends(get_current_user)):
+    index = await get_rbac_index_async()
+    # Catálogo serializado uma única vez por versão do RBAC
+    corpo = index.cached_response("ferramentas_globais", lambda: _serialize_tools(_catalog_entries(index.ferramentas)))
+    return Response(content=corpo, media_type="application/json")
+
 # RF07: Criar usuário (admin global)
-@router.post('/usuarios', tags=["Admin"], summary="Criar usuário", description="Admin global pode criar um novo usuário.\n\n**Exemplo de request:**\n```json\n{\n  \"username\": \"novo_user\",\n  \"password\": \"SenhaForte123!\",\n  \"papel\": \"user\",\n  \"grupos\": [\"grupo1\"]\n}\n```\n\n**Exemplo de resposta (201):**\n```json\n{\n  \"username\": \"novo_user\",\n  \"papel\": \"user\",\n  \"grupos\": [\"grupo1\"]\n}\n```\n\n**Códigos de resposta:**\n- 201: Usuário criado\n- 400: Papel inválido ou grupo inexistente\n- 403: Acesso restrito ao admin global\n- 409: Usuário já existe\n- 422: username e password são obrigatórios\n")
+@router.post('/usuarios', tags=["Admin"], summary="Criar usuário", description="Admin global pode criar um novo usuário.\n\n**Exemplo de request:**\n```json\n{\n  \"username\": \"novo_user\",\n  \"password\": \"SenhaForte123!\",\n  \"papel\": \"user\",\n  \"grupos\": [\"grupo1\"]\n}\n```\n\n**Exemplo de resposta (201):**\n```json\n{\n  \"username\": \"novo_user\",\n  \"papel\": \"user\",\n  \"grupos\": [\"grupo1\"]\n}\n```\n\n**Códigos de resposta:**\n- 201: Usuário criado\n- 400: Papel inválido ou grupo inexistente\n- 403: Acesso restrito ao admin global\n- 409: Usuário já existe\n- 422: username e password são obrigatórios\n", openapi_extra=REQUER_ADMIN_GLOBAL)
 async def criar_usuario(data: dict, user=Depends(get_current_user)):
-    rbac = get_rbac_data()
     if user["papel"] != "global_admin":
         raise HTTPException(status_code=403, detail="Acesso restrito ao admin global.")
     username = data.get("username")
@@ -495,35 +537,37 @@ async def criar_usuario(data: dict, user=Depends(get_current_user)):
     ALLOWED_ROLES = ["user", "admin", "global_admin"]
     if papel not in ALLOWED_ROLES:
         return JSONResponse(status_code=400, content={"detail": "Papel inválido."})
-    # Usuário já existe
-    if username in rbac["usuarios"]:
-        return JSONResponse(status_code=409, content={"detail": "Usuário já existe."})
-    # Validação de grupos
-    for grupo in grupos:
-        if grupo not in rbac["grupos"]:
-            return JSONResponse(status_code=400, content={"detail": f"Grupo '{grupo}' não encontrado."})
-    # Criação do usuário
-    from app.utils.password import hash_password
+    # Hash calculado fora da mutação para não repetir o bcrypt em caso de conflito de versão
     senha_hash = hash_password(password)
-    rbac["usuarios"][username] = {
-        "senha": senha_hash,
-        "grupos": grupos,
-        "papel": papel
-    }
-    for grupo in grupos:
-        if "users" not in rbac["grupos"][grupo]:
-            rbac["grupos"][grupo]["users"] = []
-        if username not in rbac["grupos"][grupo]["users"]:
-            rbac["grupos"][grupo]["users"].append(username)
-        if "members" in rbac["grupos"][grupo]:
-            if username not in rbac["grupos"][grupo]["members"]:
-                rbac["grupos"][grupo]["members"].append(username)
-    from app.config import settings
-    import json
-    rbac_path = settings.RBAC_FILE
-    with open(rbac_path, 'w', encoding='utf-8') as f:
-        json.dump(rbac, f, indent=2, ensure_ascii=False)
+
+    def _criar_usuario(rbac):
+        # Usuário já existe
+        if username in rbac["usuarios"]:
+            return NoChange(JSONResponse(status_code=409, content={"detail": "Usuário já existe."}))
+        # Validação de grupos
+        for grupo in grupos:
+            if grupo not in rbac["grupos"]:
+                return NoChange(JSONResponse(status_code=400, content={"detail": f"Grupo '{grupo}' não encontrado."}))
+        # Criação do usuário
+        rbac["usuarios"][username] = {
+            "senha": senha_hash,
+            "grupos": grupos,
+            "papel": papel
+        }
+        for grupo in grupos:
+            if "users" not in rbac["grupos"][grupo]:
+                rbac["grupos"][grupo]["users"] = []
+            if username not in rbac["grupos"][grupo]["users"]:
+                rbac["grupos"][grupo]["users"].append(username)
+            if "members" in rbac["grupos"][grupo]:
+                if username not in rbac["grupos"][grupo]["members"]:
+                    rbac["grupos"][grupo]["members"].append(username)
+
+    erro = await update_rbac_async(_criar_usuario)
+    if erro:
+        return erro
     logger.info(f"Usuário '{username}' criado por {user['username']}")
+    await audit_log.record("usuario_criado", usuario=user["username"], alvo=username, detalhes={"papel": papel, "grupos": grupos})
     return JSONResponse(status_code=201, content={
         "username": username,
         "papel": papel,
@@ -533,7 +577,6 @@ async def criar_usuario(data: dict, user=Depends(get_current_user)):
 # Endpoint para alterar senha do usuário
 @router.post('/usuarios/alterar-senha', tags=["User"], summary="Alterar senha", description="Permite ao usuário alterar sua própria senha.")
 async def alterar_senha(data: dict, user=Depends(get_current_user)):
-    rbac = get_rbac_data()
     username = user["username"]
     
     senha_atual = data.get("senha_atual")
@@ -545,7 +588,7 @@ async def alterar_senha(data: dict, user=Depends(get_current_user)):
             detail="Senha atual e nova senha são obrigatórias"
         )
     
-    stored_password = rbac["usuarios"][username]["senha"]
+    stored_password = (await get_rbac_usuario_async(username))["senha"]
     if not verify_password(senha_atual, stored_password):
         logger.warning(f"Tentativa de alteração de senha com senha atual incorreta para '{username}'")
         raise HTTPException(
@@ -570,24 +613,24 @@ async def alterar_senha(data: dict, user=Depends(get_current_user)):
             raise HTTPException(status_code=400, detail=resultado)
     
     hashed_password = resultado
-    
-    rbac["usuarios"][username]["senha"] = hashed_password
-    
-    from app.config import settings
-    import json
-    rbac_path = settings.RBAC_FILE
-    with open(rbac_path, 'w', encoding='utf-8') as f:
-        json.dump(rbac, f, indent=2, ensure_ascii=False)
-    
+
+    def _alterar_senha(rbac):
+        # A senha atual foi verificada fora da mutação; garante que não mudou nesse intervalo
+        if rbac["usuarios"][username]["senha"] != stored_password:
+            raise HTTPException(status_code=409, detail="A senha foi alterada por outra requisição. Tente novamente.")
+        rbac["usuarios"][username]["senha"] = hashed_password
+
+    await update_rbac_async(_alterar_senha)
     logger.info(f"Senha alterada com sucesso para o usuário '{username}'")
+    await audit_log.record("senha_alterada", usuario=username, alvo=username)
     return {"message": "Senha alterada com sucesso"}
 
 # Endpoint para listar todos os usuários (apenas admin global)
-@router.get("/usuarios", tags=["Admin"], summary="Listar todos os usuários", description="Admin global pode listar todos os usuários.\n\n**Exemplo de resposta:**\n```json\n[\n  {\n    \"username\": \"user1\",\n    \"papel\": \"user\",\n    \"grupos\": [\"grupo1\"],\n    \"admin_de_grupos\": []\n  }\n]\n```\n\n**Códigos de resposta:**\n- 200: Sucesso\n- 403: Acesso restrito ao admin global\n")
+@router.get("/usuarios", tags=["Admin"], summary="Listar todos os usuários", description="Admin global pode listar todos os usuários.\n\n**Exemplo de resposta:**\n```json\n[\n  {\n    \"username\": \"user1\",\n    \"papel\": \"user\",\n    \"grupos\": [\"grupo1\"],\n    \"admin_de_grupos\": []\n  }\n]\n```\n\n**Códigos de resposta:**\n- 200: Sucesso\n- 403: Acesso restrito ao admin global\n", openapi_extra=REQUER_ADMIN_GLOBAL)
 async def listar_usuarios(user=Depends(get_current_user)):
     if user["papel"] != "global_admin":
         raise HTTPException(status_code=403, detail="Acesso restrito ao admin global.")
-    rbac = get_rbac_data()
+    rbac = await get_rbac_data_async()
     user_list = []
     for username, details in rbac.get("usuarios", {}).items():
         user_list.append({
@@ -599,13 +642,12 @@ async def listar_usuarios(user=Depends(get_current_user)):
     return user_list
 
 # Endpoint para obter detalhes de um usuário específico (apenas admin global)
-@router.get("/usuarios/{username_param}", response_model=UserDetailResponse, tags=["Admin"], summary="Obter detalhes de um usuário", description="Admin global pode obter detalhes de um usuário específico.")
+@router.get("/usuarios/{username_param}", response_model=UserDetailResponse, tags=["Admin"], summary="Obter detalhes de um usuário", description="Admin global pode obter detalhes de um usuário específico.", openapi_extra=REQUER_ADMIN_GLOBAL)
 async def obter_usuario(username_param: str, user=Depends(get_current_user)):
     if user["papel"] != "global_admin":
         raise HTTPException(status_code=403, detail="Acesso restrito ao admin global.")
     
-    rbac = get_rbac_data()
-    user_data = rbac.get("usuarios", {}).get(username_param)
+    user_data = await get_rbac_usuario_async(username_param)
     
     if not user_data:
         raise HTTPException(status_code=404, detail=f"Usuário '{username_param}' não encontrado.")
@@ -617,68 +659,66 @@ async def obter_usuario(username_param: str, user=Depends(get_current_user)):
     )
 
 # Endpoint para atualizar um usuário (apenas admin global)
-@router.put("/usuarios/{username_param}", response_model=UserDetailResponse, tags=["Admin"], summary="Atualizar usuário", description="Admin global pode atualizar o papel e os grupos de um usuário.")
+@router.put("/usuarios/{username_param}", response_model=UserDetailResponse, tags=["Admin"], summary="Atualizar usuário", description="Admin global pode atualizar o papel e os grupos de um usuário.", openapi_extra=REQUER_ADMIN_GLOBAL)
 async def atualizar_usuario(username_param: str, data: UserUpdateRequest, current_user_identity=Depends(get_current_user)):
     if current_user_identity["papel"] != "global_admin":
         raise HTTPException(status_code=403, detail="Acesso restrito ao admin global.")
 
-    rbac = get_rbac_data()
-    if username_param not in rbac.get("usuarios", {}):
-        raise HTTPException(status_code=404, detail=f"Usuário '{username_param}' não encontrado.")
+    def _atualizar(rbac):
+        if username_param not in rbac.get("usuarios", {}):
+            raise HTTPException(status_code=404, detail=f"Usuário '{username_param}' não encontrado.")
+
+        user_to_update = rbac["usuarios"][username_param]
+        updated = False
+
+        if data.papel is not None:
+            if data.papel not in ["user", "admin", "global_admin"]:
+                raise HTTPException(status_code=400, detail="Papel inválido. Deve ser 'user', 'admin' ou 'global_admin'.")
+            if username_param == current_user_identity["username"] and data.papel != current_user_identity["papel"]:
+                if current_user_identity["papel"] == "global_admin" and data.papel != "global_admin":
+                    global_admins = [u for u, d in rbac.get("usuarios", {}).items() if d.get("papel") == "global_admin"]
+                    if len(global_admins) <= 1:
+                        raise HTTPException(status_code=400, detail="Não é possível remover o último administrador global.")
+            user_to_update["papel"] = data.papel
+            updated = True
+
+        if data.grupos is not None:
+            for grupo_nome in data.grupos:
+                if grupo_nome not in rbac.get("grupos", {}):
+                    raise HTTPException(status_code=400, detail=f"Grupo '{grupo_nome}' não encontrado.")
+
+            old_grupos = set(user_to_update.get("grupos", []))
+            new_grupos_set = set(data.grupos)
+
+            for grupo_nome in old_grupos - new_grupos_set:
+                if grupo_nome in rbac["grupos"]:
+                    if username_param in rbac["grupos"][grupo_nome].get("usuarios", []):
+                        rbac["grupos"][grupo_nome]["usuarios"].remove(username_param)
+                    if username_param in rbac["grupos"][grupo_nome].get("admins", []):
+                        rbac["grupos"][grupo_nome]["admins"].remove(username_param)
+
+            for grupo_nome in new_grupos_set - old_grupos:
+                if grupo_nome in rbac["grupos"]:
+                    if username_param not in rbac["grupos"][grupo_nome].get("usuarios", []):
+                        rbac["grupos"][grupo_nome].setdefault("usuarios", []).append(username_param)
+
+            user_to_update["grupos"] = data.grupos
+            updated = True
+
+        resposta = UserDetailResponse(
+            username=username_param,
+            papel=user_to_update.get("papel"),
+            grupos=user_to_update.get("grupos", [])
+        )
+        return resposta if updated else NoChange(resposta)
 
-    user_to_update = rbac["usuarios"][username_param]
-    updated = False
-
-    if data.papel is not None:
-        if data.papel not in ["user", "admin", "global_admin"]:
-            raise HTTPException(status_code=400, detail="Papel inválido. Deve ser 'user', 'admin' ou 'global_admin'.")
-        if username_param == current_user_identity["username"] and data.papel != current_user_identity["papel"]:
-            if current_user_identity["papel"] == "global_admin" and data.papel != "global_admin":
-                global_admins = [u for u, d in rbac.get("usuarios", {}).items() if d.get("papel") == "global_admin"]
-                if len(global_admins) <= 1:
-                    raise HTTPException(status_code=400, detail="Não é possível remover o último administrador global.")
-        user_to_update["papel"] = data.papel
-        updated = True
-
-    if data.grupos is not None:
-        for grupo_nome in data.grupos:
-            if grupo_nome not in rbac.get("grupos", {}):
-                raise HTTPException(status_code=400, detail=f"Grupo '{grupo_nome}' não encontrado.")
-        
-        old_grupos = set(user_to_update.get("grupos", []))
-        new_grupos_set = set(data.grupos)
-
-        for grupo_nome in old_grupos - new_grupos_set:
-            if grupo_nome in rbac["grupos"]:
-                if username_param in rbac["grupos"][grupo_nome].get("usuarios", []):
-                    rbac["grupos"][grupo_nome]["usuarios"].remove(username_param)
-                if username_param in rbac["grupos"][grupo_nome].get("admins", []):
-                    rbac["grupos"][grupo_nome]["admins"].remove(username_param)
-        
-        for grupo_nome in new_grupos_set - old_grupos:
-            if grupo_nome in rbac["grupos"]:
-                if username_param not in rbac["grupos"][grupo_nome].get("usuarios", []):
-                    rbac["grupos"][grupo_nome].setdefault("usuarios", []).append(username_param)
-
-        user_to_update["grupos"] = data.grupos
-        updated = True
-
-    if updated:
-        from app.config import settings
-        import json
-        rbac_path = settings.RBAC_FILE
-        with open(rbac_path, 'w', encoding='utf-8') as f:
-            json.dump(rbac, f, indent=2, ensure_ascii=False)
-        logger.info(f"Usuário '{username_param}' atualizado por {current_user_identity['username']}.")
-    
-    return UserDetailResponse(
-        username=username_param,
-        papel=user_to_update.get("papel"),
-        grupos=user_to_update.get("grupos", [])
-    )
+    resposta = await update_rbac_async(_atualizar)
+    logger.info(f"Usuário '{username_param}' atualizado por {current_user_identity['username']}.")
+    await audit_log.record("usuario_atualizado", usuario=current_user_identity["username"], alvo=username_param, detalhes=data.model_dump(exclude_none=True, exclude={"ferramentas_disponiveis"}))
+    return resposta
 
 # Endpoint para deletar um usuário (apenas admin global)
-@router.delete("/usuarios/{username_param}", status_code=200, tags=["Admin"], summary="Deletar usuário", description="Admin global pode deletar um usuário.")
+@router.delete("/usuarios/{username_param}", status_code=200, tags=["Admin"], summary="Deletar usuário", description="Admin global pode deletar um usuário.", openapi_extra=REQUER_ADMIN_GLOBAL)
 async def deletar_usuario(username_param: str, current_user_identity=Depends(get_current_user)):
     if current_user_identity["papel"] != "global_admin":
         raise HTTPException(status_code=403, detail="Acesso restrito ao admin global.")
@@ -686,25 +726,22 @@ async def deletar_usuario(username_param: str, current_user_identity=Depends(get
     if username_param == current_user_identity["username"]:
         raise HTTPException(status_code=400, detail="Não é possível deletar a si mesmo.")
 
-    rbac = get_rbac_data()
-    if username_param not in rbac.get("usuarios", {}):
-        raise HTTPException(status_code=404, detail=f"Usuário '{username_param}' não encontrado.")
+    def _deletar(rbac):
+        if username_param not in rbac.get("usuarios", {}):
+            raise HTTPException(status_code=404, detail=f"Usuário '{username_param}' não encontrado.")
 
-    for grupo_nome, grupo_details in rbac.get("grupos", {}).items():
-        if username_param in grupo_details.get("usuarios", []):
-            grupo_details["usuarios"].remove(username_param)
-        if username_param in grupo_details.get("admins", []):
-            grupo_details["admins"].remove(username_param)
+        for grupo_nome, grupo_details in rbac.get("grupos", {}).items():
+            if username_param in grupo_details.get("usuarios", []):
+                grupo_details["usuarios"].remove(username_param)
+            if username_param in grupo_details.get("admins", []):
+                grupo_details["admins"].remove(username_param)
 
-    del rbac["usuarios"][username_param]
+        del rbac["usuarios"][username_param]
 
-    from app.config import settings
-    import json
-    rbac_path = settings.RBAC_FILE
-    with open(rbac_path, 'w', encoding='utf-8') as f:
-        json.dump(rbac, f, indent=2, ensure_ascii=False)
-    
+    await update_rbac_async(_deletar)
     logger.info(f"Usuário '{username_param}' deletado por {current_user_identity['username']}.")
+    await run_io(session_store.revoke_user, username_param)
+    await audit_log.record("usuario_removido", usuario=current_user_identity["username"], alvo=username_param)
     return {"message": f"Usuário '{username_param}' deletado com sucesso."}
 
 # Endpoint para obter os requisitos de senha
@@ -725,72 +762,100 @@ async def requisitos_senha():
     }
 
 # Endpoint para migrar senhas em texto puro para hashes bcrypt (apenas admin global)
-@router.post('/admin/migrate-passwords', tags=["Admin"], summary="Migrar senhas", description="Admin global pode migrar senhas em texto puro para hashes bcrypt.")
+@router.post('/admin/migrate-passwords', tags=["Admin"], summary="Migrar senhas", description="Admin global pode migrar senhas em texto puro para hashes bcrypt.", openapi_extra=REQUER_ADMIN_GLOBAL)
 async def migrar_senhas(user=Depends(get_current_user)):
     if user["papel"] != "global_admin":
         raise HTTPException(status_code=403, detail="Acesso restrito ao admin global.")
     
-    from pathlib import Path
-    rbac_path = Path(__file__).parent.parent.parent / 'data' / 'rbac.json'
-    
-    if migrate_rbac_passwords(str(rbac_path)):
+    if await run_io(migrate_rbac_passwords, settings.RBAC_FILE):
+        await audit_log.record("senhas_migradas", usuario=user["username"])
         return {"message": "Migração de senhas concluída com sucesso."}
     else:
         raise HTTPException(status_code=500, detail="Erro ao migrar senhas. Verifique os logs do servidor.")
 
-# Rotas de ferramentas (com OPTIONS)
-def has_permission(user: dict, ferramenta: str) -> bool:
-    rbac = get_rbac_data()
-    if user["papel"] == "global_admin":
-        return True
-    return any(
-        g in rbac["grupos"] and ferramenta in rbac["grupos"][g]["ferramentas"]
-        for g in user["grupos"]
-    )
+# Endpoint para consultar o estado RBAC em um instante passado (apenas admin global)
+@router.get('/admin/rbac/historico', tags=["Admin"], summary="Estado RBAC em um instante", description="Reconstrói o RBAC a partir do snapshot mais próximo e do log de alterações. Sem `ate`, retorna o estado mais recente registrado no log. Senhas não são retornadas.", openapi_extra=REQUER_ADMIN_GLOBAL)
+async def historico_rbac(ate: Optional[datetime] = None, user=Depends(get_current_user)):
+    if user["papel"] != "global_admin":
+        raise HTTPException(status_code=403, detail="Acesso restrito ao admin global.")
 
-@router.options('/ferramenta_x', tags=["Ferramentas"])
-async def options_ferramenta_x(response: Response):
-    response.headers["Allow"] = "GET,OPTIONS"
-    return Response(status_code=204)
+    estado = await run_io(replay_rbac, settings.RBAC_FILE, ate)
+    if estado is None:
+        raise HTTPException(status_code=404, detail="Nenhum histórico RBAC disponível para o instante informado.")
+    for user_data in estado.get("usuarios", {}).values():
+        user_data.pop("senha", None)
+    return estado
 
-@router.get('/ferramenta_x', tags=["Ferramentas"], summary="Ferramenta X", description="Executa a ferramenta X se o usuário tiver permissão.")
+@router.get('/admin/rbac/memoria', tags=["Admin"], summary="Memória dos índices RBAC", description="Informa, em bytes, a memória ocupada por cada estrutura do índice RBAC em memória e, com `RBAC_BITMAP_INDEX=true`, da matriz de permissões com bitmaps (IDs internados, bitmaps usuário×grupo e grupo×ferramenta).", openapi_extra=REQUER_ADMIN_GLOBAL)
+async def memoria_rbac(user=Depends(get_current_user)):
+    if user["papel"] != "global_admin":
+        raise HTTPException(status_code=403, detail="Acesso restrito ao admin global.")
+    index = await get_rbac_index_async()
+    return {
+        "versao": index.versao,
+        "bitmap_habilitado": index.matriz is not None,
+        "estruturas": index.memory_report()
+    }
+
+@router.get('/admin/bcrypt', tags=["Admin"], summary="Custo bcrypt", description="Informa o custo bcrypt usado em novos hashes, se foi configurado (`BCRYPT_ROUNDS`) ou calibrado na inicialização para `BCRYPT_TARGET_MS`, o tempo medido de um hash neste processo e quantas senhas foram refeitas no login desde a inicialização.", openapi_extra=REQUER_ADMIN_GLOBAL)
+async def custo_bcrypt(user=Depends(get_current_user)):
+    if user["papel"] != "global_admin":
+        raise HTTPException(status_code=403, detail="Acesso restrito ao admin global.")
+    return await run_io(bcrypt_stats)
+
+@router.post('/admin/jwt/rotacionar', tags=["Admin"], summary="Rotacionar chave de assinatura JWT", description="Gera uma nova chave de assinatura ativa. Tokens emitidos com as chaves anteriores continuam válidos enquanto elas estiverem retidas no JWKS.", openapi_extra=REQUER_ADMIN_GLOBAL)
+async def rotacionar_chave_jwt(user=Depends(get_current_user)):
+    if user["papel"] != "global_admin":
+        raise HTTPException(status_code=403, detail="Acesso restrito ao admin global.")
+
+    keyring = get_keyring()
+    if keyring is None:
+        raise HTTPException(status_code=400, detail=f"Rotação indisponível com o algoritmo simétrico {settings.JWT_ALGORITHM}.")
+    kid = await run_io(keyring.rotate)
+    logger.info(f"Chave JWT rotacionada por {user['username']}: kid={kid}")
+    await audit_log.record("chave_jwt_rotacionada", usuario=user["username"], alvo=kid)
+    return {"kid": kid, "algoritmo": keyring.algorithm}
+
+# Rotas de ferramentas (OPTIONS e preflight CORS são atendidos pelo CachedCORSMiddleware)
+def has_permission(user: dict, ferramenta: str, index: Optional[RBACIndex] = None) -> bool:
+    # Consulta o índice em memória (reconstruído só quando o rbac.json muda); os handlers
+    # async passam o índice de `get_rbac_index_async`, para não reconstruí-lo no event loop
+    return (index or get_rbac_index()).usuario_pode_usar(user, ferramenta)
+
+@router.get('/ferramenta_x', tags=["Ferramentas"], summary="Ferramenta X", description="Executa a ferramenta X se o usuário tiver permissão.", openapi_extra=requer_ferramenta("ferramenta_x"))
 async def ferramenta_x(user=Depends(get_current_user)):
-    if not has_permission(user, "ferramenta_x"):
+    if not has_permission(user, "ferramenta_x", await get_rbac_index_async()):
         logger.warning(f"Acesso negado a ferramenta_x para {user['username']}")
+        await audit_log.record("acesso_negado", usuario=user["username"], ferramenta="ferramenta_x")
         raise HTTPException(status_code=403, detail="Acesso negado")
     logger.info(f"Usuário {user['username']} executou ferramenta_x")
+    await audit_log.record("ferramenta_executada", usuario=user["username"], ferramenta="ferramenta_x")
     return {"result": f"Execução da ferramenta X por {user['username']}"}
 
-@router.options('/ferramenta_y', tags=["Ferramentas"])
-async def options_ferramenta_y(response: Response):
-    response.headers["Allow"] = "GET,OPTIONS"
-    return Response(status_code=204)
-
-@router.get('/ferramenta_y', tags=["Ferramentas"], summary="Ferramenta Y", description="Executa a ferramenta Y se o usuário tiver permissão.")
+@router.get('/ferramenta_y', tags=["Ferramentas"], summary="Ferramenta Y", description="Executa a ferramenta Y se o usuário tiver permissão.", openapi_extra=requer_ferramenta("ferramenta_y"))
 async def ferramenta_y(user=Depends(get_current_user)):
-    if not has_permission(user, "ferramenta_y"):
+    if not has_permission(user, "ferramenta_y", await get_rbac_index_async()):
         logger.warning(f"Acesso negado a ferramenta_y para {user['username']}")
+        await audit_log.record("acesso_negado", usuario=user["username"], ferramenta="ferramenta_y")
         raise HTTPException(status_code=403, detail="Acesso negado")
     logger.info(f"Usuário {user['username']} executou ferramenta_y")
+    await audit_log.record("ferramenta_executada", usuario=user["username"], ferramenta="ferramenta_y")
     return {"result": f"Execução da ferramenta Y por {user['username']}"}
 
-@router.options('/ferramenta_z', tags=["Ferramentas"])
-async def options_ferramenta_z(response: Response):
-    response.headers["Allow"] = "GET,OPTIONS"
-    return Response(status_code=204)
-
-@router.get('/ferramenta_z', tags=["Ferramentas"], summary="Ferramenta Z", description="Executa a ferramenta Z se o usuário tiver permissão.")
+@router.get('/ferramenta_z', tags=["Ferramentas"], summary="Ferramenta Z", description="Executa a ferramenta Z se o usuário tiver permissão.", openapi_extra=requer_ferramenta("ferramenta_z"))
 async def ferramenta_z(user=Depends(get_current_user)):
-    if not has_permission(user, "ferramenta_z"):
+    if not has_permission(user, "ferramenta_z", await get_rbac_index_async()):
         logger.warning(f"Acesso negado a ferramenta_z para {user['username']}")
+        await audit_log.record("acesso_negado", usuario=user["username"], ferramenta="ferramenta_z")
         raise HTTPException(status_code=403, detail="Acesso negado")
     logger.info(f"Usuário {user['username']} executou ferramenta_z")
+    await audit_log.record("ferramenta_executada", usuario=user["username"], ferramenta="ferramenta_z")
     return {"result": f"Execução da ferramenta Z por {user['username']}"}
 
 # Endpoint para listar grupos disponíveis para solicitação (que o usuário não participa)
 @router.get('/grupos/disponivel', tags=["Grupos"], summary="Listar grupos disponíveis", description="Lista grupos que o usuário não faz parte e pode solicitar acesso.")
 async def listar_grupos_disponiveis(user=Depends(get_current_user)):
-    rbac = get_rbac_data()
+    rbac = await get_rbac_data_async()
     username = user["username"]
     
     user_grupos = rbac["usuarios"][username]["grupos"]
@@ -804,9 +869,7 @@ async def listar_grupos_disponiveis(user=Depends(get_current_user)):
 
 @router.get("/user_tools", response_model=List[ToolResponseSchema], summary="Listar ferramentas disponíveis para o usuário logado")
 async def list_user_tools(current_user_data: dict = Depends(get_current_user)):
-    user_tools: Dict[str, ToolResponseSchema] = {}
-    rbac = get_rbac_data()
-    all_tools_definitions = rbac.get("ferramentas", {})
+    index = await get_rbac_index_async()
 
     if not isinstance(current_user_data, dict) or "username" not in current_user_data:
         raise HTTPException(status_code=403, detail="Usuário não identificado.")
@@ -814,23 +877,27 @@ async def list_user_tools(current_user_data: dict = Depends(get_current_user)):
     user_groups = current_user_data.get("grupos", [])
     if not isinstance(user_groups, list):
         user_groups = []
-
-    for group_name in user_groups:
-        group_details = rbac.get("grupos", {}).get(group_name)
-        if group_details and isinstance(group_details, dict):
-            tool_names_in_group = group_details.get("ferramentas", []) 
-            if not isinstance(tool_names_in_group, list):
-                tool_names_in_group = []
-
-            for tool_name in tool_names_in_group:
-                if tool_name not in user_tools:
-                    tool_definition = all_tools_definitions.get(tool_name)
-                    if tool_definition and isinstance(tool_definition, dict):
-                        user_tools[tool_name] = ToolResponseSchema(
-                            id=tool_name,
-                            nome=tool_name,
-                            url_base=tool_definition.get("url_base", ""),
-                            descricao=tool_definition.get("descricao")
-                        )
-
-    return list(user_tools.values())
+    user_groups = list(dict.fromkeys(user_groups))
+    # Só a chave é canônica: a mesma combinação de grupos, em qualquer ordem, compartilha as
+    # ferramentas já serializadas, e a resposta as junta na ordem dos grupos do usuário
+    chave = tuple(sorted(user_groups))
+
+    def _build() -> Dict[str, bytes]:
+        all_tools_definitions = index.ferramentas
+        fragmentos = {}
+        for tool_name in index.ferramentas_efetivas(chave):
+            tool_definition = all_tools_definitions.get(tool_name)
+            if tool_definition and isinstance(tool_definition, dict):
+                fragmentos[tool_name] = json_codec.dumps({
+                    "id": tool_name,
+                    "nome": tool_name,
+                    "url_base": tool_definition.get("url_base", ""),
+                    "descricao": tool_definition.get("descricao")
+                })
+        return fragmentos
+
+    fragmentos = index.cached_response(("user_tools", chave), _build)
+    # Ferramentas efetivas do usuário (união via índice ou OR de bitmaps, sem repetição)
+    ordem = index.ferramentas_do_usuario(current_user_data["username"], user_groups)
+    corpo = b"[" + b",".join(fragmentos[t] for t in ordem if t in fragmentos) + b"]"
+    return Response(content=corpo, media_type="application/json")
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
 from app.auth import authenticate_user, create_jwt_for_user, get_current_user
-from app.utils.dependencies import get_rbac_data
+from app.utils.rbac_index import RBACIndex, get_rbac_index
 import logging
 from typing import Optional
 
@@ -15,12 +15,7 @@ logger = logging.getLogger(__name__)
 
 # Utilitário para checagem de permissão
 
-def has_permission(user: dict, ferramenta: str) -> bool:
-    rbac = get_rbac_data()
-    # Global admin tem acesso a tudo
-    if user["papel"] == "global_admin":
-        return True
-    return any(
-        g in rbac["grupos"] and ferramenta in rbac["grupos"][g]["ferramentas"]
-        for g in user["grupos"]
-    )
+def has_permission(user: dict, ferramenta: str, index: Optional[RBACIndex] = None) -> bool:
+    # Global admin tem acesso a tudo; demais usuários via índice em memória dos grupos.
+    # Em handlers async, passe o índice obtido com `get_rbac_index_async`
+    return (index or get_rbac_index()).usuario_pode_usar(user, ferramenta)
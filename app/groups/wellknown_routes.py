@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Response
+
+from app.utils.jwt_keys import get_jwks
+
+router = APIRouter(
+    prefix="/.well-known",
+    tags=["Autenticação"],
+)
+
+
+@router.get("/jwks.json", summary="Chaves públicas JWT (JWKS)", description="Publica as chaves públicas usadas para verificar os tokens emitidos pelo gateway, identificadas por `kid`. Inclui as chaves anteriores ainda aceitas após uma rotação.")
+async def jwks(response: Response):
+    # Clientes podem cachear o JWKS; após uma rotação tokens antigos seguem válidos pela retenção de chaves
+    response.headers["Cache-Control"] = "public, max-age=300"
+    return get_jwks()
@@ -1,29 +1,64 @@
 from fastapi import FastAPI
 from fastapi_mcp import FastApiMCP
-from fastapi.staticfiles import StaticFiles
-from fastapi.middleware.cors import CORSMiddleware
 from app.groups.routes import router as tools_router
 from app.groups.requests_routes import router as requests_router
+from app.groups.audit_routes import router as audit_router
+from app.groups.wellknown_routes import router as wellknown_router
+from app.groups.introspect_routes import router as introspect_router
+from app.groups.proxy_routes import router as proxy_router
+from app.config import settings
+from app.utils.audit import audit_log
+from app.utils.compression import CompressionMiddleware
+from app.utils.cors import CachedCORSMiddleware
+from app.utils.json_codec import CodecJSONResponse
+from app.utils.mcp_manifest import install_tool_manifest
+from app.utils.password import bcrypt_rounds
+from app.utils.session_store import session_store
+from app.utils.static_files import PrecompressedStaticFiles
+from app.utils import storage_io
+from app.utils.upstream import close_upstream_client
+from contextlib import asynccontextmanager
 import logging
 import os
 
 logging.basicConfig(level=logging.INFO)
 
-app = FastAPI(title="MCP Gateway", docs_url="/docs", redoc_url="/redoc")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await audit_log.start()
+    session_store.purge_expired()
+    # Calibra o custo bcrypt antes do primeiro login (BCRYPT_ROUNDS=auto)
+    await storage_io.run_io(bcrypt_rounds)
+    yield
+    await audit_log.stop()
+    await close_upstream_client()
+    session_store.close()
+    storage_io.shutdown()
 
-# CORS para desenvolvimento local
+app = FastAPI(title="MCP Gateway", docs_url="/docs", redoc_url="/redoc", lifespan=lifespan,
+              default_response_class=CodecJSONResponse)
+
+# CORS: política única vinda da configuração, com preflights cacheados e OPTIONS automático
 app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:5173", "http://localhost:3000", "*"],
+    CachedCORSMiddleware,
+    router=app.router,
+    allow_origins=settings.CORS_ALLOW_ORIGINS,
+    allow_origin_regex=settings.CORS_ALLOW_ORIGIN_REGEX,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"]
+    allow_methods=settings.CORS_ALLOW_METHODS,
+    allow_headers=settings.CORS_ALLOW_HEADERS,
+    expose_headers=settings.CORS_EXPOSE_HEADERS,
+    max_age=settings.CORS_MAX_AGE,
 )
 
 # Register routers
 def register_routers(app: FastAPI):
     app.include_router(tools_router, prefix="/tools")
     app.include_router(requests_router, prefix="/tools")  # Já tem seu próprio prefixo /requests
+    app.include_router(audit_router, prefix="/tools")  # Já tem seu próprio prefixo /auditoria
+    app.include_router(introspect_router, prefix="/tools")  # Já tem seu próprio prefixo /introspect
+    app.include_router(proxy_router, prefix="/tools")  # Já tem seu próprio prefixo /proxy
+    app.include_router(wellknown_router)  # /.well-known/jwks.json
 
 register_routers(app)
 
@@ -36,15 +71,34 @@ def setup_middlewares(app: FastAPI):
         logging.info(f"Resposta: {response.status_code} para {request.method} {request.url}")
         return response
 
+    if settings.COMPRESSION_MIN_BYTES > 0:
+        app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_BYTES, compresslevel=settings.COMPRESSION_GZIP_LEVEL, brotli_quality=settings.COMPRESSION_BROTLI_QUALITY)
+
 setup_middlewares(app)
 
-# MCP exposure
+# MCP exposure: operações da API mais o catálogo de ferramentas do RBAC, em manifesto cacheado
 doc_mcp = FastApiMCP(app)
+tool_manifest = install_tool_manifest(doc_mcp)
+doc_mcp.mount_http()
+
+def configurar_transporte_mcp(mcp: FastApiMCP, sse: bool) -> None:
+    """
+    O fastapi_mcp monta o transporte em modo JSON, que descarta as notificações de progresso,
+    e não expõe a opção em `mount_http`. O atributo interno é alterado antes da primeira
+    sessão (fastapi-mcp fixado em requirements.txt); se ele mudar numa atualização da
+    biblioteca, a aplicação não sobe, em vez de voltar silenciosamente ao modo JSON.
+    """
+    transporte = getattr(mcp, "_http_transport", None)
+    if transporte is None or not hasattr(transporte, "json_response"):
+        raise RuntimeError("fastapi_mcp sem _http_transport.json_response: revise configurar_transporte_mcp para esta versão da biblioteca")
+    transporte.json_response = not sse
+
+configurar_transporte_mcp(doc_mcp, settings.MCP_HTTP_SSE)
 
 # Serve frontend build (React/Vite) como estático
 FRONTEND_DIST = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'frontend', 'dist')
 if os.path.exists(FRONTEND_DIST):
-    app.mount("/", StaticFiles(directory=FRONTEND_DIST, html=True), name="frontend")
+    app.mount("/", PrecompressedStaticFiles(directory=FRONTEND_DIST, html=True, memoria_max_bytes=settings.STATIC_MEMORY_MAX_BYTES), name="frontend")
 
 @app.get("/")
 def root():
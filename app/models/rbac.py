@@ -0,0 +1,228 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# Campos conhecidos de cada entidade; os demais são preservados como estão no JSON
+_GRUPO_FIELDS = ("descricao", "admins", "users", "ferramentas")
+_USUARIO_FIELDS = ("senha", "grupos", "papel")
+
+
+class MembershipSet:
+    """
+    Conjunto que preserva a ordem de inserção.
+
+    Pertinência, inclusão e remoção são O(1) (dicionário por baixo), e a serialização
+    mantém a ordem original das listas do rbac.json.
+    """
+
+    __slots__ = ("_items",)
+
+    def __init__(self, items: Iterable[str] = ()):
+        self._items: Dict[str, None] = dict.fromkeys(items)
+
+    def __contains__(self, item: object) -> bool:
+        return item in self._items
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __bool__(self) -> bool:
+        return bool(self._items)
+
+    def __repr__(self) -> str:
+        return f"MembershipSet({list(self._items)!r})"
+
+    def add(self, item: str) -> bool:
+        """Inclui o item; retorna False se ele já estava presente."""
+        if item in self._items:
+            return False
+        self._items[item] = None
+        return True
+
+    def discard(self, item: str) -> bool:
+        """Remove o item; retorna False se ele não estava presente."""
+        if item not in self._items:
+            return False
+        del self._items[item]
+        return True
+
+    def to_list(self) -> List[str]:
+        return list(self._items)
+
+
+@dataclass
+class Grupo:
+    descricao: Optional[str] = None
+    admins: MembershipSet = field(default_factory=MembershipSet)
+    users: MembershipSet = field(default_factory=MembershipSet)
+    ferramentas: MembershipSet = field(default_factory=MembershipSet)
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Grupo":
+        return cls(
+            descricao=data.get("descricao"),
+            admins=MembershipSet(data.get("admins", [])),
+            users=MembershipSet(data.get("users", [])),
+            ferramentas=MembershipSet(data.get("ferramentas", [])),
+            extra={k: v for k, v in data.items() if k not in _GRUPO_FIELDS},
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {} if self.descricao is None else {"descricao": self.descricao}
+        data.update({
+            "admins": self.admins.to_list(),
+            "users": self.users.to_list(),
+            "ferramentas": self.ferramentas.to_list(),
+            **self.extra,
+        })
+        return data
+
+
+@dataclass
+class Usuario:
+    senha: str
+    papel: str = "user"
+    grupos: MembershipSet = field(default_factory=MembershipSet)
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Usuario":
+        return cls(
+            senha=data.get("senha", ""),
+            papel=data.get("papel", "user"),
+            grupos=MembershipSet(data.get("grupos", [])),
+            extra={k: v for k, v in data.items() if k not in _USUARIO_FIELDS},
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "senha": self.senha,
+            "grupos": self.grupos.to_list(),
+            "papel": self.papel,
+            **self.extra,
+        }
+
+
+@dataclass
+class RBACModel:
+    """
+    Modelo tipado do RBAC em memória, com associações mantidas em conjuntos.
+
+    `from_dict`/`to_dict` convertem de e para o formato do rbac.json; chaves desconhecidas
+    (de topo ou das entidades) são preservadas. As operações de associação mantêm os dois
+    lados consistentes (grupo.users e usuario.grupos) com custo O(1) cada.
+
+    Como o arquivo pode ter associações registradas só do lado do usuário (ex.: alterações
+    de `grupos` via `PUT /usuarios/{username}`), o modelo mantém também o índice reverso
+    grupo -> usuários montado a partir de `usuario.grupos`/`admin_de_grupos`, usado para
+    renomear e remover grupos sem percorrer todos os usuários.
+    """
+
+    grupos: Dict[str, Grupo] = field(default_factory=dict)
+    usuarios: Dict[str, Usuario] = field(default_factory=dict)
+    ferramentas: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    extra: Dict[str, Any] = field(default_factory=dict)
+    membros_por_grupo: Dict[str, MembershipSet] = field(default_factory=dict, repr=False, compare=False)
+
+    def __post_init__(self):
+        if not self.membros_por_grupo:
+            for nome, usuario in self.usuarios.items():
+                for grupo in (*usuario.grupos, *usuario.extra.get("admin_de_grupos", ())):
+                    self.membros_por_grupo.setdefault(grupo, MembershipSet()).add(nome)
+
+    @classmethod
+    def from_dict(cls, rbac: Dict[str, Any]) -> "RBACModel":
+        return cls(
+            grupos={nome: Grupo.from_dict(g) for nome, g in rbac.get("grupos", {}).items()},
+            usuarios={nome: Usuario.from_dict(u) for nome, u in rbac.get("usuarios", {}).items()},
+            ferramentas=dict(rbac.get("ferramentas", {})),
+            extra={k: v for k, v in rbac.items() if k not in ("grupos", "usuarios", "ferramentas")},
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "grupos": {nome: g.to_dict() for nome, g in self.grupos.items()},
+            "usuarios": {nome: u.to_dict() for nome, u in self.usuarios.items()},
+            "ferramentas": self.ferramentas,
+            **self.extra,
+        }
+
+    def add_member(self, grupo: str, username: str) -> bool:
+        """Inclui o usuário no grupo (e o grupo no usuário); retorna False se já era membro."""
+        g = self.grupos[grupo]
+        if not g.users.add(username):
+            return False
+        self.usuarios[username].grupos.add(grupo)
+        self.membros_por_grupo.setdefault(grupo, MembershipSet()).add(username)
+        # Campo legado de alguns arquivos antigos
+        members: Optional[List[str]] = g.extra.get("members")
+        if members is not None and username not in members:
+            members.append(username)
+        return True
+
+    def remove_member(self, grupo: str, username: str) -> bool:
+        """
+        Remove o usuário do grupo, inclusive como admin; retorna False se não era membro.
+        Sem grupos restantes, o papel volta a 'user'.
+        """
+        g = self.grupos[grupo]
+        if not g.users.discard(username):
+            return False
+        g.admins.discard(username)
+        usuario = self.usuarios.get(username)
+        if usuario is None:
+            return True
+        usuario.grupos.discard(grupo)
+        if grupo in self.membros_por_grupo:
+            self.membros_por_grupo[grupo].discard(username)
+        if not usuario.grupos:
+            usuario.papel = "user"
+            usuario.extra["admin_de_grupos"] = []
+        elif grupo in usuario.extra.get("admin_de_grupos", []):
+            usuario.extra["admin_de_grupos"].remove(grupo)
+        return True
+
+    def _membros(self, nome: str, grupo: Grupo) -> List[Usuario]:
+        """Usuários que referenciam o grupo, de qualquer dos dois lados da associação."""
+        nomes = dict.fromkeys(self.membros_por_grupo.get(nome, ()))
+        nomes.update(dict.fromkeys(grupo.users))
+        nomes.update(dict.fromkeys(grupo.admins))
+        return [self.usuarios[n] for n in nomes if n in self.usuarios]
+
+    def rename_group(self, antigo: str, novo: str) -> int:
+        """
+        Renomeia o grupo e atualiza apenas os usuários que o referenciam.
+        Retorna quantos usuários foram atualizados.
+        """
+        g = self.grupos.pop(antigo)
+        self.grupos[novo] = g
+        membros = self._membros(antigo, g)
+        self.membros_por_grupo[novo] = self.membros_por_grupo.pop(antigo, MembershipSet())
+        for usuario in membros:
+            if usuario.grupos.discard(antigo):
+                usuario.grupos.add(novo)
+            admin_de: Optional[List[str]] = usuario.extra.get("admin_de_grupos")
+            if admin_de and antigo in admin_de:
+                admin_de[admin_de.index(antigo)] = novo
+        # Campo legado de alguns arquivos antigos
+        join_requests = self.extra.get("join_requests")
+        if isinstance(join_requests, dict) and antigo in join_requests:
+            join_requests[novo] = join_requests.pop(antigo)
+        return len(membros)
+
+    def remove_group(self, grupo: str) -> int:
+        """
+        Remove o grupo e a referência a ele nos usuários que o referenciam (papéis não mudam).
+        Retorna quantos usuários foram atualizados.
+        """
+        membros = self._membros(grupo, self.grupos.pop(grupo))
+        self.membros_por_grupo.pop(grupo, None)
+        for usuario in membros:
+            usuario.grupos.discard(grupo)
+            admin_de: Optional[List[str]] = usuario.extra.get("admin_de_grupos")
+            if admin_de and grupo in admin_de:
+                admin_de.remove(grupo)
+        return len(membros)
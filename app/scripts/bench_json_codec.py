@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Compara os backends do codec JSON (biblioteca padrão x orjson) em dados RBAC sintéticos.
+
+Uso: python -m app.scripts.bench_json_codec [--usuarios 1000 10000 100000] [--repeticoes 5]
+"""
+import argparse
+import json
+import time
+from typing import Any, Callable, Dict
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def gerar_rbac(n_usuarios: int, n_grupos: int = 50, n_ferramentas: int = 200) -> Dict[str, Any]:
+    ferramentas = {
+        f"ferramenta_{i}": {"descricao": f"Ferramenta sintética {i}", "url_base": f"http://backend-{i % 10}:8000"}
+        for i in range(n_ferramentas)
+    }
+    grupos = {
+        f"grupo_{g}": {
+            "descricao": f"Grupo sintético {g}",
+            "admins": [f"usuario_{g}"],
+            "users": [],
+            "ferramentas": [f"ferramenta_{(g * 7 + k) % n_ferramentas}" for k in range(10)],
+        }
+        for g in range(n_grupos)
+    }
+    usuarios = {}
+    for u in range(n_usuarios):
+        nomes = [f"grupo_{(u + k) % n_grupos}" for k in range(3)]
+        for nome in nomes:
+            grupos[nome]["users"].append(f"usuario_{u}")
+        usuarios[f"usuario_{u}"] = {"senha": "$2b$12$" + "x" * 53, "grupos": nomes, "papel": "user"}
+    return {"grupos": grupos, "usuarios": usuarios, "ferramentas": ferramentas, "versao": 1}
+
+
+def _medir(fn: Callable[[], Any], repeticoes: int) -> float:
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        fn()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark do codec JSON com dados RBAC sintéticos")
+    parser.add_argument("--usuarios", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    backends = {
+        "stdlib": (
+            json.loads,
+            lambda o: json.dumps(o, indent=2, ensure_ascii=False).encode("utf-8"),
+            lambda o: json.dumps(o, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+        ),
+    }
+    if orjson is not None:
+        backends["orjson"] = (
+            orjson.loads,
+            lambda o: orjson.dumps(o, option=orjson.OPT_INDENT_2),
+            orjson.dumps,
+        )
+    else:
+        print("orjson não instalado; medindo apenas a biblioteca padrão")
+
+    print(f"{'usuarios':>9} {'backend':>7} {'bytes':>11} {'parse ms':>9} {'dump ms':>9} {'resposta ms':>12}")
+    for n in args.usuarios:
+        rbac = gerar_rbac(n)
+        raw = json.dumps(rbac, ensure_ascii=False).encode("utf-8")
+        # Corpo típico de resposta: a listagem de usuários de um grupo com seus grupos
+        resposta = [{"username": u, "grupos": d["grupos"], "papel": d["papel"]} for u, d in rbac["usuarios"].items()]
+        for nome, (loads, dump_storage, dump_response) in backends.items():
+            parse = _medir(lambda: loads(raw), args.repeticoes)
+            dump = _medir(lambda: dump_storage(rbac), args.repeticoes)
+            resp = _medir(lambda: dump_response(resposta), args.repeticoes)
+            print(f"{n:>9} {nome:>7} {len(raw):>11} {parse:>9.1f} {dump:>9.1f} {resp:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,13 @@
 import bcrypt
 import sys
 
+from app.utils.password import hash_password
+
 def generate_password_hash(password):
     """
     Gera um hash bcrypt para a senha fornecida.
+
+    O custo é o mesmo da aplicação: `BCRYPT_ROUNDS` ou, com `auto`, calibrado neste host.
     
     Args:
         password (str): A senha em texto plano
@@ -12,9 +16,7 @@ def generate_password_hash(password):
     Returns:
         str: O hash bcrypt da senha
     """
-    # Gerar um salt e fazer hash da senha
-    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-    return hashed.decode('utf-8')
+    return hash_password(password)
 
 def check_password(plain_password, hashed_password):
     """
@@ -31,7 +33,7 @@ def check_password(plain_password, hashed_password):
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Uso: python generate_password_hash.py <senha>")
+        print("Uso: python -m app.scripts.generate_password_hash <senha>")
         sys.exit(1)
     
     password = sys.argv[1]
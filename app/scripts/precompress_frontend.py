@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Gera as versões .br e .gz dos arquivos de texto do build do frontend, com compressão máxima.
+
+Rodar após `npm run build`; o gateway serve esses arquivos em vez de comprimir na inicialização.
+(brotli é opcional: sem o pacote instalado, apenas .gz é gerado.)
+
+Uso: python -m app.scripts.precompress_frontend [--dist frontend/dist]
+"""
+import argparse
+import mimetypes
+import os
+
+from app.utils.static_files import CODIFICACOES, COMPRESSAO_MIN_BYTES, comprimivel, comprimir
+
+
+def precomprimir(dist: str) -> int:
+    gerados = 0
+    for raiz, _, nomes in os.walk(dist):
+        for nome in nomes:
+            caminho = os.path.join(raiz, nome)
+            if nome.endswith((".br", ".gz")):
+                continue
+            content_type = mimetypes.guess_type(caminho)[0] or ""
+            if not comprimivel(content_type) or os.path.getsize(caminho) < COMPRESSAO_MIN_BYTES:
+                continue
+            with open(caminho, "rb") as f:
+                original = f.read()
+            for codificacao, sufixo in CODIFICACOES:
+                comprimido = comprimir(original, codificacao, nivel_maximo=True)
+                if comprimido is None or len(comprimido) >= len(original):
+                    continue
+                with open(caminho + sufixo, "wb") as f:
+                    f.write(comprimido)
+                gerados += 1
+                print(f"{os.path.relpath(caminho, dist)}{sufixo}: {len(original)} -> {len(comprimido)} bytes")
+    return gerados
+
+
+def main():
+    padrao = os.path.join(os.path.dirname(__file__), "..", "..", "frontend", "dist")
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dist", default=os.path.normpath(padrao))
+    args = parser.parse_args()
+    print(f"{precomprimir(args.dist)} arquivos gerados em {args.dist}")
+
+
+if __name__ == "__main__":
+    main()
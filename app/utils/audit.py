@@ -0,0 +1,241 @@
+import asyncio
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.utils import json_codec
+from app.utils.storage_io import run_io
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = "audit-"
+SEGMENT_SUFFIX = ".ndjson"
+
+
+class AuditLog:
+    """
+    Pipeline de auditoria para execuções de ferramentas e ações administrativas.
+
+    Os eventos entram em um buffer em memória limitado (`asyncio.Queue`) e são gravados
+    em lote por uma task de fundo em segmentos NDJSON rotativos, fora do caminho da
+    requisição. `record()` aguarda espaço no buffer quando ele está cheio (backpressure);
+    `record_nowait()`, usado por código síncrono, descarta o evento e contabiliza o descarte.
+    """
+
+    def __init__(self,
+                 directory: str,
+                 buffer_size: int = 10000,
+                 batch_size: int = 500,
+                 flush_interval: float = 1.0,
+                 segment_max_bytes: int = 10 * 1024 * 1024,
+                 max_segments: int = 100):
+        self.directory = Path(directory)
+        self.buffer_size = buffer_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.segment_max_bytes = segment_max_bytes
+        self.max_segments = max_segments
+        self.dropped = 0
+        self.written = 0
+        self._queue: Optional[asyncio.Queue] = None
+        # Eventos já enfileirados e já processados pela task de gravação (base do flush)
+        self._enqueued = 0
+        self._processed = 0
+        self._progress: Optional[asyncio.Condition] = None
+        self._task: Optional[asyncio.Task] = None
+        self._segment: Optional[Path] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """Inicia a task de gravação no loop corrente (chamado no lifespan da aplicação)."""
+        if self.running:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._queue = asyncio.Queue(maxsize=self.buffer_size)
+        self._enqueued = self._processed = 0
+        self._progress = asyncio.Condition()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Auditoria iniciada em {self.directory}")
+
+    async def stop(self) -> None:
+        """Grava os eventos pendentes e encerra a task de gravação."""
+        if not self.running:
+            return
+        await self.flush()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        # Libera flushes ainda à espera de eventos que não serão mais gravados
+        async with self._progress:
+            self._progress.notify_all()
+        self._task = None
+        self._queue = None
+
+    async def flush(self) -> None:
+        """
+        Aguarda a gravação dos eventos enfileirados até o momento da chamada.
+
+        Eventos que chegam depois não entram na espera, então o flush termina mesmo sob
+        tráfego contínuo (`queue.join()` só retornaria com o buffer vazio).
+        """
+        if not self.running:
+            return
+        alvo = self._enqueued
+        async with self._progress:
+            await self._progress.wait_for(lambda: self._processed >= alvo or not self.running)
+
+    def _build_event(self, evento: str, usuario: Optional[str], ferramenta: Optional[str],
+                     alvo: Optional[str], detalhes: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            "ts": datetime.utcnow().isoformat(),
+            "evento": evento,
+            "usuario": usuario,
+            "ferramenta": ferramenta,
+            "alvo": alvo,
+            "detalhes": detalhes or {},
+        }
+
+    async def record(self, evento: str, usuario: Optional[str] = None, ferramenta: Optional[str] = None,
+                     alvo: Optional[str] = None, detalhes: Optional[Dict[str, Any]] = None) -> None:
+        """Registra um evento; aguarda espaço no buffer se ele estiver cheio."""
+        if not self.running:
+            self.dropped += 1
+            logger.debug(f"Auditoria inativa; evento '{evento}' descartado")
+            return
+        await self._queue.put(self._build_event(evento, usuario, ferramenta, alvo, detalhes))
+        self._enqueued += 1
+
+    def record_nowait(self, evento: str, usuario: Optional[str] = None, ferramenta: Optional[str] = None,
+                      alvo: Optional[str] = None, detalhes: Optional[Dict[str, Any]] = None) -> bool:
+        """Registra um evento sem bloquear; retorna False se o buffer estiver cheio."""
+        if not self.running:
+            self.dropped += 1
+            return False
+        try:
+            self._queue.put_nowait(self._build_event(evento, usuario, ferramenta, alvo, detalhes))
+            self._enqueued += 1
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning(f"Buffer de auditoria cheio; evento '{evento}' descartado ({self.dropped} no total)")
+            return False
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await run_io(self._write_batch, batch)
+                self.written += len(batch)
+            except Exception as e:
+                logger.error(f"Erro ao gravar {len(batch)} eventos de auditoria: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+                self._processed += len(batch)
+                async with self._progress:
+                    self._progress.notify_all()
+
+    def _segments(self) -> List[Path]:
+        if not self.directory.exists():
+            return []
+        return sorted(p for p in self.directory.iterdir()
+                      if p.name.startswith(SEGMENT_PREFIX) and p.name.endswith(SEGMENT_SUFFIX))
+
+    def _new_segment(self, first_ts: str) -> Path:
+        stamp = datetime.fromisoformat(first_ts).strftime("%Y%m%dT%H%M%S%f")
+        path = self.directory / f"{SEGMENT_PREFIX}{stamp}{SEGMENT_SUFFIX}"
+        segments = self._segments()
+        for old in segments[:max(0, len(segments) + 1 - self.max_segments)]:
+            old.unlink(missing_ok=True)
+        return path
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        if self._segment is None:
+            segments = self._segments()
+            self._segment = segments[-1] if segments else self._new_segment(batch[0]["ts"])
+        elif self._segment.exists() and self._segment.stat().st_size >= self.segment_max_bytes:
+            self._segment = self._new_segment(batch[0]["ts"])
+        payload = b"".join(json_codec.dumps(e) + b"\n" for e in batch)
+        with open(self._segment, 'ab') as f:
+            f.write(payload)
+
+    @staticmethod
+    def _segment_start(path: Path) -> datetime:
+        stamp = path.name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]
+        return datetime.strptime(stamp, "%Y%m%dT%H%M%S%f")
+
+    def _query_segments(self, usuario: Optional[str], ferramenta: Optional[str], evento: Optional[str],
+                        inicio: Optional[datetime], fim: Optional[datetime], limite: int) -> List[Dict[str, Any]]:
+        segments = self._segments()
+        results: List[Dict[str, Any]] = []
+        # Percorre dos segmentos mais recentes para os mais antigos, parando ao atingir o limite
+        for i in range(len(segments) - 1, -1, -1):
+            start = self._segment_start(segments[i])
+            if fim and start > fim:
+                continue
+            if inicio and i + 1 < len(segments) and self._segment_start(segments[i + 1]) < inicio:
+                break
+            with open(segments[i], 'rb') as f:
+                lines = f.readlines()
+            for line in reversed(lines):
+                try:
+                    event = json_codec.loads(line)
+                except json_codec.JSONDecodeError:
+                    continue
+                if usuario and event.get("usuario") != usuario:
+                    continue
+                if ferramenta and event.get("ferramenta") != ferramenta:
+                    continue
+                if evento and event.get("evento") != evento:
+                    continue
+                ts = datetime.fromisoformat(event["ts"])
+                if (inicio and ts < inicio) or (fim and ts > fim):
+                    continue
+                results.append(event)
+                if len(results) >= limite:
+                    return results
+        return results
+
+    async def query(self, usuario: Optional[str] = None, ferramenta: Optional[str] = None,
+                    evento: Optional[str] = None, inicio: Optional[datetime] = None,
+                    fim: Optional[datetime] = None, limite: int = 100) -> List[Dict[str, Any]]:
+        """Consulta eventos gravados (mais recentes primeiro) filtrando por usuário, ferramenta e período."""
+        await self.flush()
+        return await run_io(self._query_segments, usuario, ferramenta, evento, inicio, fim, limite)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ativo": self.running,
+            "pendentes": self._queue.qsize() if self._queue else 0,
+            "capacidade_buffer": self.buffer_size,
+            "gravados": self.written,
+            "descartados": self.dropped,
+        }
+
+
+# Instância padrão usada pela aplicação
+audit_log = AuditLog(
+    directory=settings.AUDIT_DIR,
+    buffer_size=settings.AUDIT_BUFFER_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL,
+    segment_max_bytes=settings.AUDIT_SEGMENT_MAX_BYTES,
+    max_segments=settings.AUDIT_MAX_SEGMENTS,
+)
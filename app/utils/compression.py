@@ -0,0 +1,85 @@
+from typing import List, Tuple
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import DEFAULT_EXCLUDED_CONTENT_TYPES, GZipMiddleware, IdentityResponder
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Já comprimidos além dos padrões do Starlette (que incluem imagens, zip, woff2 e SSE)
+EXCLUIDOS = DEFAULT_EXCLUDED_CONTENT_TYPES + (
+    "application/x-brotli",
+    "application/zstd",
+    "application/x-7z-compressed",
+    "application/x-bzip2",
+    "application/x-xz",
+    "application/pdf",
+)
+
+# Blocos a partir deste tamanho são comprimidos no pool de threads, fora do event loop;
+# abaixo dele a troca de thread custa mais que a compressão
+LIMIAR_THREADPOOL = 64 * 1024
+
+
+
+def codificacoes_aceitas(accept_encoding: str) -> List[str]:
+    """Codificações aceitas pelo cliente (q > 0), sem considerar a ordem de preferência dele."""
+    aceitas = []
+    for item in accept_encoding.split(","):
+        nome, _, params = item.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q=") and q[2:].strip() in ("0", "0.0", "0.00", "0.000"):
+            continue
+        if nome.strip():
+            aceitas.append(nome.strip().lower())
+    return aceitas
+
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int, *, exclude_content_types: Tuple[str, ...] = EXCLUIDOS):
+        super().__init__(app, minimum_size, exclude_content_types=exclude_content_types)
+        self.quality = quality
+        self._compressor = None
+
+    async def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if self._compressor is None:
+            self._compressor = brotli.Compressor(quality=self.quality)
+        if len(body) >= LIMIAR_THREADPOOL:
+            # Os blocos de uma resposta chegam um de cada vez, então o compressor nunca é usado por duas threads
+            return await run_in_threadpool(self._comprimir, body, more_body)
+        return self._comprimir(body, more_body)
+
+    def _comprimir(self, body: bytes, more_body: bool) -> bytes:
+        dados = self._compressor.process(body)
+        # Em respostas transmitidas cada bloco é liberado, para não atrasar o cliente
+        return dados + (self._compressor.flush() if more_body else self._compressor.finish())
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Compressão negociada das respostas: brotli quando o cliente aceita e o pacote está
+    instalado, senão gzip (comportamento do `GZipMiddleware` do Starlette).
+
+    Respostas menores que `minimum_size`, já codificadas (ex.: versões pré-comprimidas do
+    frontend ou corpos repassados do backend de uma ferramenta), parciais ou de tipos já
+    comprimidos (`EXCLUIDOS`, incluindo `text/event-stream`) passam intactas. Respostas
+    transmitidas são comprimidas bloco a bloco.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, compresslevel: int = 6, brotli_quality: int = 4):
+        super().__init__(app, minimum_size=minimum_size, compresslevel=compresslevel, exclude_content_types=EXCLUIDOS)
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and brotli is not None:
+            if "br" in codificacoes_aceitas(Headers(scope=scope).get("accept-encoding", "")):
+                responder = BrotliResponder(self.app, self.minimum_size, self.brotli_quality, exclude_content_types=self.exclude_content_types)
+                await responder(scope, receive, send)
+                return
+        await super().__call__(scope, receive, send)
@@ -0,0 +1,90 @@
+import functools
+from collections import OrderedDict
+from typing import Collection, Dict, Optional, Set, Tuple
+
+from starlette.datastructures import Headers
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import PlainTextResponse, Response
+from starlette.routing import Match, Mount, Router
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+_METODOS = ("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE")
+
+# (origem, método, cabeçalhos, rede privada) pedidos no preflight
+_ChavePreflight = Tuple[str, str, Optional[str], Optional[str]]
+
+
+class CachedCORSMiddleware(CORSMiddleware):
+    """
+    Política CORS única do gateway (`CORSMiddleware` do Starlette) com respostas pré-computadas.
+
+    A resposta de cada combinação de preflight (origem, método e cabeçalhos pedidos) e a
+    decisão de origem permitida são calculadas uma vez e guardadas (até `cache_size`
+    entradas cada), e o `max_age` longo faz o navegador reaproveitar o preflight.
+    Requisições OPTIONS que não são preflight (sem `Origin`) recebem 204 com `Allow`
+    calculado das rotas de `router`, de forma que rotas registradas depois (ferramentas,
+    proxy) não precisam de handler OPTIONS próprio.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        router: Optional[Router] = None,
+        cache_size: int = 1024,
+        allow_origins: Collection[str] = (),
+        **kwargs,
+    ):
+        super().__init__(app, allow_origins=allow_origins, **kwargs)
+        self.router = router
+        self.cache_size = cache_size
+        self._preflights: "OrderedDict[_ChavePreflight, Tuple[int, bytes, Dict[str, str]]]" = OrderedDict()
+        self._origens: Dict[str, bool] = {}
+
+    def is_allowed_origin(self, origin: str) -> bool:
+        permitida = self._origens.get(origin)
+        if permitida is None:
+            permitida = super().is_allowed_origin(origin)
+            if len(self._origens) >= self.cache_size:
+                self._origens.clear()
+            self._origens[origin] = permitida
+        return permitida
+
+    def preflight_response(self, request_headers: Headers) -> Response:
+        chave: _ChavePreflight = (
+            request_headers["origin"],
+            request_headers["access-control-request-method"],
+            request_headers.get("access-control-request-headers"),
+            request_headers.get("access-control-request-private-network"),
+        )
+        pronta = self._preflights.get(chave)
+        if pronta is None:
+            resposta = super().preflight_response(request_headers)
+            pronta = (resposta.status_code, resposta.body, dict(resposta.headers))
+            self._preflights[chave] = pronta
+            if len(self._preflights) > self.cache_size:
+                self._preflights.popitem(last=False)
+        status_code, corpo, headers = pronta
+        return PlainTextResponse(corpo, status_code=status_code, headers=headers)
+
+    def _metodos(self, scope: Scope) -> Set[str]:
+        """Métodos com rota para o caminho pedido (montagens, como o frontend estático, não contam)."""
+        metodos: Set[str] = set()
+        for metodo in _METODOS:
+            tentativa = {**scope, "method": metodo}
+            for rota in self.router.routes:
+                if not isinstance(rota, Mount) and rota.matches(tentativa)[0] == Match.FULL:
+                    metodos.add(metodo)
+                    break
+        return metodos
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["method"] == "OPTIONS" and self.router is not None:
+            headers = Headers(scope=scope)
+            if "origin" not in headers or "access-control-request-method" not in headers:
+                metodos = self._metodos(scope)
+                if metodos:
+                    allow = ", ".join(sorted(metodos | {"OPTIONS"}))
+                    send = functools.partial(self.send, send=send, request_headers=headers)
+                    await Response(status_code=204, headers={"Allow": allow})(scope, receive, send)
+                    return
+        await super().__call__(scope, receive, send)
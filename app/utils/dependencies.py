@@ -1,27 +1,47 @@
-import json
 from app.config import settings
+from app.utils import json_codec
+from app.utils.storage_io import run_io
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional
 import logging
 from fastapi import HTTPException
 
 logger = logging.getLogger(__name__)
 
-def get_rbac_data() -> Dict:
+def _recover_from_wal(rbac_path: Path) -> Optional[Dict]:
+    """Tenta reconstruir o arquivo RBAC a partir do log de alterações."""
+    from app.utils.rbac_wal import recover_rbac_file
+    try:
+        if recover_rbac_file(str(rbac_path)):
+            return json_codec.load_file(rbac_path)
+    except Exception as e:
+        logger.error(f"Falha ao recuperar o arquivo RBAC a partir do log: {e}")
+    return None
+
+def get_rbac_data(rbac_file: Optional[str] = None) -> Dict:
     # Corrigido para usar settings.RBAC_FILE em vez de settings.GROUPS_FILE
-    rbac_path = Path(settings.RBAC_FILE) 
+    rbac_path = Path(rbac_file or settings.RBAC_FILE) 
     try:
         # Assegura que estamos usando o caminho completo definido em RBAC_FILE
         # Não precisamos mais adicionar .parent / 'rbac.json' se RBAC_FILE já é o caminho completo.
         # Se RBAC_FILE for apenas o nome do arquivo e estiver em data/, então o config.py já resolve isso.
-        with open(rbac_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return json_codec.load_file(rbac_path)
     except FileNotFoundError:
         logger.error(f"Arquivo RBAC não encontrado em: {rbac_path}")
+        recovered = _recover_from_wal(rbac_path)
+        if recovered is not None:
+            return recovered
         raise HTTPException(status_code=500, detail=f"Arquivo de configuração RBAC não encontrado: {rbac_path}")
-    except json.JSONDecodeError:
+    except json_codec.JSONDecodeError:
         logger.error(f"Erro ao decodificar o arquivo JSON RBAC em: {rbac_path}")
+        recovered = _recover_from_wal(rbac_path)
+        if recovered is not None:
+            return recovered
         raise HTTPException(status_code=500, detail=f"Erro ao ler o arquivo de configuração RBAC (JSON malformado): {rbac_path}")
     except Exception as e:
         logger.error(f"Erro inesperado ao carregar o arquivo RBAC ({rbac_path}): {e}")
         raise HTTPException(status_code=500, detail=f"Erro inesperado ao carregar configuração RBAC: {e}")
+
+async def get_rbac_data_async(rbac_file: Optional[str] = None) -> Dict:
+    """Versão assíncrona de `get_rbac_data`, lida no pool de I/O de armazenamento."""
+    return await run_io(get_rbac_data, rbac_file)
@@ -0,0 +1,78 @@
+import json
+import logging
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Union
+
+from fastapi.responses import JSONResponse
+
+from app.config import settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# orjson.JSONDecodeError herda de json.JSONDecodeError, então um único tipo cobre os dois backends
+JSONDecodeError = json.JSONDecodeError
+
+
+def _select_backend(requested: str) -> str:
+    requested = (requested or "auto").lower()
+    if requested not in ("auto", "orjson", "stdlib"):
+        logger.warning(f"JSON_CODEC '{requested}' desconhecido; usando 'auto'")
+        requested = "auto"
+    if requested == "stdlib":
+        return "stdlib"
+    if orjson is None:
+        if requested == "orjson":
+            logger.warning("JSON_CODEC=orjson, mas o pacote orjson não está instalado; usando a biblioteca padrão")
+        return "stdlib"
+    return "orjson"
+
+
+BACKEND = _select_backend(settings.JSON_CODEC)
+
+
+def _default(obj: Any) -> Any:
+    # Mesmo comportamento do orjson para os tipos usados nos dados persistidos
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"Objeto do tipo {type(obj).__name__} não é serializável em JSON")
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """Decodifica JSON (bytes ou str) com o backend configurado."""
+    if BACKEND == "orjson":
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any, pretty: bool = False) -> bytes:
+    """Codifica em JSON UTF-8; compacto por padrão, com indentação de 2 espaços se `pretty`."""
+    if BACKEND == "orjson":
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_INDENT_2 if pretty else 0)
+    if pretty:
+        text = json.dumps(obj, indent=2, ensure_ascii=False, default=_default)
+    else:
+        text = json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_default)
+    return text.encode("utf-8")
+
+
+def dumps_storage(obj: Any) -> bytes:
+    """Codificação usada nos arquivos de dados (compacta, salvo `JSON_STORAGE_PRETTY=true`)."""
+    return dumps(obj, pretty=settings.JSON_STORAGE_PRETTY)
+
+
+def load_file(path: Union[str, Path]) -> Any:
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+class CodecJSONResponse(JSONResponse):
+    """Resposta JSON padrão da aplicação, codificada pelo backend configurado (orjson quando disponível)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
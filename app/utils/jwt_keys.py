@@ -0,0 +1,182 @@
+import os
+import secrets
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import jwt
+from jwt.algorithms import OKPAlgorithm, RSAAlgorithm
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+SYMMETRIC_ALGORITHMS = {"HS256"}
+ASYMMETRIC_ALGORITHMS = {"RS256", "EdDSA"}
+
+
+class KeyRing:
+    """
+    Conjunto de chaves de assinatura JWT indexado por `kid`.
+
+    A chave mais recente assina novos tokens; as anteriores (até `retained`) continuam
+    válidas para verificação e publicadas no JWKS, permitindo rotação sem downtime.
+    Os objetos de chave são carregados do disco uma única vez e mantidos em cache; o
+    diretório só é relido quando seu mtime muda (rotação feita por outro worker), inclusive
+    quando chega um token com `kid` desconhecido: tokens forjados com kids aleatórios
+    custam apenas um `stat`.
+    """
+
+    def __init__(self, directory: str, algorithm: str, retained: int = 3):
+        if algorithm not in ASYMMETRIC_ALGORITHMS:
+            raise ValueError(f"Algoritmo assimétrico não suportado: {algorithm}")
+        self.directory = Path(directory)
+        self.algorithm = algorithm
+        self.retained = max(1, retained)
+        self._lock = threading.Lock()
+        self._private_keys: Dict[str, Any] = {}
+        self._public_keys: Dict[str, Any] = {}
+        self._jwks: Dict[str, Any] = {"keys": []}
+        self._active_kid: Optional[str] = None
+        self._dir_mtime: Optional[int] = None
+
+    @property
+    def active_kid(self) -> Optional[str]:
+        self._ensure_loaded()
+        return self._active_kid
+
+    def _generate_private_key(self):
+        if self.algorithm == "RS256":
+            return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        return ed25519.Ed25519PrivateKey.generate()
+
+    def _to_jwk(self, kid: str, public_key) -> Dict[str, Any]:
+        if self.algorithm == "RS256":
+            jwk = RSAAlgorithm.to_jwk(public_key, as_dict=True)
+        else:
+            jwk = OKPAlgorithm.to_jwk(public_key, as_dict=True)
+        jwk.update({"kid": kid, "alg": self.algorithm, "use": "sig"})
+        return jwk
+
+    def _reload(self) -> None:
+        """Recarrega as chaves do diretório (chamado com o lock adquirido)."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Os kids começam com timestamp, então a ordem lexicográfica é a ordem de criação
+        pem_files = sorted(self.directory.glob("*.pem"))
+        private_keys, public_keys = {}, {}
+        for pem in pem_files[-self.retained:]:
+            kid = pem.stem
+            key = self._private_keys.get(kid)
+            if key is None:
+                with open(pem, 'rb') as f:
+                    key = serialization.load_pem_private_key(f.read(), password=None)
+            private_keys[kid] = key
+            public_keys[kid] = key.public_key()
+        self._private_keys = private_keys
+        self._public_keys = public_keys
+        self._active_kid = pem_files[-1].stem if pem_files else None
+        self._jwks = {"keys": [self._to_jwk(kid, pub) for kid, pub in public_keys.items()]}
+        self._dir_mtime = self.directory.stat().st_mtime_ns
+
+    def _current_mtime(self) -> Optional[int]:
+        try:
+            return self.directory.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _ensure_loaded(self) -> None:
+        if self._active_kid is not None and self._current_mtime() == self._dir_mtime:
+            return
+        with self._lock:
+            # Outra thread pode ter recarregado enquanto esperávamos o lock
+            if self._active_kid is not None and self._current_mtime() == self._dir_mtime:
+                return
+            self._reload()
+            if self._active_kid is None:
+                self._rotate_locked()
+
+    def _rotate_locked(self) -> str:
+        kid = f"{datetime.utcnow().strftime('%Y%m%d%H%M%S')}-{secrets.token_hex(4)}"
+        key = self._generate_private_key()
+        pem = key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption()
+        )
+        path = self.directory / f"{kid}.pem"
+        tmp_path = self.directory / f".{kid}.pem.tmp"
+        fd = os.open(tmp_path, os.O_CREAT | os.O_WRONLY | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(pem)
+        os.replace(tmp_path, path)
+        # Remove chaves além da retenção (tokens assinados por elas deixam de ser aceitos)
+        pem_files = sorted(self.directory.glob("*.pem"))
+        for old in pem_files[:max(0, len(pem_files) - self.retained)]:
+            old.unlink(missing_ok=True)
+        self._reload()
+        logger.info(f"Nova chave de assinatura JWT ativa: kid={kid} ({self.algorithm})")
+        return kid
+
+    def rotate(self) -> str:
+        """Gera uma nova chave ativa; as anteriores continuam válidas para verificação."""
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            return self._rotate_locked()
+
+    def encode(self, payload: Dict[str, Any]) -> str:
+        self._ensure_loaded()
+        kid = self._active_kid
+        return jwt.encode(payload, self._private_keys[kid], algorithm=self.algorithm, headers={"kid": kid})
+
+    def decode(self, token: str, **kwargs) -> Dict[str, Any]:
+        kid = jwt.get_unverified_header(token).get("kid")
+        public_key = self._public_keys.get(kid)
+        if public_key is None:
+            # Pode ser uma chave criada por outro worker após o último carregamento
+            self._ensure_loaded()
+            public_key = self._public_keys.get(kid)
+            if public_key is None:
+                raise jwt.InvalidTokenError(f"kid desconhecido: {kid}")
+        return jwt.decode(token, public_key, algorithms=[self.algorithm], **kwargs)
+
+    def jwks(self) -> Dict[str, Any]:
+        self._ensure_loaded()
+        return self._jwks
+
+
+_keyring: Optional[KeyRing] = None
+
+
+def get_keyring() -> Optional[KeyRing]:
+    """Retorna o key ring configurado, ou None quando o algoritmo é simétrico (HS256)."""
+    global _keyring
+    if settings.JWT_ALGORITHM in SYMMETRIC_ALGORITHMS:
+        return None
+    if _keyring is None:
+        _keyring = KeyRing(settings.JWT_KEYS_DIR, settings.JWT_ALGORITHM, settings.JWT_KEYS_RETAINED)
+    return _keyring
+
+
+def encode_token(payload: Dict[str, Any]) -> str:
+    """Assina um JWT com a chave ativa (ou com SECRET_KEY em modo HS256)."""
+    keyring = get_keyring()
+    if keyring is None:
+        return jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+    return keyring.encode(payload)
+
+
+def decode_token(token: str, **kwargs) -> Dict[str, Any]:
+    """Verifica e decodifica um JWT usando a chave pública indicada pelo `kid`."""
+    keyring = get_keyring()
+    if keyring is None:
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.JWT_ALGORITHM], **kwargs)
+    return keyring.decode(token, **kwargs)
+
+
+def get_jwks() -> Dict[str, Any]:
+    keyring = get_keyring()
+    return keyring.jwks() if keyring else {"keys": []}
@@ -0,0 +1,168 @@
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from app.config import settings
+
+
+class _Contador:
+    """Falhas de uma chave em janela deslizante aproximada (janela atual + anterior ponderada)."""
+
+    __slots__ = ("inicio", "atual", "anterior", "bloqueado_ate", "nivel", "visto")
+
+    def __init__(self, agora: float):
+        self.inicio = agora
+        self.atual = 0
+        self.anterior = 0
+        self.bloqueado_ate = 0.0
+        self.nivel = 0
+        self.visto = agora
+
+    def _avancar(self, agora: float, janela: float) -> None:
+        decorridas = int((agora - self.inicio) // janela)
+        if decorridas >= 1:
+            self.anterior = self.atual if decorridas == 1 else 0
+            self.atual = 0
+            self.inicio += decorridas * janela
+
+    def falhas(self, agora: float, janela: float) -> float:
+        self._avancar(agora, janela)
+        peso_anterior = 1.0 - (agora - self.inicio) / janela
+        return self.atual + self.anterior * peso_anterior
+
+
+class LoginGuard:
+    """
+    Proteção do login contra força bruta, consultada antes da verificação bcrypt.
+
+    Mantém, por usuário e por IP, contadores de falhas em janela deslizante (dois baldes
+    por chave, O(1) por tentativa). Ao atingir o limite a chave fica bloqueada por
+    `bloqueio_base * 2^n` segundos (até `bloqueio_max`), crescendo a cada novo bloqueio
+    enquanto a chave não expirar. Chaves sem atividade por duas janelas são descartadas, e
+    o total de chaves é limitado a `max_chaves` (as mais antigas saem primeiro).
+
+    Chaves bloqueadas ficam à parte, fora da ordem de descarte: do contrário bastaria inundar
+    o guard com chaves novas para liberar o alvo. Um heap por `bloqueado_ate` devolve cada uma
+    à ordem normal quando o bloqueio termina, sem varrer as demais, e `max_bloqueadas` limita
+    quantas ficam retidas (excedido o limite, é liberada a que terminaria primeiro). Um login
+    bem-sucedido zera o contador do usuário, mas não o do IP.
+    """
+
+    def __init__(
+        self,
+        janela: float,
+        max_falhas_usuario: int,
+        max_falhas_ip: int,
+        bloqueio_base: float,
+        bloqueio_max: float,
+        max_chaves: int = 100_000,
+        max_bloqueadas: int = 100_000,
+        relogio: Callable[[], float] = time.monotonic,
+    ):
+        self.janela = janela
+        self.max_falhas_usuario = max_falhas_usuario
+        self.max_falhas_ip = max_falhas_ip
+        self.bloqueio_base = bloqueio_base
+        self.bloqueio_max = bloqueio_max
+        self.max_chaves = max_chaves
+        self.max_bloqueadas = max_bloqueadas
+        self._relogio = relogio
+        self._lock = threading.Lock()
+        # Chaves fora de bloqueio, ordenadas do menos para o mais recentemente visto
+        self._contadores: "OrderedDict[Hashable, _Contador]" = OrderedDict()
+        self._bloqueados: Dict[Hashable, _Contador] = {}
+        # (bloqueado_ate, sequência, chave); entradas que não batem mais com o contador são ignoradas
+        self._fim_bloqueio: List[Tuple[float, int, Hashable]] = []
+        self._sequencia = 0
+
+    def _liberar_proximo(self) -> None:
+        """Devolve à ordem de descarte a chave bloqueada cujo bloqueio termina primeiro."""
+        while self._fim_bloqueio:
+            ate, _, chave = heapq.heappop(self._fim_bloqueio)
+            contador = self._bloqueados.get(chave)
+            if contador is not None and contador.bloqueado_ate == ate:
+                del self._bloqueados[chave]
+                # Mantém o nível: um novo bloqueio logo em seguida continua progressivo
+                self._contadores[chave] = contador
+                return
+
+    def _expirar(self, agora: float) -> None:
+        while self._fim_bloqueio and self._fim_bloqueio[0][0] <= agora:
+            self._liberar_proximo()
+        while len(self._bloqueados) > self.max_bloqueadas:
+            self._liberar_proximo()
+        while self._contadores:
+            chave, contador = next(iter(self._contadores.items()))
+            inativo = agora - contador.visto > 2 * self.janela
+            if not inativo and len(self._contadores) <= self.max_chaves:
+                break
+            del self._contadores[chave]
+
+    def _bloqueio(self, chave: Hashable, agora: float) -> float:
+        contador = self._bloqueados.get(chave)
+        if contador is None or contador.bloqueado_ate <= agora:
+            return 0.0
+        return contador.bloqueado_ate - agora
+
+    def bloqueio(self, username: str, ip: Optional[str]) -> float:
+        """Segundos restantes de bloqueio para a tentativa (0 = pode verificar a senha)."""
+        with self._lock:
+            agora = self._relogio()
+            self._expirar(agora)
+            restante = self._bloqueio(("usuario", username), agora)
+            if ip:
+                restante = max(restante, self._bloqueio(("ip", ip), agora))
+            return restante
+
+    def _falha(self, chave: Hashable, limite: int, agora: float) -> None:
+        contador = self._bloqueados.get(chave) or self._contadores.get(chave)
+        if contador is None:
+            contador = self._contadores[chave] = _Contador(agora)
+        elif chave in self._contadores:
+            self._contadores.move_to_end(chave)
+        contador.visto = agora
+        # Fecha a janela antes de contar: a falha pertence à janela em que ocorreu
+        contador._avancar(agora, self.janela)
+        contador.atual += 1
+        if contador.bloqueado_ate <= agora and contador.falhas(agora, self.janela) >= limite:
+            contador.bloqueado_ate = agora + min(self.bloqueio_base * 2 ** contador.nivel, self.bloqueio_max)
+            contador.nivel += 1
+            self._contadores.pop(chave, None)
+            self._bloqueados[chave] = contador
+            self._sequencia += 1
+            heapq.heappush(self._fim_bloqueio, (contador.bloqueado_ate, self._sequencia, chave))
+            # A janela recomeça: após o bloqueio, cada nova falha volta a ser contada do zero
+            contador.atual = contador.anterior = 0
+
+    def registrar_falha(self, username: str, ip: Optional[str]) -> None:
+        with self._lock:
+            agora = self._relogio()
+            self._falha(("usuario", username), self.max_falhas_usuario, agora)
+            if ip:
+                self._falha(("ip", ip), self.max_falhas_ip, agora)
+            self._expirar(agora)
+
+    def registrar_sucesso(self, username: str) -> None:
+        with self._lock:
+            self._contadores.pop(("usuario", username), None)
+            self._bloqueados.pop(("usuario", username), None)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._contadores.clear()
+            self._bloqueados.clear()
+            self._fim_bloqueio.clear()
+
+    def __len__(self) -> int:
+        return len(self._contadores) + len(self._bloqueados)
+
+
+login_guard = LoginGuard(
+    janela=settings.LOGIN_GUARD_WINDOW_SECONDS,
+    max_falhas_usuario=settings.LOGIN_GUARD_MAX_FAILURES_USER,
+    max_falhas_ip=settings.LOGIN_GUARD_MAX_FAILURES_IP,
+    bloqueio_base=settings.LOGIN_GUARD_LOCKOUT_SECONDS,
+    bloqueio_max=settings.LOGIN_GUARD_LOCKOUT_MAX_SECONDS,
+)
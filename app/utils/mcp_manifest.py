@@ -0,0 +1,338 @@
+import threading
+import logging
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import httpx
+import jsonschema
+import jwt
+import mcp.types as types
+from fastapi import HTTPException
+from pydantic import ValidationError
+from fastapi.openapi.utils import get_openapi
+
+from app.auth import decode_access_token
+from app.config import settings
+from app.utils import json_codec
+from app.utils.rbac_index import RBACIndex, get_rbac_index, get_rbac_index_async
+from app.utils.storage_io import run_io
+
+logger = logging.getLogger(__name__)
+
+# Escopo dos administradores globais, que enxergam o catálogo inteiro
+ESCOPO_GLOBAL = "*"
+# Escopo de clientes MCP sem token válido: apenas as operações públicas da API
+ESCOPO_ANONIMO = ""
+
+# Rota de execução em lote, atendida pelo próprio servidor MCP
+LOTE_PATH = "/tools/proxy/lote"
+
+# Requisitos de acesso das operações estáticas, derivados do OpenAPI
+PUBLICO = ("publico",)
+AUTENTICADO = ("autenticado",)
+Requisito = Tuple[str, ...]
+
+# Argumentos das ferramentas do catálogo, invocadas pelo proxy GET do gateway
+_INPUT_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "path": {"type": "string", "description": "Caminho relativo ao url_base da ferramenta"},
+        "query": {
+            "type": "object",
+            "description": "Parâmetros de query repassados ao backend",
+            "additionalProperties": {"type": "string"},
+        },
+    },
+    "additionalProperties": False,
+}
+
+
+def requisitos_openapi(openapi_schema: Dict[str, Any]) -> Dict[str, Requisito]:
+    """
+    Requisito de acesso de cada operação (por `operationId`): rotas sem `security` são
+    públicas; `x-papel-minimo` e `x-ferramenta` (ver `app.auth.REQUER_ADMIN`,
+    `REQUER_ADMIN_GLOBAL` e `requer_ferramenta`) restringem as demais, que por padrão
+    exigem apenas um token válido.
+    """
+    requisitos: Dict[str, Requisito] = {}
+    for operacoes in openapi_schema.get("paths", {}).values():
+        for operacao in operacoes.values():
+            if not isinstance(operacao, dict) or "operationId" not in operacao:
+                continue
+            if "x-ferramenta" in operacao:
+                requisito: Requisito = ("ferramenta", operacao["x-ferramenta"])
+            elif "x-papel-minimo" in operacao:
+                requisito = ("papel", operacao["x-papel-minimo"])
+            elif not operacao.get("security"):
+                requisito = PUBLICO
+            else:
+                requisito = AUTENTICADO
+            requisitos[operacao["operationId"]] = requisito
+    return requisitos
+
+
+def _atende(requisito: Requisito, papel: Optional[str], grupos: FrozenSet[str], index: RBACIndex) -> bool:
+    if requisito == PUBLICO:
+        return True
+    if papel is None:
+        return False
+    if requisito[0] == "papel":
+        return papel == "global_admin" or (requisito[1] == "admin" and papel == "admin")
+    if requisito[0] == "ferramenta":
+        return index.pode_usar(papel, grupos, requisito[1])
+    return True
+
+
+def _build_tool(tool_id: str, definicao: Dict[str, Any]) -> types.Tool:
+    nome = definicao.get("nome") or tool_id
+    descricao = definicao.get("descricao") or ""
+    return types.Tool(
+        name=tool_id,
+        title=nome,
+        description=f"{nome}: {descricao}" if descricao else nome,
+        inputSchema=_INPUT_SCHEMA,
+    )
+
+
+class ToolManifest:
+    """
+    Manifesto MCP das ferramentas do catálogo RBAC (`rbac["ferramentas"]`).
+
+    Cada `Tool` é gerado uma vez e reaproveitado enquanto a definição da ferramenta não
+    mudar: quando o índice RBAC é substituído, apenas as ferramentas incluídas ou alteradas
+    são regeradas e as removidas saem do manifesto. As listas por escopo de permissão
+    (papel e conjunto de grupos, `ESCOPO_GLOBAL` ou `ESCOPO_ANONIMO`) são montadas sob
+    demanda e guardadas até a próxima mudança do RBAC, de forma que um `tools/list`
+    devolve uma lista pronta. As operações estáticas da API (`static_tools`) entram nos
+    escopos que atendem ao seu requisito (`requisitos`, por nome; sem entrada, basta
+    estar autenticado).
+    """
+
+    def __init__(self, static_tools: Sequence[types.Tool] = (), requisitos: Optional[Dict[str, Requisito]] = None):
+        self.static_tools: List[types.Tool] = list(static_tools)
+        self.requisitos: Dict[str, Requisito] = dict(requisitos or {})
+        self._lock = threading.Lock()
+        self._index: Optional[RBACIndex] = None
+        # tool_id -> (definição serializada, Tool gerado)
+        self._ferramentas: Dict[str, Tuple[bytes, types.Tool]] = {}
+        self._escopos: Dict[Hashable, List[types.Tool]] = {}
+        # Total de Tools gerados desde a criação (observabilidade e testes)
+        self.geracoes = 0
+
+    def _sync(self, index: RBACIndex) -> None:
+        """Atualiza o manifesto incrementalmente para o índice informado (chamado com o lock)."""
+        if index is self._index:
+            return
+        atualizadas: Dict[str, Tuple[bytes, types.Tool]] = {}
+        for tool_id, definicao in index.ferramentas.items():
+            serializada = json_codec.dumps(definicao)
+            atual = self._ferramentas.get(tool_id)
+            if atual is not None and atual[0] == serializada:
+                atualizadas[tool_id] = atual
+            else:
+                atualizadas[tool_id] = (serializada, _build_tool(tool_id, definicao))
+                self.geracoes += 1
+        removidas = self._ferramentas.keys() - atualizadas.keys()
+        if removidas:
+            logger.debug(f"Ferramentas removidas do manifesto MCP: {sorted(removidas)}")
+        self._ferramentas = atualizadas
+        self._escopos = {}
+        self._index = index
+
+    def catalog_tool_names(self, index: Optional[RBACIndex] = None) -> FrozenSet[str]:
+        with self._lock:
+            self._sync(index or get_rbac_index())
+            return frozenset(self._ferramentas)
+
+    def tools_for(self, papel: Optional[str], grupos: Iterable[str], index: Optional[RBACIndex] = None) -> List[types.Tool]:
+        """
+        Manifesto do escopo de permissão de um usuário (`papel=None` para clientes sem
+        token): operações estáticas que ele pode chamar mais as ferramentas do catálogo
+        liberadas para seus grupos (todas, para o admin global). A lista retornada é
+        compartilhada e não deve ser alterada.
+        """
+        index = index or get_rbac_index()
+        grupos = frozenset(grupos) if papel is not None else frozenset()
+        escopo: Hashable
+        if papel == "global_admin":
+            escopo = ESCOPO_GLOBAL
+        elif papel is None:
+            escopo = ESCOPO_ANONIMO
+        else:
+            escopo = (papel, grupos)
+        with self._lock:
+            self._sync(index)
+            tools = self._escopos.get(escopo)
+            if tools is None:
+                if escopo == ESCOPO_GLOBAL:
+                    ids: Iterable[str] = self._ferramentas
+                elif papel is None:
+                    ids = ()
+                else:
+                    ids = (t for t in index.ferramentas_efetivas(sorted(grupos)) if t in self._ferramentas)
+                estaticas = [
+                    t for t in self.static_tools
+                    if _atende(self.requisitos.get(t.name, AUTENTICADO), papel, grupos, index)
+                ]
+                tools = estaticas + [self._ferramentas[t][1] for t in ids]
+                self._escopos[escopo] = tools
+            return tools
+
+
+def _request_headers(fastapi_mcp: Any) -> Dict[str, str]:
+    """Cabeçalhos da requisição HTTP da mensagem MCP em curso (vazio fora de uma requisição)."""
+    try:
+        request = fastapi_mcp.server.request_context.request
+    except LookupError:
+        return {}
+    return dict(request.headers) if request is not None else {}
+
+
+async def _authenticate(fastapi_mcp: Any) -> Optional[Dict[str, Any]]:
+    """Claims do Bearer token do cliente MCP (já reconciliadas com o RBAC); `None` sem token válido."""
+    autorizacao = _request_headers(fastapi_mcp).get("authorization", "")
+    esquema, _, token = autorizacao.partition(" ")
+    if esquema.lower() != "bearer" or not token:
+        return None
+    try:
+        return await run_io(decode_access_token, token.strip())
+    except jwt.PyJWTError:
+        return None
+
+
+def _tool_error(texto: str) -> types.ServerResult:
+    return types.ServerResult(types.CallToolResult(content=[types.TextContent(type="text", text=texto)], isError=True))
+
+
+def _progress_notifier(fastapi_mcp: Any) -> Optional[Callable[[float, Optional[float], str], Awaitable[None]]]:
+    """Envia `notifications/progress` da requisição em curso, se o cliente informou um `progressToken`."""
+    try:
+        contexto = fastapi_mcp.server.request_context
+    except LookupError:
+        return None
+    progress_token = contexto.meta.progressToken if contexto.meta else None
+    if progress_token is None:
+        return None
+
+    async def _notificar(progresso: float, total: Optional[float], mensagem: str) -> None:
+        await contexto.session.send_progress_notification(
+            progress_token, progresso, total=total, message=mensagem, related_request_id=str(contexto.request_id))
+    return _notificar
+
+
+async def _call_catalog_tool(fastapi_mcp: Any, name: str, arguments: Dict[str, Any]) -> types.ServerResult:
+    """
+    Invoca uma ferramenta do catálogo pelo proxy do gateway, com as credenciais do cliente MCP.
+
+    Respostas transmitidas pelo backend (SSE ou sem tamanho conhecido) são repassadas bloco
+    a bloco como notificações de progresso; o resultado final traz o corpo até
+    `PROXY_BUFFER_MAX_BYTES`.
+    """
+    from app.groups.proxy_routes import abrir_ferramenta
+
+    try:
+        jsonschema.validate(instance=arguments, schema=_INPUT_SCHEMA)
+    except jsonschema.ValidationError as e:
+        return _tool_error(f"Input validation error: {e.message}")
+    payload = await _authenticate(fastapi_mcp)
+    if payload is None:
+        return _tool_error("Não autenticado")
+    user = {"username": payload["sub"], "papel": payload["papel"], "grupos": payload["grupos"]}
+
+    path = str(arguments.get("path") or "").lstrip("/")
+    query = str(httpx.QueryParams(arguments.get("query") or {}))
+    try:
+        resposta = await abrir_ferramenta(name, path, query, user)
+    except HTTPException as e:
+        return _tool_error(json_codec.dumps({"detail": e.detail}).decode("utf-8"))
+
+    notificar = _progress_notifier(fastapi_mcp) if resposta.upstream is not None else None
+    partes: List[bytes] = []
+    total = 0
+    blocos = resposta.blocos()
+    try:
+        async for bloco in blocos:
+            if notificar is not None:
+                await notificar(total + len(bloco), None, bloco.decode("utf-8", errors="replace"))
+            partes.append(bloco)
+            total += len(bloco)
+            if total > settings.PROXY_BUFFER_MAX_BYTES:
+                break
+    except HTTPException as e:
+        # Falha do backend no meio da transmissão: o corpo parcial não é devolvido como resultado
+        return _tool_error(json_codec.dumps({"detail": e.detail}).decode("utf-8"))
+    finally:
+        await blocos.aclose()
+        await resposta.fechar()
+    corpo = b"".join(partes)[:settings.PROXY_BUFFER_MAX_BYTES]
+    return types.ServerResult(types.CallToolResult(
+        content=[types.TextContent(type="text", text=corpo.decode("utf-8", errors="replace"))],
+        isError=resposta.status_code >= 400,
+    ))
+
+
+async def _call_batch(fastapi_mcp: Any, arguments: Dict[str, Any]) -> types.ServerResult:
+    """
+    Executa `POST /tools/proxy/lote` dentro do servidor MCP: cada resultado é enviado como
+    notificação de progresso assim que fica pronto (quando o cliente informa um
+    `progressToken`) e a resposta final traz um item de conteúdo por chamada, em ordem.
+    """
+    from app.groups.proxy_routes import LoteRequest, executar_lote
+
+    try:
+        lote = LoteRequest.model_validate(arguments)
+    except ValidationError as e:
+        return _tool_error(f"Input validation error: {e}")
+    if len(lote.chamadas) > settings.PROXY_BATCH_MAX_CALLS:
+        return _tool_error(f"Máximo de {settings.PROXY_BATCH_MAX_CALLS} chamadas por lote.")
+    payload = await _authenticate(fastapi_mcp)
+    if payload is None:
+        return _tool_error("Não autenticado")
+    user = {"username": payload["sub"], "papel": payload["papel"], "grupos": payload["grupos"]}
+
+    notificar = _progress_notifier(fastapi_mcp)
+    resultados: List[Dict[str, Any]] = []
+    async for resultado in executar_lote(lote.chamadas, user):
+        resultados.append(resultado)
+        if notificar is not None:
+            await notificar(len(resultados), len(lote.chamadas), json_codec.dumps(resultado).decode("utf-8"))
+    resultados.sort(key=lambda r: r["indice"])
+    return types.ServerResult(types.CallToolResult(
+        content=[types.TextContent(type="text", text=json_codec.dumps(r).decode("utf-8")) for r in resultados],
+        isError=all(r["status"] >= 400 for r in resultados),
+    ))
+
+
+def install_tool_manifest(fastapi_mcp: Any) -> ToolManifest:
+    """
+    Liga o manifesto ao servidor MCP de um `FastApiMCP`.
+
+    `tools/list` passa a devolver o manifesto em cache do escopo de quem chama (operações
+    da API e ferramentas do catálogo RBAC que o token permite usar) e `tools/call` de uma
+    ferramenta do catálogo é encaminhado ao proxy `GET /tools/proxy/{tool_id}/...`; as
+    demais chamadas seguem para o handler original, exceto o lote (`POST /tools/proxy/lote`),
+    executado diretamente para que cada resultado seja notificado assim que termina.
+    """
+    app = fastapi_mcp.fastapi
+    openapi_schema = get_openapi(title=app.title, version=app.version, routes=app.routes)
+    manifest = ToolManifest(fastapi_mcp.tools, requisitos_openapi(openapi_schema))
+    server = fastapi_mcp.server
+    call_original = server.request_handlers[types.CallToolRequest]
+
+    @server.list_tools()
+    async def _listar_ferramentas() -> List[types.Tool]:
+        payload = await _authenticate(fastapi_mcp)
+        index = await get_rbac_index_async()
+        if payload is None:
+            return manifest.tools_for(None, (), index)
+        return manifest.tools_for(payload["papel"], payload["grupos"], index)
+
+    async def _chamar_ferramenta(req: types.CallToolRequest) -> types.ServerResult:
+        nome = req.params.name
+        if fastapi_mcp.operation_map.get(nome, {}).get("path") == LOTE_PATH:
+            return await _call_batch(fastapi_mcp, req.params.arguments or {})
+        if nome not in fastapi_mcp.operation_map and nome in manifest.catalog_tool_names(await get_rbac_index_async()):
+            return await _call_catalog_tool(fastapi_mcp, nome, req.params.arguments or {})
+        return await call_original(req)
+
+    server.request_handlers[types.CallToolRequest] = _chamar_ferramenta
+    return manifest
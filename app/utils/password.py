@@ -1,10 +1,96 @@
 import bcrypt
-import json
+import math
+import threading
+import time
 from pathlib import Path
 import logging
+from typing import Any, Dict, Optional
+
+from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Custo usado na medição da calibração: barato o bastante para a inicialização,
+# caro o bastante para a medida não ser dominada por ruído
+_CUSTO_AMOSTRA = 8
+_AMOSTRAS = 3
+
+_lock = threading.Lock()
+_bcrypt: Dict[str, Any] = {"custo": None, "origem": None, "medido_ms": None, "rehashes": 0}
+
+
+def _medir_ms(custo: int, amostras: int = 1) -> float:
+    """Menor tempo, em ms, de um bcrypt com o custo dado neste host."""
+    salt = bcrypt.gensalt(rounds=custo)
+    melhor = math.inf
+    for _ in range(amostras):
+        inicio = time.perf_counter()
+        bcrypt.hashpw(b"calibracao-bcrypt", salt)
+        melhor = min(melhor, (time.perf_counter() - inicio) * 1000)
+    return melhor
+
+
+def calibrar_custo_bcrypt(alvo_ms: float, minimo: int, maximo: int) -> int:
+    """
+    Maior custo bcrypt cujo hash leva até `alvo_ms` neste host, limitado a [minimo, maximo].
+
+    Mede o custo de amostra e extrapola (cada unidade de custo dobra o tempo), evitando
+    pagar na inicialização o tempo de todos os custos intermediários.
+    """
+    amostra_ms = max(_medir_ms(_CUSTO_AMOSTRA, _AMOSTRAS), 1e-3)
+    custo = _CUSTO_AMOSTRA + math.floor(math.log2(alvo_ms / amostra_ms))
+    return max(minimo, min(maximo, custo))
+
+
+def bcrypt_rounds() -> int:
+    """
+    Custo bcrypt dos novos hashes.
+
+    Com `BCRYPT_ROUNDS` fixo, usa o valor configurado; com `auto`, calibra na primeira
+    chamada (a inicialização da aplicação já a faz) para que um hash leve cerca de
+    `BCRYPT_TARGET_MS` no host, de modo que o login tenha latência parecida em toda a frota.
+    """
+    with _lock:
+        if _bcrypt["custo"] is None:
+            if settings.BCRYPT_ROUNDS is not None:
+                _bcrypt["custo"], _bcrypt["origem"] = settings.BCRYPT_ROUNDS, "configurado"
+            else:
+                _bcrypt["custo"] = calibrar_custo_bcrypt(settings.BCRYPT_TARGET_MS, settings.BCRYPT_MIN_ROUNDS, settings.BCRYPT_MAX_ROUNDS)
+                _bcrypt["origem"] = "calibrado"
+            _bcrypt["medido_ms"] = round(_medir_ms(_bcrypt["custo"]), 1)
+            logger.info(f"Custo bcrypt {_bcrypt['origem']}: {_bcrypt['custo']} ({_bcrypt['medido_ms']} ms por hash neste host)")
+        return _bcrypt["custo"]
+
+
+def bcrypt_stats() -> Dict[str, Any]:
+    custo = bcrypt_rounds()
+    return {
+        "custo": custo,
+        "origem": _bcrypt["origem"],
+        "alvo_ms": settings.BCRYPT_TARGET_MS,
+        "medido_ms": _bcrypt["medido_ms"],
+        "rehashes": _bcrypt["rehashes"],
+    }
+
+
+def custo_do_hash(stored_password: str) -> Optional[int]:
+    """Custo de um hash bcrypt armazenado (`$2b$12$...` -> 12); `None` se não for bcrypt."""
+    partes = stored_password.split("$")
+    if len(partes) < 4 or not partes[1].startswith("2") or not partes[2].isdigit():
+        return None
+    return int(partes[2])
+
+
+def precisa_rehash(stored_password: str) -> bool:
+    """
+    Se a senha armazenada deve ser refeita no próximo login: texto plano (legado) ou custo
+    abaixo do atual. Hashes mais caros são mantidos: com custos calibrados por host, refazê-los
+    para baixo enfraqueceria a senha e faria workers diferentes se alternarem refazendo o hash.
+    """
+    custo = custo_do_hash(stored_password)
+    return custo is None or custo < bcrypt_rounds()
+
+
 def hash_password(password: str) -> str:
     """
     Cria um hash da senha usando bcrypt.
@@ -16,52 +102,86 @@ def hash_password(password: str) -> str:
         str: O hash da senha como string codificada em UTF-8
     """
     # Gera um hash usando bcrypt (salt é gerado automaticamente e embutido no hash resultante)
-    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=bcrypt_rounds()))
     return hashed.decode('utf-8')  # Retorna como string em vez de bytes
 
+
+def rehash_password(username: str, password: str, stored_password: str) -> bool:
+    """
+    Regrava a senha de `username` com o custo atual, após um login que a validou.
+
+    A troca só acontece se a senha armazenada ainda for `stored_password` (uma alteração
+    concorrente prevalece). Falhas são registradas e não afetam o login.
+
+    Returns:
+        bool: True se o hash foi regravado
+    """
+    from app.utils.rbac_store import update_rbac, NoChange
+
+    novo = hash_password(password)
+
+    def _regravar(rbac):
+        user_data = rbac.get("usuarios", {}).get(username)
+        if not user_data or user_data.get("senha") != stored_password:
+            return NoChange(False)
+        user_data["senha"] = novo
+        return True
+
+    try:
+        regravado = update_rbac(_regravar)
+    except Exception as e:
+        logger.error(f"Erro ao refazer o hash da senha de '{username}': {e}", exc_info=True)
+        return False
+    if regravado:
+        with _lock:
+            _bcrypt["rehashes"] += 1
+        logger.info(f"Hash da senha de '{username}' refeito com custo {custo_do_hash(novo)}")
+    return regravado
+
 def migrate_rbac_passwords(rbac_file: str, backup: bool = True):
     """
     Migra todas as senhas em texto plano no arquivo RBAC para hashes bcrypt.
     
     Args:
         rbac_file: Caminho para o arquivo RBAC JSON
-        backup: Se deve criar uma cópia de backup do arquivo original
+        backup: Se deve registrar um snapshot do estado anterior no log de alterações
+                (o estado pré-migração também pode ser obtido por replay até o instante da migração)
         
     Returns:
         bool: True se a migração foi bem-sucedida, False caso contrário
     """
+    from app.utils.rbac_store import update_rbac, NoChange
+    from app.utils.rbac_wal import checkpoint
+    from app.utils.dependencies import get_rbac_data
+
     try:
-        # Carregar dados RBAC
         rbac_path = Path(rbac_file)
         
         if not rbac_path.exists():
             logger.error(f"Arquivo RBAC não encontrado: {rbac_file}")
             return False
-            
+
+        rbac_data = get_rbac_data(str(rbac_path))
         if backup:
-            # Cria backup
-            import shutil
-            backup_path = rbac_path.with_suffix(f"{rbac_path.suffix}.bak")
-            shutil.copy2(rbac_path, backup_path)
-            logger.info(f"Backup criado em: {backup_path}")
-        
-        # Carrega o arquivo JSON
-        with open(rbac_path, 'r', encoding='utf-8') as f:
-            rbac_data = json.load(f)
-        
-        # Atualiza as senhas
-        usuarios_modificados = 0
-        for username, user_data in rbac_data.get("usuarios", {}).items():
-            if "senha" in user_data and not user_data["senha"].startswith("$2"):
-                # Senha em texto plano, criar hash
-                clear_password = user_data["senha"]
-                hashed_password = hash_password(clear_password)
-                user_data["senha"] = hashed_password
-                usuarios_modificados += 1
-        
-        # Salva o arquivo atualizado
-        with open(rbac_path, 'w', encoding='utf-8') as f:
-            json.dump(rbac_data, f, indent=2, ensure_ascii=False)
+            checkpoint(str(rbac_path), rbac_data)
+            logger.info(f"Snapshot pré-migração registrado na versão {rbac_data.get('versao', 0)}")
+
+        # Hashes calculados fora da mutação para não repetir o bcrypt em caso de conflito de versão
+        hashes = {
+            username: hash_password(user_data["senha"])
+            for username, user_data in rbac_data.get("usuarios", {}).items()
+            if "senha" in user_data and not user_data["senha"].startswith("$2")
+        }
+
+        def _migrar(rbac):
+            usuarios_modificados = 0
+            for username, user_data in rbac.get("usuarios", {}).items():
+                if username in hashes and user_data.get("senha") == rbac_data["usuarios"][username]["senha"]:
+                    user_data["senha"] = hashes[username]
+                    usuarios_modificados += 1
+            return usuarios_modificados if usuarios_modificados else NoChange(0)
+
+        usuarios_modificados = update_rbac(_migrar, rbac_file=str(rbac_path))
         
         logger.info(f"Migração concluída: {usuarios_modificados} senhas convertidas para hash bcrypt")
         return True
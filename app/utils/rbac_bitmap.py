@@ -0,0 +1,142 @@
+import sys
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+
+def deep_sizeof(obj: Any, _seen: Optional[set] = None) -> int:
+    """Tamanho aproximado em bytes de um objeto e de tudo o que ele referencia (containers padrão)."""
+    seen = _seen if _seen is not None else set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, Mapping):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    return size
+
+
+class PermissionMatrix:
+    """
+    Representação compacta das relações usuário×grupo e grupo×ferramenta.
+
+    Usuários, grupos e ferramentas são internados em IDs inteiros e cada relação é um
+    bitmap (inteiro Python de precisão arbitrária, em que o bit `i` indica o ID `i`).
+    As ferramentas efetivas de um conjunto de grupos são um OR bit a bit dos bitmaps dos
+    grupos, e a checagem de permissão é um teste de bit.
+    """
+
+    def __init__(self,
+                 ferramentas_por_grupo: Mapping[str, Iterable[str]],
+                 grupos_por_usuario: Mapping[str, Iterable[str]],
+                 catalogo: Iterable[str] = ()):
+        # Ferramentas do catálogo primeiro, para que a ordem dos bits siga a do rbac.json
+        self.tool_ids: Dict[str, int] = {}
+        self.tool_names: List[str] = []
+        for nome in catalogo:
+            self._intern_tool(nome)
+
+        self.group_ids: Dict[str, int] = {}
+        self.group_names: List[str] = []
+        self.group_tools: List[int] = []
+        for grupo, ferramentas in ferramentas_por_grupo.items():
+            bitmap = 0
+            for nome in ferramentas:
+                bitmap |= 1 << self._intern_tool(nome)
+            self.group_ids[grupo] = len(self.group_tools)
+            self.group_names.append(grupo)
+            self.group_tools.append(bitmap)
+
+        # Grupos inexistentes no rbac.json não têm ID e ficam fora do bitmap do usuário
+        self.user_ids: Dict[str, int] = {}
+        self.user_groups: List[int] = []
+        for usuario, grupos in grupos_por_usuario.items():
+            bitmap = 0
+            for grupo in grupos:
+                gid = self.group_ids.get(grupo)
+                if gid is not None:
+                    bitmap |= 1 << gid
+            self.user_ids[usuario] = len(self.user_groups)
+            self.user_groups.append(bitmap)
+
+    def _intern_tool(self, nome: str) -> int:
+        tid = self.tool_ids.get(nome)
+        if tid is None:
+            tid = self.tool_ids[nome] = len(self.tool_names)
+            self.tool_names.append(nome)
+        return tid
+
+    def tools_bitmap(self, grupos: Iterable[str]) -> int:
+        """OR dos bitmaps de ferramentas dos grupos informados."""
+        bitmap = 0
+        for grupo in grupos:
+            gid = self.group_ids.get(grupo)
+            if gid is not None:
+                bitmap |= self.group_tools[gid]
+        return bitmap
+
+    def user_tools_bitmap(self, usuario: str) -> int:
+        """Ferramentas efetivas de um usuário, percorrendo apenas os bits do seu bitmap de grupos."""
+        uid = self.user_ids.get(usuario)
+        if uid is None:
+            return 0
+        groups, bitmap = self.user_groups[uid], 0
+        while groups:
+            low = groups & -groups
+            bitmap |= self.group_tools[low.bit_length() - 1]
+            groups ^= low
+        return bitmap
+
+    def user_group_names(self, usuario: str) -> List[str]:
+        """Grupos (existentes) de um usuário, em ordem de ID."""
+        uid = self.user_ids.get(usuario)
+        groups, nomes = (self.user_groups[uid] if uid is not None else 0), []
+        while groups:
+            low = groups & -groups
+            nomes.append(self.group_names[low.bit_length() - 1])
+            groups ^= low
+        return nomes
+
+    def user_in_group(self, usuario: str, grupo: str) -> bool:
+        uid, gid = self.user_ids.get(usuario), self.group_ids.get(grupo)
+        return uid is not None and gid is not None and bool(self.user_groups[uid] >> gid & 1)
+
+    def user_can_use(self, usuario: str, ferramenta: str) -> bool:
+        tid = self.tool_ids.get(ferramenta)
+        return tid is not None and bool(self.user_tools_bitmap(usuario) >> tid & 1)
+
+    def can_use(self, grupos: Iterable[str], ferramenta: str) -> bool:
+        tid = self.tool_ids.get(ferramenta)
+        if tid is None:
+            return False
+        return bool(self.tools_bitmap(grupos) >> tid & 1)
+
+    def tool_names_for(self, bitmap: int) -> List[str]:
+        """Nomes das ferramentas de um bitmap, em ordem de ID."""
+        nomes = []
+        while bitmap:
+            low = bitmap & -bitmap
+            nomes.append(self.tool_names[low.bit_length() - 1])
+            bitmap ^= low
+        return nomes
+
+    def tool_names_by_group(self, grupos: Iterable[str], mascara: int = -1) -> List[str]:
+        """Nomes das ferramentas dos grupos (limitadas a `mascara`) na ordem dos grupos, sem repetição."""
+        nomes, vistas = [], 0
+        for grupo in grupos:
+            gid = self.group_ids.get(grupo)
+            if gid is not None:
+                novas = self.group_tools[gid] & mascara & ~vistas
+                vistas |= novas
+                nomes.extend(self.tool_names_for(novas))
+        return nomes
+
+    def memory_report(self) -> Dict[str, int]:
+        """Bytes ocupados por estrutura (tabelas de internação e bitmaps)."""
+        return {
+            "ids_ferramentas": deep_sizeof(self.tool_ids) + deep_sizeof(self.tool_names),
+            "ids_grupos": deep_sizeof(self.group_ids) + deep_sizeof(self.group_names),
+            "ids_usuarios": deep_sizeof(self.user_ids),
+            "bitmap_grupo_ferramenta": deep_sizeof(self.group_tools),
+            "bitmap_usuario_grupo": deep_sizeof(self.user_groups),
+        }
@@ -0,0 +1,236 @@
+import threading
+import logging
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Iterable, List, Optional, Tuple, TypeVar
+
+from app.config import settings
+from app.utils.dependencies import get_rbac_data
+from app.utils.rbac_bitmap import PermissionMatrix, deep_sizeof
+from app.utils.rbac_store import _file_signature, get_rbac_version
+from app.utils.single_flight import SingleFlight
+from app.utils.storage_io import run_io
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+_index_lock = threading.Lock()
+
+# Reconstruções concorrentes da mesma versão do arquivo compartilham uma única leitura
+_reload_flight = SingleFlight()
+
+# Índice atual por arquivo RBAC: caminho -> (assinatura do arquivo, índice)
+_index_cache: Dict[str, Tuple[Tuple[int, int, int], "RBACIndex"]] = {}
+
+# Limite de respostas pré-serializadas por versão do índice (ex.: um item por conjunto de grupos distinto)
+MAX_CACHED_RESPONSES = 4096
+
+
+def permission_epoch(papel: str, grupos: Iterable[str]) -> int:
+    """
+    Época de permissões de um usuário: muda sempre que seu papel ou seus grupos mudam.
+
+    É derivada do próprio estado (CRC32 estável entre processos), então não exige escrita
+    extra no rbac.json e acompanha também alterações feitas fora da aplicação.
+    """
+    return zlib.crc32(f"{papel}|{','.join(sorted(grupos))}".encode('utf-8'))
+
+
+class RBACIndex:
+    """
+    Índices em memória derivados de um estado RBAC, usados nas checagens do caminho quente.
+
+    É construído uma vez por versão do arquivo e tratado como imutável: consultas de
+    permissão não releem nem percorrem o JSON, apenas acessam dicionários e conjuntos.
+    Com `use_bitmap` (ou `RBAC_BITMAP_INDEX=true`) as relações usuário×grupo e
+    grupo×ferramenta ficam apenas na `PermissionMatrix`, com IDs internados e bitmaps, no
+    lugar dos conjuntos por usuário e das tuplas e conjuntos por grupo; as ferramentas
+    efetivas de um usuário saem do OR dos bitmaps dos seus grupos. Indicada para bases com
+    muitos usuários, grupos e ferramentas.
+    """
+
+    def __init__(self, rbac: Dict[str, Any], use_bitmap: Optional[bool] = None):
+        self.versao = get_rbac_version(rbac)
+        if use_bitmap is None:
+            use_bitmap = settings.RBAC_BITMAP_INDEX
+        self.ferramentas: Dict[str, Dict[str, Any]] = dict(rbac.get("ferramentas", {}))
+        # grupo -> ferramentas liberadas (ordem do JSON preservada para as listagens)
+        self._ferramentas_ordenadas: Dict[str, Tuple[str, ...]] = {}
+        self.ferramentas_por_grupo: Dict[str, FrozenSet[str]] = {}
+        self.matriz: Optional[PermissionMatrix] = None
+        grupos_rbac = rbac.get("grupos", {})
+        usuarios_rbac = rbac.get("usuarios", {})
+        if use_bitmap:
+            self.matriz = PermissionMatrix(
+                {nome: dados.get("ferramentas", []) for nome, dados in grupos_rbac.items()},
+                {nome: dados.get("grupos", []) for nome, dados in usuarios_rbac.items()},
+                self.ferramentas
+            )
+        else:
+            self._ferramentas_ordenadas = {
+                nome: tuple(dados.get("ferramentas", [])) for nome, dados in grupos_rbac.items()
+            }
+            self.ferramentas_por_grupo = {
+                nome: frozenset(ferramentas) for nome, ferramentas in self._ferramentas_ordenadas.items()
+            }
+        # usuário -> (papel, grupos); senhas não entram no índice
+        self.usuarios: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+            nome: (dados.get("papel", "user"), tuple(dados.get("grupos", [])))
+            for nome, dados in rbac.get("usuarios", {}).items()
+        }
+        self._grupos_por_usuario: Dict[str, FrozenSet[str]] = {}
+        if self.matriz is None:
+            self._grupos_por_usuario = {
+                nome: frozenset(grupos) for nome, (_, grupos) in self.usuarios.items()
+            }
+        # usuário -> época de permissões, comparada com o claim `pe` do token
+        self.epocas: Dict[str, int] = {
+            nome: permission_epoch(papel, grupos) for nome, (papel, grupos) in self.usuarios.items()
+        }
+        # grupo -> administradores e o índice reverso usuário -> grupos administrados
+        self.admins_por_grupo: Dict[str, FrozenSet[str]] = {
+            nome: frozenset(dados.get("admins", []))
+            for nome, dados in rbac.get("grupos", {}).items()
+        }
+        administrados: Dict[str, set] = {}
+        for nome, admins in self.admins_por_grupo.items():
+            for admin in admins:
+                administrados.setdefault(admin, set()).add(nome)
+        self.grupos_administrados: Dict[str, FrozenSet[str]] = {
+            admin: frozenset(grupos) for admin, grupos in administrados.items()
+        }
+        # Corpos de resposta já serializados, válidos enquanto este índice for o atual
+        self._respostas: Dict[Hashable, bytes] = {}
+
+    def ferramentas_permitidas(self, grupos: Iterable[str]) -> FrozenSet[str]:
+        """União das ferramentas liberadas para os grupos informados."""
+        if self.matriz is not None:
+            return frozenset(self.matriz.tool_names_for(self.matriz.tools_bitmap(grupos)))
+        permitidas: FrozenSet[str] = frozenset()
+        for g in grupos:
+            permitidas = permitidas | self.ferramentas_por_grupo.get(g, frozenset())
+        return permitidas
+
+    def ferramentas_efetivas(self, grupos: Iterable[str]) -> List[str]:
+        """
+        Ferramentas dos grupos, sem repetição. Sem a matriz, seguem a ordem dos grupos e das
+        listas de cada grupo; com a matriz, a ordem do catálogo de ferramentas.
+        """
+        if self.matriz is not None:
+            return self.matriz.tool_names_for(self.matriz.tools_bitmap(grupos))
+        vistas: Dict[str, None] = {}
+        for g in grupos:
+            for ferramenta in self._ferramentas_ordenadas.get(g, ()):
+                vistas.setdefault(ferramenta, None)
+        return list(vistas)
+
+    def existe_grupo(self, grupo: str) -> bool:
+        return grupo in self.admins_por_grupo
+
+    def grupos_do_usuario(self, username: str) -> FrozenSet[str]:
+        if self.matriz is not None:
+            return frozenset(self.matriz.user_group_names(username))
+        return self._grupos_por_usuario.get(username, frozenset())
+
+    def pertence(self, username: str, grupo: str) -> bool:
+        if self.matriz is not None:
+            return self.matriz.user_in_group(username, grupo)
+        return grupo in self._grupos_por_usuario.get(username, ())
+
+    def ferramentas_do_usuario(self, username: str, grupos: Iterable[str]) -> List[str]:
+        """
+        Ferramentas efetivas de um usuário autenticado, na ordem de `grupos`. Eles são os do
+        token, iguais aos do índice (a época do token já foi conferida); com a matriz, o bitmap
+        de grupos do próprio usuário decide quais ferramentas entram.
+        """
+        if self.matriz is not None and username in self.matriz.user_ids:
+            return self.matriz.tool_names_by_group(grupos, self.matriz.user_tools_bitmap(username))
+        return self.ferramentas_efetivas(grupos)
+
+    def administra(self, username: str, grupo: str) -> bool:
+        return username in self.admins_por_grupo.get(grupo, ())
+
+    def pode_usar(self, papel: str, grupos: Iterable[str], ferramenta: str) -> bool:
+        """Mesma regra de `has_permission`: admin global acessa tudo; demais, via grupos."""
+        if papel == "global_admin":
+            return True
+        if self.matriz is not None:
+            return self.matriz.can_use(grupos, ferramenta)
+        return any(ferramenta in self.ferramentas_por_grupo.get(g, ()) for g in grupos)
+
+    def usuario_pode_usar(self, user: Dict[str, Any], ferramenta: str) -> bool:
+        """`pode_usar` para o usuário autenticado (ver `ferramentas_do_usuario`)."""
+        if user["papel"] == "global_admin":
+            return True
+        if self.matriz is not None and user.get("username") in self.matriz.user_ids:
+            return self.matriz.user_can_use(user["username"], ferramenta)
+        return self.pode_usar(user["papel"], user["grupos"], ferramenta)
+
+    def cached_response(self, chave: Hashable, build: Callable[[], T]) -> T:
+        """
+        Retorna o corpo de resposta pré-serializado (ou os fragmentos dele) para `chave`,
+        gerando-o na primeira vez.
+
+        Como o índice é substituído quando o RBAC muda, o cache é invalidado junto com ele.
+        """
+        corpo = self._respostas.get(chave)
+        if corpo is None:
+            corpo = build()
+            if len(self._respostas) >= MAX_CACHED_RESPONSES:
+                self._respostas.clear()
+            self._respostas[chave] = corpo
+        return corpo
+
+    def memory_report(self) -> Dict[str, Any]:
+        """Bytes ocupados por estrutura do índice (e da matriz de bitmaps, se habilitada)."""
+        relatorio: Dict[str, Any] = {
+            "ferramentas_por_grupo": deep_sizeof(self.ferramentas_por_grupo) + deep_sizeof(self._ferramentas_ordenadas),
+            "usuarios": deep_sizeof(self.usuarios) + deep_sizeof(self._grupos_por_usuario),
+            "epocas": deep_sizeof(self.epocas),
+            "admins": deep_sizeof(self.admins_por_grupo) + deep_sizeof(self.grupos_administrados),
+            "catalogo_ferramentas": deep_sizeof(self.ferramentas),
+            "respostas_serializadas": deep_sizeof(self._respostas),
+        }
+        if self.matriz is not None:
+            relatorio["matriz"] = self.matriz.memory_report()
+        return relatorio
+
+
+def get_rbac_index(rbac_file: Optional[str] = None) -> RBACIndex:
+    """
+    Retorna o índice do arquivo RBAC, reconstruindo-o apenas quando o arquivo muda.
+
+    A validade é verificada pela assinatura do arquivo (inode, tamanho, mtime), de forma
+    que escritas de outros workers ou edições externas são percebidas com um único `stat`.
+    Requisições simultâneas que encontram o índice desatualizado aguardam uma única
+    reconstrução em vez de cada uma reler o JSON.
+    """
+    path = Path(rbac_file or settings.RBAC_FILE)
+    key = str(path)
+    try:
+        signature = _file_signature(path)
+    except FileNotFoundError:
+        signature = None
+    cached = _index_cache.get(key)
+    if cached and signature is not None and cached[0] == signature:
+        return cached[1]
+    # get_rbac_data trata arquivo ausente/corrompido (inclusive recuperação pelo log)
+    index = _reload_flight.do((key, signature), lambda: RBACIndex(get_rbac_data(key)))
+    with _index_lock:
+        cached = _index_cache.get(key)
+        if not (cached and cached[1] is index):
+            # A assinatura lida antes do JSON garante que uma escrita concorrente force nova reconstrução
+            _index_cache[key] = (signature or _file_signature(path), index)
+            logger.debug(f"Índice RBAC reconstruído para {path} (versão {index.versao})")
+    return index
+
+
+async def get_rbac_index_async(rbac_file: Optional[str] = None) -> RBACIndex:
+    """
+    Variante de `get_rbac_index` para handlers `async def`.
+
+    O `stat` e, quando o arquivo mudou (escrita deste ou de outro worker), a releitura e a
+    reconstrução rodam no pool de I/O, de forma que um volume lento não trava o event loop.
+    """
+    return await run_io(get_rbac_index, rbac_file)
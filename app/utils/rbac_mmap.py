@@ -0,0 +1,199 @@
+import mmap
+import os
+import struct
+import threading
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.config import settings
+from app.utils import json_codec
+from app.utils.dependencies import get_rbac_data
+from app.utils.rbac_store import _file_signature, get_rbac_version
+from app.utils.storage_io import run_io
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"RBACIDX1"
+# magic, assinatura do rbac.json de origem (inode, tamanho, mtime_ns), versão, nº de usuários, nº de grupos
+_HEADER = struct.Struct("<8sQQQqII")
+# offset e tamanho da chave, offset e tamanho do registro (JSON do usuário/grupo)
+_ENTRY = struct.Struct("<QIQI")
+
+_readers_lock = threading.Lock()
+_readers: Dict[str, "RBACMmapReader"] = {}
+
+
+def sidecar_path(rbac_file: Optional[str] = None) -> Path:
+    """Arquivo de índice binário mantido ao lado do rbac.json (ex.: data/rbac.json.idx)."""
+    path = Path(rbac_file or settings.RBAC_FILE)
+    return path.with_name(f"{path.name}.idx")
+
+
+def _tables(secoes: Iterable[Dict[str, Any]], base: int) -> Tuple[List[bytes], bytes]:
+    """Monta as tabelas (ordenadas por chave) e a área de dados com chaves e registros."""
+    blob = bytearray()
+    tabelas = []
+    for secao in secoes:
+        entradas = []
+        for chave in sorted(secao, key=lambda k: k.encode("utf-8")):
+            chave_b = chave.encode("utf-8")
+            registro = json_codec.dumps(secao[chave])
+            key_off = base + len(blob)
+            blob += chave_b
+            rec_off = base + len(blob)
+            blob += registro
+            entradas.append(_ENTRY.pack(key_off, len(chave_b), rec_off, len(registro)))
+        tabelas.append(b"".join(entradas))
+    return tabelas, bytes(blob)
+
+
+def build_sidecar(rbac: Dict[str, Any], rbac_file: Optional[str] = None,
+                  signature: Optional[Tuple[int, int, int]] = None) -> Path:
+    """
+    Gera o índice binário de um estado RBAC já carregado.
+
+    Args:
+        rbac: Dados RBAC completos
+        rbac_file: Arquivo RBAC de origem (padrão: settings.RBAC_FILE)
+        signature: Assinatura do arquivo de origem correspondente a `rbac`; o leitor só usa
+            o índice enquanto o rbac.json tiver essa mesma assinatura
+
+    Returns:
+        Path: Caminho do índice gravado
+    """
+    source = Path(rbac_file or settings.RBAC_FILE)
+    target = sidecar_path(str(source))
+    usuarios = rbac.get("usuarios", {})
+    grupos = rbac.get("grupos", {})
+    ino, size, mtime_ns = signature or _file_signature(source)
+    base = _HEADER.size + (len(usuarios) + len(grupos)) * _ENTRY.size
+    tabelas, blob = _tables((usuarios, grupos), base)
+    header = _HEADER.pack(MAGIC, ino, size, mtime_ns, get_rbac_version(rbac), len(usuarios), len(grupos))
+
+    tmp_path = target.with_name(f".{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        for tabela in tabelas:
+            f.write(tabela)
+        f.write(blob)
+    # Leitores com o índice anterior mapeado continuam vendo o arquivo antigo até reabrirem
+    os.replace(tmp_path, target)
+    return target
+
+
+class RBACMmapReader:
+    """
+    Leitura preguiçosa de um único usuário ou grupo do RBAC via índice mapeado em memória.
+
+    O índice guarda as chaves ordenadas com o offset do registro de cada uma, então uma
+    consulta é uma busca binária sobre o arquivo mapeado seguida do parse apenas daquele
+    registro; o grafo completo do rbac.json não é materializado. O índice é regravado a cada
+    escrita feita pela aplicação e, se o rbac.json mudar por fora, reconstruído na próxima
+    consulta (única ocasião em que o JSON inteiro é lido).
+    """
+
+    def __init__(self, rbac_file: Optional[str] = None):
+        self.rbac_path = Path(rbac_file or settings.RBAC_FILE)
+        self.index_path = sidecar_path(str(self.rbac_path))
+        self._lock = threading.Lock()
+        self._mm: Optional[mmap.mmap] = None
+        self._signature: Optional[Tuple[int, int, int]] = None
+
+    def _open_index(self, signature: Tuple[int, int, int]) -> bool:
+        """Mapeia o índice em disco se ele corresponder à assinatura atual do rbac.json."""
+        try:
+            with open(self.index_path, 'rb') as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            return False
+        if len(mm) < _HEADER.size:
+            mm.close()
+            return False
+        magic, ino, size, mtime_ns = _HEADER.unpack_from(mm, 0)[:4]
+        if magic != MAGIC or (ino, size, mtime_ns) != signature:
+            mm.close()
+            return False
+        # O mapeamento anterior não é fechado explicitamente: consultas em andamento ainda o usam
+        self._mm, self._signature = mm, signature
+        return True
+
+    def _ensure_current(self) -> mmap.mmap:
+        try:
+            signature = _file_signature(self.rbac_path)
+        except FileNotFoundError:
+            # get_rbac_data tenta recuperar o arquivo pelo log (ou levanta HTTPException)
+            get_rbac_data(str(self.rbac_path))
+            signature = _file_signature(self.rbac_path)
+        if self._mm is not None and self._signature == signature:
+            return self._mm
+        with self._lock:
+            if self._mm is not None and self._signature == signature:
+                return self._mm
+            if not self._open_index(signature):
+                # A assinatura é lida antes do JSON: uma escrita concorrente força nova reconstrução
+                build_sidecar(get_rbac_data(str(self.rbac_path)), str(self.rbac_path), signature)
+                logger.info(f"Índice mapeado do RBAC reconstruído em {self.index_path}")
+                if not self._open_index(signature):
+                    raise RuntimeError(f"Índice RBAC inválido após reconstrução: {self.index_path}")
+            return self._mm
+
+    def _lookup(self, tabela: int, chave: str) -> Optional[Dict[str, Any]]:
+        mm = self._ensure_current()
+        # Contagens lidas do próprio mapeamento, que pode ser trocado por outra thread
+        n_usuarios, n_grupos = _HEADER.unpack_from(mm, 0)[5:]
+        inicio = _HEADER.size + (0 if tabela == 0 else n_usuarios * _ENTRY.size)
+        lo, hi = 0, n_usuarios if tabela == 0 else n_grupos
+        alvo = chave.encode("utf-8")
+        while lo < hi:
+            meio = (lo + hi) // 2
+            key_off, key_len, rec_off, rec_len = _ENTRY.unpack_from(mm, inicio + meio * _ENTRY.size)
+            atual = mm[key_off:key_off + key_len]
+            if atual == alvo:
+                return json_codec.loads(mm[rec_off:rec_off + rec_len])
+            if atual < alvo:
+                lo = meio + 1
+            else:
+                hi = meio
+        return None
+
+    @property
+    def versao(self) -> int:
+        return _HEADER.unpack_from(self._ensure_current(), 0)[4]
+
+    def get_usuario(self, username: str) -> Optional[Dict[str, Any]]:
+        return self._lookup(0, username)
+
+    def get_grupo(self, nome: str) -> Optional[Dict[str, Any]]:
+        return self._lookup(1, nome)
+
+
+def get_rbac_reader(rbac_file: Optional[str] = None) -> RBACMmapReader:
+    key = str(Path(rbac_file or settings.RBAC_FILE))
+    reader = _readers.get(key)
+    if reader is None:
+        with _readers_lock:
+            reader = _readers.setdefault(key, RBACMmapReader(key))
+    return reader
+
+
+def get_rbac_usuario(username: str, rbac_file: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Registro de um usuário do rbac.json (pelo índice mapeado se `RBAC_MMAP_INDEX=true`)."""
+    if settings.RBAC_MMAP_INDEX:
+        return get_rbac_reader(rbac_file).get_usuario(username)
+    return get_rbac_data(rbac_file).get("usuarios", {}).get(username)
+
+
+def get_rbac_grupo(nome: str, rbac_file: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Registro de um grupo do rbac.json (pelo índice mapeado se `RBAC_MMAP_INDEX=true`)."""
+    if settings.RBAC_MMAP_INDEX:
+        return get_rbac_reader(rbac_file).get_grupo(nome)
+    return get_rbac_data(rbac_file).get("grupos", {}).get(nome)
+
+
+async def get_rbac_usuario_async(username: str, rbac_file: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    return await run_io(get_rbac_usuario, username, rbac_file)
+
+
+async def get_rbac_grupo_async(nome: str, rbac_file: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    return await run_io(get_rbac_grupo, nome, rbac_file)
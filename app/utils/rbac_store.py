@@ -0,0 +1,214 @@
+import os
+import threading
+import logging
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+
+from app.config import settings
+from app.utils import json_codec
+from app.models.rbac import RBACModel
+from app.utils.dependencies import get_rbac_data
+from app.utils.storage_io import run_io
+from app.utils.rbac_wal import append_change
+
+try:
+    import fcntl  # Disponível apenas em sistemas POSIX
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Chave de topo do rbac.json que guarda a versão monotônica dos dados
+VERSION_KEY = "versao"
+
+# Número máximo de tentativas de reaplicar uma mutação após conflito de versão
+MAX_RETRIES = 5
+
+# Lock local de processo, mantido apenas durante o compare-and-swap (não durante a mutação)
+_cas_lock = threading.Lock()
+
+# Cache (assinatura do arquivo -> versão) para evitar reler o JSON inteiro a cada escrita
+_version_cache: Dict[str, Tuple[Tuple[int, int, int], int]] = {}
+
+
+class RBACVersionConflict(Exception):
+    """Levantada quando o RBAC foi alterado por outra requisição entre a leitura e a escrita."""
+
+    def __init__(self, expected: int, current: int):
+        super().__init__(f"Conflito de versão RBAC: esperado {expected}, atual {current}")
+        self.expected = expected
+        self.current = current
+
+
+class NoChange:
+    """
+    Retorno de uma mutação que não alterou os dados RBAC.
+    Nenhuma escrita é feita e a versão não é incrementada.
+    """
+
+    def __init__(self, result: Any = None):
+        self.result = result
+
+
+def get_rbac_version(rbac: Dict) -> int:
+    """Retorna a versão dos dados RBAC (0 para arquivos criados antes do versionamento)."""
+    return int(rbac.get(VERSION_KEY, 0))
+
+
+def _file_signature(path: Path) -> Tuple[int, int, int]:
+    st = os.stat(path)
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def _read_current_version(path: Path) -> int:
+    """Lê a versão persistida, reaproveitando o cache enquanto o arquivo não mudar."""
+    signature = _file_signature(path)
+    cached = _version_cache.get(str(path))
+    if cached and cached[0] == signature:
+        return cached[1]
+    version = get_rbac_version(json_codec.load_file(path))
+    _version_cache[str(path)] = (signature, version)
+    return version
+
+
+def _write_atomic(path: Path, rbac: Dict) -> None:
+    """Escreve em arquivo temporário e substitui o original atomicamente."""
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(json_codec.dumps_storage(rbac))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _refresh_sidecar(rbac: Dict, path: Path, signature: Tuple[int, int, int]) -> None:
+    """Regrava o índice mapeado a partir dos dados recém-gravados, sem reler o JSON."""
+    from app.utils.rbac_mmap import build_sidecar
+    try:
+        build_sidecar(rbac, str(path), signature)
+    except OSError as e:
+        # O leitor detecta o índice desatualizado e o reconstrói na próxima consulta
+        logger.warning(f"Falha ao atualizar o índice mapeado do RBAC: {e}")
+
+
+class _InterProcessLock:
+    """Lock de arquivo (flock) para que workers distintos não intercalem o compare-and-swap."""
+
+    def __init__(self, path: Path):
+        self.lock_path = path.with_name(f".{path.name}.lock")
+        self._fd: Optional[int] = None
+
+    def __enter__(self):
+        if fcntl is not None:
+            self._fd = os.open(self.lock_path, os.O_CREAT | os.O_RDWR, 0o644)
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        return False
+
+
+def save_rbac_data(rbac: Dict, expected_version: int, before: Optional[Dict] = None, rbac_file: Optional[str] = None) -> int:
+    """
+    Persiste os dados RBAC somente se a versão no disco ainda for `expected_version`.
+
+    Args:
+        rbac: Dados RBAC completos a serem gravados
+        expected_version: Versão lida antes da mutação
+        before: Estado anterior à mutação, usado no log; se omitido, é relido do disco sob o lock
+        rbac_file: Arquivo RBAC alvo (padrão: settings.RBAC_FILE)
+
+    Returns:
+        int: Nova versão gravada
+
+    Raises:
+        RBACVersionConflict: Se outra escrita aconteceu desde a leitura
+    """
+    path = Path(rbac_file or settings.RBAC_FILE)
+    with _cas_lock, _InterProcessLock(path):
+        if settings.RBAC_WAL_ENABLED and before is None:
+            # Sob o lock o arquivo ainda guarda o estado anterior: relê-lo uma vez por escrita
+            # custa menos que copiar o RBAC inteiro a cada tentativa de mutação
+            before = json_codec.load_file(path)
+            current = get_rbac_version(before)
+        else:
+            current = _read_current_version(path)
+        if current != expected_version:
+            raise RBACVersionConflict(expected_version, current)
+        new_version = expected_version + 1
+        rbac[VERSION_KEY] = new_version
+        if settings.RBAC_WAL_ENABLED:
+            # Write-ahead: a alteração entra no log antes de o arquivo principal ser substituído
+            append_change(str(path), before, rbac, new_version)
+        _write_atomic(path, rbac)
+        signature = _file_signature(path)
+        _version_cache[str(path)] = (signature, new_version)
+        if settings.RBAC_MMAP_INDEX:
+            _refresh_sidecar(rbac, path, signature)
+    return new_version
+
+
+def update_rbac(mutate: Callable[[Dict], Any], max_retries: int = MAX_RETRIES, rbac_file: Optional[str] = None) -> Any:
+    """
+    Aplica uma mutação ao RBAC com escrita otimista (compare-and-swap).
+
+    A função `mutate` recebe uma cópia recém-carregada dos dados e altera-a in-place.
+    Em caso de conflito de versão os dados são recarregados e a mutação é reaplicada,
+    portanto ela deve depender apenas do dicionário recebido. Exceções (ex.: HTTPException
+    de validação) abortam a operação sem escrita. Retornar `NoChange(resultado)` evita a escrita.
+
+    Returns:
+        Any: O valor retornado pela mutação
+    """
+    for attempt in range(1, max_retries + 1):
+        rbac = get_rbac_data(rbac_file)
+        version = get_rbac_version(rbac)
+        result = mutate(rbac)
+        if isinstance(result, NoChange):
+            return result.result
+        try:
+            save_rbac_data(rbac, version, rbac_file=rbac_file)
+            return result
+        except RBACVersionConflict as e:
+            logger.warning(f"{e} (tentativa {attempt}/{max_retries}); reaplicando mutação")
+    logger.error(f"Mutação RBAC abortada após {max_retries} conflitos de versão consecutivos")
+    raise HTTPException(status_code=409, detail="Conflito de escrita concorrente nos dados RBAC. Tente novamente.")
+
+
+def update_rbac_model(mutate: Callable[[RBACModel], Any], max_retries: int = MAX_RETRIES, rbac_file: Optional[str] = None) -> Any:
+    """
+    Variante de `update_rbac` em que a mutação opera sobre o modelo tipado (`RBACModel`).
+
+    Associações são conjuntos em memória, então inclusões e remoções custam O(1) mesmo em
+    grupos grandes; o modelo é serializado de volta no formato do rbac.json antes da escrita.
+    """
+    def _apply(rbac: Dict) -> Any:
+        model = RBACModel.from_dict(rbac)
+        result = mutate(model)
+        if not isinstance(result, NoChange):
+            rbac.clear()
+            rbac.update(model.to_dict())
+        return result
+
+    return update_rbac(_apply, max_retries=max_retries, rbac_file=rbac_file)
+
+
+async def update_rbac_async(mutate: Callable[[Dict], Any], max_retries: int = MAX_RETRIES, rbac_file: Optional[str] = None) -> Any:
+    """
+    Versão assíncrona de `update_rbac` para handlers `async def`.
+
+    Leitura, mutação e escrita rodam no pool de I/O de armazenamento; a mutação, portanto,
+    não deve tocar em estado do event loop (basta que dependa do dicionário recebido).
+    """
+    return await run_io(update_rbac, mutate, max_retries=max_retries, rbac_file=rbac_file)
+
+
+async def update_rbac_model_async(mutate: Callable[[RBACModel], Any], max_retries: int = MAX_RETRIES, rbac_file: Optional[str] = None) -> Any:
+    """Versão assíncrona de `update_rbac_model`."""
+    return await run_io(update_rbac_model, mutate, max_retries=max_retries, rbac_file=rbac_file)
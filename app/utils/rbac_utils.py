@@ -1,10 +1,30 @@
-def is_group_admin_or_global(user, grupo, rbac):
+from typing import Any, Dict, Optional, Union
+
+from app.models.rbac import RBACModel
+from app.utils.rbac_index import RBACIndex, get_rbac_index
+from app.utils.rbac_store import get_rbac_version
+
+
+def is_group_admin_or_global(user, grupo, rbac: Optional[Union[Dict[str, Any], RBACModel]] = None, index: Optional[RBACIndex] = None):
     """
     Verifica se o usuário é admin global ou admin do grupo.
     Retorna True se sim, False caso contrário.
+
+    A checagem usa o índice reverso de administradores. Quando `rbac` é informado (ex.:
+    dentro de uma mutação de `update_rbac`) e está em uma versão diferente da indexada,
+    a decisão é tomada sobre o próprio `rbac`, para ficar consistente com o que será gravado.
+    Com o modelo tipado (`RBACModel`) a checagem é feita diretamente nos conjuntos dele.
+    Handlers `async def` devem passar `index` (de `get_rbac_index_async`), para que uma
+    eventual reconstrução do índice não rode no event loop.
     """
     if user.get("papel") == "global_admin":
         return True
+    if isinstance(rbac, RBACModel):
+        g = rbac.grupos.get(grupo)
+        return g is not None and user.get("username") in g.admins
+    index = index or get_rbac_index()
+    if rbac is None or get_rbac_version(rbac) == index.versao:
+        return index.administra(user.get("username"), grupo)
     if grupo in rbac.get("grupos", {}):
         if user.get("username") in rbac["grupos"][grupo].get("admins", []):
             return True
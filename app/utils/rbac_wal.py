@@ -0,0 +1,299 @@
+import os
+import logging
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.utils import json_codec
+
+logger = logging.getLogger(__name__)
+
+# Chaves de topo cujo valor é um dicionário de entidades (diff por entidade)
+ENTITY_SECTIONS = ("usuarios", "grupos", "ferramentas")
+
+SNAPSHOT_PREFIX = "snapshot-"
+LOG_PREFIX = "log-"
+
+_wal_lock = threading.Lock()
+
+# Estado do segmento atual por diretório:
+# (versão base, última versão registrada, nº de entradas, tamanho do log em bytes)
+_segment_state: Dict[str, Tuple[int, int, int, int]] = {}
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _as_utc(ts: datetime) -> datetime:
+    # Entradas antigas do log foram gravadas sem fuso; todas as marcas de tempo são UTC
+    if ts.tzinfo is None:
+        return ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc)
+
+
+def wal_dir_for(rbac_file: str) -> Path:
+    """Diretório do log de alterações associado a um arquivo RBAC."""
+    if settings.RBAC_WAL_DIR and Path(rbac_file) == Path(settings.RBAC_FILE):
+        return Path(settings.RBAC_WAL_DIR)
+    path = Path(rbac_file)
+    return path.with_name(f"{path.name}.wal")
+
+
+def _snapshot_path(wal_dir: Path, version: int) -> Path:
+    return wal_dir / f"{SNAPSHOT_PREFIX}{version:012d}.json"
+
+
+def _log_path(wal_dir: Path, version: int) -> Path:
+    return wal_dir / f"{LOG_PREFIX}{version:012d}.ndjson"
+
+
+def _list_snapshot_versions(wal_dir: Path) -> List[int]:
+    if not wal_dir.exists():
+        return []
+    versions = []
+    for entry in wal_dir.iterdir():
+        if entry.name.startswith(SNAPSHOT_PREFIX) and entry.suffix == ".json":
+            try:
+                versions.append(int(entry.stem[len(SNAPSHOT_PREFIX):]))
+            except ValueError:
+                continue
+    return sorted(versions)
+
+
+def compute_diff(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Calcula as alterações entre dois estados RBAC.
+
+    Seções de entidades (usuários, grupos, ferramentas) são comparadas por chave, de forma
+    que a entrada do log contém apenas os registros alterados; demais chaves de topo são
+    registradas por inteiro.
+    """
+    set_ops: Dict[str, Dict[str, Any]] = {}
+    del_ops: Dict[str, List[str]] = {}
+    topo: Dict[str, Any] = {}
+    del_topo: List[str] = []
+
+    for key in set(before) | set(after):
+        if key == "versao":
+            continue
+        old, new = before.get(key), after.get(key)
+        if key in ENTITY_SECTIONS and isinstance(old, dict) and isinstance(new, dict):
+            changed = {k: v for k, v in new.items() if old.get(k) != v}
+            removed = [k for k in old if k not in new]
+            if changed:
+                set_ops[key] = changed
+            if removed:
+                del_ops[key] = removed
+        elif key not in after:
+            del_topo.append(key)
+        elif old != new:
+            topo[key] = new
+
+    entry: Dict[str, Any] = {}
+    if set_ops:
+        entry["set"] = set_ops
+    if del_ops:
+        entry["del"] = del_ops
+    if topo:
+        entry["topo"] = topo
+    if del_topo:
+        entry["del_topo"] = del_topo
+    return entry
+
+
+def apply_entry(state: Dict[str, Any], entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Aplica uma entrada do log a um estado RBAC (in-place) e retorna o estado."""
+    for section, records in entry.get("set", {}).items():
+        state.setdefault(section, {}).update(records)
+    for section, keys in entry.get("del", {}).items():
+        for k in keys:
+            state.get(section, {}).pop(k, None)
+    state.update(entry.get("topo", {}))
+    for key in entry.get("del_topo", []):
+        state.pop(key, None)
+    state["versao"] = entry["versao"]
+    return state
+
+
+def _write_snapshot(wal_dir: Path, rbac: Dict[str, Any], version: int) -> None:
+    wal_dir.mkdir(parents=True, exist_ok=True)
+    path = _snapshot_path(wal_dir, version)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(json_codec.dumps({"versao": version, "ts": _utcnow().isoformat(), "rbac": rbac}))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    # Segmento de log que acompanha o snapshot (entradas com versão maior que a base)
+    _log_path(wal_dir, version).touch()
+    _segment_state[str(wal_dir)] = (version, version, 0, 0)
+    _prune(wal_dir)
+    logger.info(f"Snapshot RBAC compactado na versão {version} em {path}")
+
+
+def _prune(wal_dir: Path) -> None:
+    """Remove snapshots (e seus segmentos de log) além da retenção configurada."""
+    versions = _list_snapshot_versions(wal_dir)
+    excess = len(versions) - max(1, settings.RBAC_SNAPSHOT_RETENTION)
+    for version in versions[:max(0, excess)]:
+        for path in (_snapshot_path(wal_dir, version), _log_path(wal_dir, version)):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def _read_log(path: Path) -> List[Dict[str, Any]]:
+    entries = []
+    if not path.exists():
+        return entries
+    with open(path, 'rb') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entries.append(json_codec.loads(line))
+            except json_codec.JSONDecodeError:
+                # Última linha truncada por queda durante a escrita: ignora o restante
+                logger.warning(f"Entrada truncada ignorada no log RBAC {path}")
+                break
+    return entries
+
+
+def _load_segment_state(wal_dir: Path) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Estado do segmento atual, relido do disco se outro processo o alterou.
+
+    É chamado sob o lock de arquivo do RBAC: o cache deste processo só vale enquanto o
+    snapshot mais recente e o tamanho do seu log forem os mesmos vistos na última escrita.
+    """
+    key = str(wal_dir)
+    versions = _list_snapshot_versions(wal_dir)
+    if not versions:
+        _segment_state.pop(key, None)
+        return None
+    base = versions[-1]
+    log_path = _log_path(wal_dir, base)
+    try:
+        size = log_path.stat().st_size
+    except FileNotFoundError:
+        size = 0
+    cached = _segment_state.get(key)
+    if cached is not None and cached[0] == base and cached[3] == size:
+        return cached
+    entries = _read_log(log_path)
+    last = entries[-1]["versao"] if entries else base
+    _segment_state[key] = (base, last, len(entries), size)
+    return _segment_state[key]
+
+
+def append_change(rbac_file: str, before: Dict[str, Any], after: Dict[str, Any], new_version: int) -> None:
+    """
+    Registra uma mutação no log antes de o arquivo principal ser sobrescrito.
+
+    Se o log não termina na versão de `before` (primeira escrita ou arquivo alterado
+    fora da aplicação) um novo snapshot base é criado a partir de `before`. A cada
+    `RBAC_SNAPSHOT_INTERVAL` entradas o segmento é compactado em um novo snapshot.
+    """
+    if not settings.RBAC_WAL_ENABLED:
+        return
+    wal_dir = wal_dir_for(rbac_file)
+    previous_version = int(before.get("versao", 0))
+    with _wal_lock:
+        state = _load_segment_state(wal_dir)
+        if state is None or state[1] != previous_version:
+            if state is not None:
+                logger.warning(f"Log RBAC em {wal_dir} termina na versão {state[1]}, mas o arquivo está na {previous_version}; criando novo snapshot base")
+            base_state = dict(before)
+            base_state["versao"] = previous_version
+            _write_snapshot(wal_dir, base_state, previous_version)
+            state = _segment_state[str(wal_dir)]
+
+        base, _, count, _ = state
+        entry = {"versao": new_version, "ts": _utcnow().isoformat(), **compute_diff(before, after)}
+        with open(_log_path(wal_dir, base), 'ab') as f:
+            f.write(json_codec.dumps(entry) + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+            size = f.tell()
+        count += 1
+        _segment_state[str(wal_dir)] = (base, new_version, count, size)
+
+        if count >= settings.RBAC_SNAPSHOT_INTERVAL:
+            _write_snapshot(wal_dir, after, new_version)
+
+
+def checkpoint(rbac_file: str, rbac: Dict[str, Any]) -> None:
+    """Força um snapshot do estado atual (ex.: antes de uma operação de risco)."""
+    if not settings.RBAC_WAL_ENABLED:
+        return
+    with _wal_lock:
+        _write_snapshot(wal_dir_for(rbac_file), rbac, int(rbac.get("versao", 0)))
+
+
+def replay_rbac(rbac_file: str, until: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+    """
+    Reconstrói o estado RBAC a partir do snapshot mais recente e da cauda do log.
+
+    Args:
+        rbac_file: Arquivo RBAC cujo log será usado
+        until: Se informado, reconstrói o estado vigente neste instante (UTC)
+
+    Returns:
+        Optional[Dict]: Estado reconstruído ou None se não houver histórico até o instante
+    """
+    wal_dir = wal_dir_for(rbac_file)
+    limit = _as_utc(until) if until else None
+    for version in reversed(_list_snapshot_versions(wal_dir)):
+        snapshot = json_codec.load_file(_snapshot_path(wal_dir, version))
+        if limit and _as_utc(datetime.fromisoformat(snapshot["ts"])) > limit:
+            continue
+        state = snapshot["rbac"]
+        for entry in _read_log(_log_path(wal_dir, version)):
+            if limit and _as_utc(datetime.fromisoformat(entry["ts"])) > limit:
+                break
+            apply_entry(state, entry)
+        return state
+    return None
+
+
+def _restore_file(rbac_file: str, state: Dict[str, Any]) -> None:
+    """Grava o estado reconstruído em arquivo temporário e o substitui atomicamente."""
+    path = Path(rbac_file)
+    tmp_path = path.with_name(f".{path.name}.recover.{os.getpid()}.tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(json_codec.dumps_storage(state))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def recover_rbac_file(rbac_file: str) -> bool:
+    """Regrava o arquivo RBAC a partir do log (usado quando ele está ausente ou corrompido)."""
+    state = replay_rbac(rbac_file)
+    if state is None:
+        return False
+    path = Path(rbac_file)
+    _restore_file(rbac_file, state)
+    logger.warning(f"Arquivo RBAC {path} recuperado a partir do log na versão {state.get('versao', 0)}")
+    return True
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Recupera o rbac.json a partir do log de alterações.")
+    parser.add_argument("--arquivo", default=settings.RBAC_FILE, help="Arquivo RBAC a ser restaurado")
+    parser.add_argument("--ate", help="Instante (ISO 8601, UTC) do estado desejado; padrão: mais recente")
+    args = parser.parse_args()
+
+    estado = replay_rbac(args.arquivo, datetime.fromisoformat(args.ate) if args.ate else None)
+    if estado is None:
+        parser.exit(1, "Nenhum histórico disponível para o instante informado.\n")
+    _restore_file(args.arquivo, estado)
+    print(f"Arquivo {args.arquivo} restaurado na versão {estado.get('versao', 0)}")
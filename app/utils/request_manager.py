@@ -1,11 +1,20 @@
-import json
+import os
+import time
 import uuid
 import logging
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Any, Optional
-
+from typing import Callable, Iterator, List, Dict, Any, Optional
+from fastapi import HTTPException
 from app.models.requests import GroupAccessRequest, RequestStatus
+from app.utils.rbac_index import get_rbac_index
+from app.models.rbac import RBACModel
+from app.utils import json_codec
+from app.utils.rbac_store import update_rbac_model, NoChange, _file_signature
+from app.utils.storage_io import run_io
+from app.utils.single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
@@ -15,8 +24,8 @@ REQUESTS_FILE = Path(__file__).parent.parent.parent / 'data' / 'requests.json'
 def _ensure_requests_file() -> None:
     """Garante que o arquivo de solicitações exista com estrutura válida"""
     if not REQUESTS_FILE.exists():
-        with open(REQUESTS_FILE, 'w', encoding='utf-8') as f:
-            json.dump({"requests": []}, f, indent=2, ensure_ascii=False)
+        with open(REQUESTS_FILE, 'wb') as f:
+            f.write(json_codec.dumps_storage({"requests": []}))
         logger.info(f"Arquivo de solicitações criado em {REQUESTS_FILE}")
 
 def _load_requests() -> Dict[str, List[Dict[str, Any]]]:
@@ -24,238 +33,382 @@ def _load_requests() -> Dict[str, List[Dict[str, Any]]]:
     _ensure_requests_file()
     
     try:
-        with open(REQUESTS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return json_codec.load_file(REQUESTS_FILE)
     except Exception as e:
         logger.error(f"Erro ao carregar arquivo de solicitações: {e}")
         return {"requests": []}
 
 def _save_requests(data: Dict[str, List[Dict[str, Any]]]) -> bool:
-    """Salva as solicitações no arquivo JSON"""
+    """Salva as solicitações no arquivo JSON (arquivo temporário + substituição atômica)"""
+    tmp_path = REQUESTS_FILE.with_name(f".{REQUESTS_FILE.name}.{os.getpid()}.{threading.get_ident()}.tmp")
     try:
-        with open(REQUESTS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        with open(tmp_path, 'wb') as f:
+            f.write(json_codec.dumps_storage(data))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, REQUESTS_FILE)
         return True
     except Exception as e:
         logger.error(f"Erro ao salvar solicitações: {e}")
         return False
 
+class _RequestIndex:
+    """
+    Índices em memória do arquivo de solicitações.
+
+    Mantém as solicitações por ID, por usuário, por grupo e as pendentes por grupo, de forma
+    que a caixa de entrada de um admin e a renomeação ou remoção de um grupo custam
+    O(resultado) em vez de percorrer todas as solicitações. É atualizado junto com cada escrita feita por este processo e
+    reconstruído quando o arquivo muda por fora.
+    """
+
+    def __init__(self, data: Dict[str, List[Dict[str, Any]]]):
+        self.data = data
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        self.by_user: Dict[str, List[Dict[str, Any]]] = {}
+        self.by_group: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # Pendentes em ordem de criação: geral, por grupo e por (usuário, grupo)
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        self.pending_by_group: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.pending_by_user_group: Dict[tuple, Dict[str, Any]] = {}
+        for request in data["requests"]:
+            self._index(request)
+
+    def _index(self, request: Dict[str, Any]) -> None:
+        self.by_id[request["request_id"]] = request
+        self.by_user.setdefault(request["username"], []).append(request)
+        self.by_group.setdefault(request["grupo"], {})[request["request_id"]] = request
+        if request["status"] == RequestStatus.PENDING:
+            self.pending[request["request_id"]] = request
+            self.pending_by_group.setdefault(request["grupo"], {})[request["request_id"]] = request
+            self.pending_by_user_group[(request["username"], request["grupo"])] = request
+
+    def add(self, request: Dict[str, Any]) -> None:
+        self.data["requests"].append(request)
+        self._index(request)
+
+    def resolve(self, request: Dict[str, Any]) -> None:
+        """Retira dos índices de pendentes uma solicitação que acabou de ser revisada."""
+        self.pending.pop(request["request_id"], None)
+        group_pending = self.pending_by_group.get(request["grupo"])
+        if group_pending is not None:
+            group_pending.pop(request["request_id"], None)
+            if not group_pending:
+                del self.pending_by_group[request["grupo"]]
+        key = (request["username"], request["grupo"])
+        if self.pending_by_user_group.get(key) is request:
+            del self.pending_by_user_group[key]
+
+    def rename_group(self, antigo: str, novo: str) -> int:
+        """Troca o grupo das solicitações de `antigo` (todas, inclusive o histórico) para `novo`."""
+        requests = self.by_group.pop(antigo, {})
+        for request in requests.values():
+            request["grupo"] = novo
+        self.by_group.setdefault(novo, {}).update(requests)
+        pending = self.pending_by_group.pop(antigo, {})
+        if pending:
+            self.pending_by_group.setdefault(novo, {}).update(pending)
+        for request in pending.values():
+            self.pending_by_user_group.pop((request["username"], antigo), None)
+            self.pending_by_user_group.setdefault((request["username"], novo), request)
+        return len(requests)
+
+_index_lock = threading.RLock()
+_index: Optional[_RequestIndex] = None
+_index_signature: Optional[tuple] = None
+# Recargas concorrentes da mesma versão do arquivo compartilham uma única leitura
+_reload_flight = SingleFlight()
+
+# Tentativas de gravar a cascata de um grupo renomeado/removido antes de adiá-la
+CASCADE_RETRIES = 3
+# Cascatas cuja gravação falhou: reaplicadas na próxima carga do índice (ver _reconciliar)
+_cascatas_pendentes: List[Callable[[_RequestIndex], int]] = []
+
+def _get_index() -> _RequestIndex:
+    """
+    Retorna o índice de solicitações, reconstruindo-o se o arquivo mudou desde a última leitura.
+
+    Deve ser chamado sem o lock: a leitura do arquivo acontece fora dele, coalescida por
+    versão do arquivo, e só a troca do índice é feita com o lock adquirido.
+    """
+    global _index, _index_signature
+    _ensure_requests_file()
+    signature = _file_signature(REQUESTS_FILE)
+    index = _index
+    if index is not None and signature == _index_signature:
+        return index
+    loaded = _reload_flight.do((str(REQUESTS_FILE), signature), lambda: _RequestIndex(_load_requests()))
+    with _index_lock:
+        if _index is None or signature != _index_signature:
+            _index = loaded
+            _index_signature = signature
+            if _cascatas_pendentes:
+                _reconciliar(loaded)
+        return _index or loaded
+
+@contextmanager
+def _locked_index() -> Iterator[_RequestIndex]:
+    """
+    Índice atual com o lock adquirido. As escritas alteram o índice no lugar, então leitores
+    e escritores o usam sob o lock; a recarga, se houver, acontece antes de adquiri-lo.
+    """
+    while True:
+        index = _get_index()
+        with _index_lock:
+            # Outro thread pode ter trocado (ou descartado) o índice entre a carga e o lock
+            if index is _index:
+                yield index
+                return
+
+def _reconciliar(index: _RequestIndex) -> None:
+    """
+    Reaplica as cascatas de grupo que não puderam ser gravadas (chamado com o lock).
+
+    O RBAC já reflete a renomeação/remoção; sem isso as solicitações continuariam apontando
+    para o grupo antigo. As cascatas são idempotentes, então reaplicá-las é seguro.
+    """
+    alteradas = sum(aplicar(index) for aplicar in _cascatas_pendentes)
+    if not alteradas or _commit(index):
+        logger.info(f"{len(_cascatas_pendentes)} cascatas de grupo pendentes reconciliadas")
+        _cascatas_pendentes.clear()
+
+def _commit(index: _RequestIndex) -> bool:
+    """Persiste os dados do índice e registra a nova assinatura do arquivo (chamado com o lock)."""
+    global _index, _index_signature
+    if _save_requests(index.data):
+        _index_signature = _file_signature(REQUESTS_FILE)
+        return True
+    # Escrita falhou: o índice em memória não reflete mais o disco
+    _index = None
+    _index_signature = None
+    return False
+
+def _commit_or_raise(index: _RequestIndex) -> None:
+    """Como `_commit`, mas levanta HTTPException 500 se a escrita falhar (chamado com o lock)."""
+    if not _commit(index):
+        raise HTTPException(status_code=500, detail="Erro ao salvar as solicitações de acesso")
+
+def _to_model(request: Dict[str, Any]) -> GroupAccessRequest:
+    # Converter datetime string para objeto
+    created_at = datetime.fromisoformat(request["created_at"])
+    updated_at = datetime.fromisoformat(request["updated_at"]) if request.get("updated_at") else None
+
+    return GroupAccessRequest(
+        request_id=request["request_id"],
+        username=request["username"],
+        grupo=request["grupo"],
+        status=request["status"],
+        justificativa=request["justificativa"],
+        created_at=created_at,
+        updated_at=updated_at,
+        reviewed_by=request.get("reviewed_by"),
+        review_comment=request.get("review_comment")
+    )
+
 def create_access_request(username: str, grupo: str, justificativa: str) -> GroupAccessRequest:
     """Cria uma nova solicitação de acesso a grupo"""
-    data = _load_requests()
-    
-    # Verificar se já existe uma solicitação pendente
-    for request in data["requests"]:
-        if (request["username"] == username and 
-            request["grupo"] == grupo and 
-            request["status"] == RequestStatus.PENDING):
+    with _locked_index() as index:
+
+        # Verificar se já existe uma solicitação pendente
+        existing = index.pending_by_user_group.get((username, grupo))
+        if existing is not None:
             logger.info(f"Solicitação já existente do usuário {username} para o grupo {grupo}")
-            
-            # Converter datetime string para objeto
-            created_at = datetime.fromisoformat(request["created_at"])
-            updated_at = datetime.fromisoformat(request["updated_at"]) if request.get("updated_at") else None
-            
-            return GroupAccessRequest(
-                request_id=request["request_id"],
-                username=request["username"],
-                grupo=request["grupo"],
-                status=request["status"],
-                justificativa=request["justificativa"],
-                created_at=created_at,
-                updated_at=updated_at,
-                reviewed_by=request.get("reviewed_by"),
-                review_comment=request.get("review_comment")
-            )
-    
-    # Criar nova solicitação
-    request_id = str(uuid.uuid4())
-    now = datetime.now()
-    
-    new_request = {
-        "request_id": request_id,
-        "username": username,
-        "grupo": grupo,
-        "status": RequestStatus.PENDING,
-        "justificativa": justificativa,
-        "created_at": now.isoformat(),
-        "updated_at": None,
-        "reviewed_by": None,
-        "review_comment": None
-    }
-    
-    data["requests"].append(new_request)
-    _save_requests(data)
-    
+            return _to_model(existing)
+
+        # Criar nova solicitação
+        request_id = str(uuid.uuid4())
+        now = datetime.now()
+
+        new_request = {
+            "request_id": request_id,
+            "username": username,
+            "grupo": grupo,
+            "status": RequestStatus.PENDING,
+            "justificativa": justificativa,
+            "created_at": now.isoformat(),
+            "updated_at": None,
+            "reviewed_by": None,
+            "review_comment": None
+        }
+
+        index.add(new_request)
+        _commit_or_raise(index)
+
     logger.info(f"Solicitação {request_id} criada por {username} para o grupo {grupo}")
-    
-    return GroupAccessRequest(
-        request_id=request_id,
-        username=username,
-        grupo=grupo,
-        status=RequestStatus.PENDING,
-        justificativa=justificativa,
-        created_at=now,
-        updated_at=None,
-        reviewed_by=None,
-        review_comment=None
-    )
+
+    return _to_model(new_request)
 
 def get_request_by_id(request_id: str) -> Optional[GroupAccessRequest]:
     """Obtém uma solicitação pelo ID"""
-    data = _load_requests()
-    
-    for request in data["requests"]:
-        if request["request_id"] == request_id:
-            # Converter datetime string para objeto
-            created_at = datetime.fromisoformat(request["created_at"])
-            updated_at = datetime.fromisoformat(request["updated_at"]) if request.get("updated_at") else None
-            
-            return GroupAccessRequest(
-                request_id=request["request_id"],
-                username=request["username"],
-                grupo=request["grupo"],
-                status=request["status"],
-                justificativa=request["justificativa"],
-                created_at=created_at,
-                updated_at=updated_at,
-                reviewed_by=request.get("reviewed_by"),
-                review_comment=request.get("review_comment")
-            )
-    
-    return None
+    with _locked_index() as index:
+        request = index.by_id.get(request_id)
+        return _to_model(request) if request else None
 
 def get_requests_by_user(username: str) -> List[GroupAccessRequest]:
     """Obtém todas as solicitações de um usuário"""
-    data = _load_requests()
-    user_requests = []
-    
-    for request in data["requests"]:
-        if request["username"] == username:
-            # Converter datetime string para objeto
-            created_at = datetime.fromisoformat(request["created_at"])
-            updated_at = datetime.fromisoformat(request["updated_at"]) if request.get("updated_at") else None
-            
-            user_requests.append(GroupAccessRequest(
-                request_id=request["request_id"],
-                username=request["username"],
-                grupo=request["grupo"],
-                status=request["status"],
-                justificativa=request["justificativa"],
-                created_at=created_at,
-                updated_at=updated_at,
-                reviewed_by=request.get("reviewed_by"),
-                review_comment=request.get("review_comment")
-            ))
-    
-    return user_requests
+    with _locked_index() as index:
+        return [_to_model(request) for request in index.by_user.get(username, [])]
+
+def get_pending_requests_by_admin(admin_username: str) -> List[GroupAccessRequest]:
+    """
+    Obtém solicitações pendentes para grupos onde o usuário é admin.
+
+    Usa o índice reverso usuário -> grupos administrados do RBAC e as pendentes por grupo,
+    então o custo é proporcional ao resultado, não ao número de grupos e solicitações.
+    """
+    rbac_index = get_rbac_index()
+    entry = rbac_index.usuarios.get(admin_username)
+    admin_groups = rbac_index.grupos_administrados.get(admin_username, frozenset())
+
+    with _locked_index() as index:
+        if entry and entry[0] == "global_admin":
+            # Admin global pode ver todas as solicitações
+            return [_to_model(request) for request in index.pending.values()]
 
-def get_pending_requests_by_admin(admin_username: str, rbac_data: Dict[str, Any]) -> List[GroupAccessRequest]:
-    """Obtém solicitações pendentes para grupos onde o usuário é admin"""
-    data = _load_requests()
-    admin_requests = []
-    
-    # Determinar os grupos onde o usuário é admin
-    admin_groups = []
-    if rbac_data["usuarios"][admin_username]["papel"] == "global_admin":
-        # Admin global pode ver todas as solicitações
-        admin_groups = list(rbac_data["grupos"].keys())
-    else:
         # Admin de grupo só pode ver solicitações para seus grupos
-        for group_name, group_data in rbac_data["grupos"].items():
-            if admin_username in group_data.get("admins", []):
-                admin_groups.append(group_name)
-    
-    # Filtrar solicitações pendentes para grupos do admin
-    for request in data["requests"]:
-        if request["status"] == RequestStatus.PENDING and request["grupo"] in admin_groups:
-            # Converter datetime string para objeto
-            created_at = datetime.fromisoformat(request["created_at"])
-            updated_at = datetime.fromisoformat(request["updated_at"]) if request.get("updated_at") else None
-            
-            admin_requests.append(GroupAccessRequest(
-                request_id=request["request_id"],
-                username=request["username"],
-                grupo=request["grupo"],
-                status=request["status"],
-                justificativa=request["justificativa"],
-                created_at=created_at,
-                updated_at=updated_at,
-                reviewed_by=request.get("reviewed_by"),
-                review_comment=request.get("review_comment")
-            ))
-    
-    return admin_requests
+        requests = [
+            request
+            for grupo in admin_groups
+            for request in index.pending_by_group.get(grupo, {}).values()
+        ]
+        if len(admin_groups) > 1:
+            # Mantém a ordem de criação entre grupos diferentes
+            requests.sort(key=lambda r: r["created_at"])
+        return [_to_model(request) for request in requests]
 
 def review_access_request(request_id: str, reviewer: str, status: RequestStatus, comment: Optional[str] = None) -> Optional[GroupAccessRequest]:
     """Revisa (aprova/rejeita) uma solicitação de acesso"""
-    data = _load_requests()
-    
-    for i, request in enumerate(data["requests"]):
-        if request["request_id"] == request_id:
-            # Atualizar solicitação
-            now = datetime.now()
-            data["requests"][i]["status"] = status
-            data["requests"][i]["updated_at"] = now.isoformat()
-            data["requests"][i]["reviewed_by"] = reviewer
-            data["requests"][i]["review_comment"] = comment
-            
-            _save_requests(data)
-            
-            created_at = datetime.fromisoformat(request["created_at"])
-            
-            logger.info(f"Solicitação {request_id} {status} por {reviewer}")
-            
-            return GroupAccessRequest(
-                request_id=request["request_id"],
-                username=request["username"],
-                grupo=request["grupo"],
-                status=status,
-                justificativa=request["justificativa"],
-                created_at=created_at,
-                updated_at=now,
-                reviewed_by=reviewer,
-                review_comment=comment
-            )
-    
-    return None
+    with _locked_index() as index:
+        request = index.by_id.get(request_id)
+        if request is None:
+            return None
+
+        # Atualizar solicitação
+        now = datetime.now()
+        request["status"] = status
+        request["updated_at"] = now.isoformat()
+        request["reviewed_by"] = reviewer
+        request["review_comment"] = comment
+        if status != RequestStatus.PENDING:
+            index.resolve(request)
+
+        _commit_or_raise(index)
+
+    logger.info(f"Solicitação {request_id} {status} por {reviewer}")
 
-def apply_approved_request(request_id: str, rbac_data: Dict[str, Any]) -> bool:
+    return _to_model(request)
+
+def _aplicar_cascata(aplicar: Callable[[_RequestIndex], int], descricao: str) -> int:
+    """
+    Aplica e grava a cascata de uma alteração de grupo já persistida no RBAC.
+
+    Uma falha de escrita descarta o índice em memória, então cada nova tentativa parte do
+    disco. Esgotadas as tentativas, a cascata fica pendente e é reaplicada na próxima carga
+    do índice, de forma que as solicitações não ficam apontando para o grupo antigo.
+    """
+    for tentativa in range(1, CASCADE_RETRIES + 1):
+        with _locked_index() as index:
+            alteradas = aplicar(index)
+            if not alteradas or _commit(index):
+                return alteradas
+        logger.warning(f"Falha ao gravar {descricao} (tentativa {tentativa}/{CASCADE_RETRIES})")
+        time.sleep(0.05 * tentativa)
+    with _index_lock:
+        _cascatas_pendentes.append(aplicar)
+    logger.error(f"Não foi possível gravar {descricao}; será reaplicada na próxima carga das solicitações")
+    return 0
+
+def rename_group_requests(antigo: str, novo: str) -> int:
+    """
+    Atualiza as solicitações de um grupo renomeado; retorna quantas mudaram.
+
+    Só as solicitações do grupo (índice por grupo) são tocadas, e o arquivo é regravado
+    uma única vez; sem solicitações do grupo, nada é escrito.
+    """
+    alteradas = _aplicar_cascata(lambda index: index.rename_group(antigo, novo), f"a renomeação do grupo {antigo} para {novo}")
+    if alteradas:
+        logger.info(f"{alteradas} solicitações movidas do grupo {antigo} para {novo}")
+    return alteradas
+
+def close_group_requests(grupo: str, reviewer: str) -> int:
+    """
+    Rejeita as solicitações pendentes de um grupo removido; retorna quantas foram fechadas.
+
+    O histórico já revisado é mantido. O arquivo é regravado uma única vez.
+    """
+    def _fechar(index: _RequestIndex) -> int:
+        pending = list(index.pending_by_group.get(grupo, {}).values())
+        now = datetime.now().isoformat()
+        for request in pending:
+            request["status"] = RequestStatus.REJECTED
+            request["updated_at"] = now
+            request["reviewed_by"] = reviewer
+            request["review_comment"] = "Grupo removido."
+            index.resolve(request)
+        return len(pending)
+
+    fechadas = _aplicar_cascata(_fechar, f"o fechamento das solicitações do grupo removido {grupo}")
+    if fechadas:
+        logger.info(f"{fechadas} solicitações pendentes do grupo removido {grupo} rejeitadas")
+    return fechadas
+
+def apply_approved_request(request_id: str) -> bool:
     """Aplica uma solicitação aprovada, adicionando o usuário ao grupo"""
     request = get_request_by_id(request_id)
     
     if not request or request.status != RequestStatus.APPROVED:
         return False
-    
-    # Verificar se o grupo existe
-    if request.grupo not in rbac_data["grupos"]:
-        logger.error(f"Grupo {request.grupo} não existe mais")
-        return False
-    
-    # Verificar se o usuário existe
-    if request.username not in rbac_data["usuarios"]:
-        logger.error(f"Usuário {request.username} não existe mais")
-        return False
-    
-    # Adicionar usuário ao grupo se ainda não estiver
-    if request.username not in rbac_data["grupos"][request.grupo]["users"]:
-        rbac_data["grupos"][request.grupo]["users"].append(request.username)
+
+    def _adicionar_ao_grupo(rbac: RBACModel):
+        # Verificar se o grupo existe
+        if request.grupo not in rbac.grupos:
+            logger.error(f"Grupo {request.grupo} não existe mais")
+            return NoChange(False)
         
-        # Atualizar os grupos do usuário
-        if request.grupo not in rbac_data["usuarios"][request.username]["grupos"]:
-            rbac_data["usuarios"][request.username]["grupos"].append(request.grupo)
+        # Verificar se o usuário existe
+        if request.username not in rbac.usuarios:
+            logger.error(f"Usuário {request.username} não existe mais")
+            return NoChange(False)
         
-        # Persistir alterações no RBAC
-        try:
-            rbac_path = Path(__file__).parent.parent.parent / 'data' / 'rbac.json'
-            with open(rbac_path, 'w', encoding='utf-8') as f:
-                json.dump(rbac_data, f, indent=2, ensure_ascii=False)
-                
-            logger.info(f"Usuário {request.username} adicionado ao grupo {request.grupo}")
-            return True
-        except Exception as e:
-            logger.error(f"Erro ao persistir alterações RBAC: {e}")
+        # Adicionar usuário ao grupo (e o grupo ao usuário)
+        if not rbac.add_member(request.grupo, request.username):
+            logger.info(f"Usuário {request.username} já pertence ao grupo {request.grupo}")
+            return NoChange(True)
+        return True
+
+    # Persistir alterações no RBAC
+    try:
+        if not update_rbac_model(_adicionar_ao_grupo):
             return False
-    
-    # Usuário já está no grupo
-    logger.info(f"Usuário {request.username} já pertence ao grupo {request.grupo}")
+    except Exception as e:
+        logger.error(f"Erro ao persistir alterações RBAC: {e}")
+        return False
+
+    logger.info(f"Usuário {request.username} adicionado ao grupo {request.grupo}")
     return True
+
+
+# Variantes assíncronas para os handlers: o acesso ao arquivo roda no pool de I/O de armazenamento
+async def create_access_request_async(username: str, grupo: str, justificativa: str) -> GroupAccessRequest:
+    return await run_io(create_access_request, username, grupo, justificativa)
+
+async def get_request_by_id_async(request_id: str) -> Optional[GroupAccessRequest]:
+    return await run_io(get_request_by_id, request_id)
+
+async def get_requests_by_user_async(username: str) -> List[GroupAccessRequest]:
+    return await run_io(get_requests_by_user, username)
+
+async def get_pending_requests_by_admin_async(admin_username: str) -> List[GroupAccessRequest]:
+    return await run_io(get_pending_requests_by_admin, admin_username)
+
+async def review_access_request_async(request_id: str, reviewer: str, status: RequestStatus, comment: Optional[str] = None) -> Optional[GroupAccessRequest]:
+    return await run_io(review_access_request, request_id, reviewer, status, comment)
+
+async def apply_approved_request_async(request_id: str) -> bool:
+    return await run_io(apply_approved_request, request_id)
+
+async def rename_group_requests_async(antigo: str, novo: str) -> int:
+    return await run_io(rename_group_requests, antigo, novo)
+
+async def close_group_requests_async(grupo: str, reviewer: str) -> int:
+    return await run_io(close_group_requests, grupo, reviewer)
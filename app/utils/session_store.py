@@ -0,0 +1,238 @@
+import hashlib
+import secrets
+import sqlite3
+import threading
+import time
+import logging
+from pathlib import Path
+from typing import List, Optional, Set, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidRefreshToken(Exception):
+    """Refresh token desconhecido, expirado ou de sessão revogada."""
+
+
+class RefreshTokenReuse(InvalidRefreshToken):
+    """Refresh token já rotacionado apresentado novamente; a sessão inteira é revogada."""
+
+    def __init__(self, sid: str, username: str):
+        super().__init__(f"Reuso de refresh token na sessão {sid}")
+        self.sid = sid
+        self.username = username
+
+
+def _hash_token(token: str) -> str:
+    # Apenas o hash do refresh token é persistido
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+class SessionStore:
+    """
+    Sessões de login com refresh tokens opacos rotativos, persistidas em SQLite.
+
+    Cada login abre uma sessão (`sid`, levado no access token). Cada uso de refresh token
+    o marca como consumido e emite o próximo da cadeia; apresentar um token já consumido
+    indica vazamento e revoga a sessão. As sessões revogadas ainda não expiradas são
+    mantidas em um conjunto em memória, de forma que a checagem no caminho quente é um
+    lookup O(1); o conjunto é ressincronizado com o banco quando outro processo o altera.
+    """
+
+    def __init__(self, db_path: str, refresh_ttl_seconds: int, sync_interval: float = 1.0):
+        self.db_path = db_path
+        self.refresh_ttl = refresh_ttl_seconds
+        self.sync_interval = sync_interval
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._revoked: Set[str] = set()
+        self._data_version: Optional[int] = None
+        self._next_sync = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS sessoes (
+                    sid TEXT PRIMARY KEY,
+                    username TEXT NOT NULL,
+                    criada_em REAL NOT NULL,
+                    expira_em REAL NOT NULL,
+                    revogada INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS idx_sessoes_username ON sessoes(username);
+                CREATE INDEX IF NOT EXISTS idx_sessoes_revogadas ON sessoes(revogada, expira_em);
+                CREATE TABLE IF NOT EXISTS refresh_tokens (
+                    token_hash TEXT PRIMARY KEY,
+                    sid TEXT NOT NULL,
+                    expira_em REAL NOT NULL,
+                    usado INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS idx_refresh_sid ON refresh_tokens(sid);
+            """)
+            self._conn = conn
+        return self._conn
+
+    def _sync_revoked(self, force: bool = False) -> None:
+        """Recarrega o conjunto de sessões revogadas se o banco mudou (chamado com o lock)."""
+        conn = self._connect()
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if not force and version == self._data_version:
+            return
+        now = time.time()
+        rows = conn.execute("SELECT sid FROM sessoes WHERE revogada = 1 AND expira_em > ?", (now,)).fetchall()
+        self._revoked = {r[0] for r in rows}
+        self._data_version = version
+
+    def is_revoked(self, sid: str) -> bool:
+        """Checagem O(1) usada na validação de cada access token."""
+        now = time.monotonic()
+        if now >= self._next_sync:
+            with self._lock:
+                self._sync_revoked()
+                self._next_sync = now + self.sync_interval
+        return sid in self._revoked
+
+    def is_active(self, sid: str, username: str) -> bool:
+        """Indica se a sessão existe, pertence ao usuário, não foi revogada e não expirou."""
+        now = time.time()
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT 1 FROM sessoes WHERE sid = ? AND username = ? AND revogada = 0 AND expira_em > ?",
+                (sid, username, now)
+            ).fetchone()
+        return row is not None
+
+    def _issue_refresh(self, conn: sqlite3.Connection, sid: str, now: float) -> str:
+        token = secrets.token_urlsafe(32)
+        conn.execute(
+            "INSERT INTO refresh_tokens (token_hash, sid, expira_em) VALUES (?, ?, ?)",
+            (_hash_token(token), sid, now + self.refresh_ttl)
+        )
+        return token
+
+    def create_session(self, username: str) -> Tuple[str, str]:
+        """Abre uma sessão e retorna (sid, refresh_token)."""
+        sid = secrets.token_urlsafe(16)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT INTO sessoes (sid, username, criada_em, expira_em) VALUES (?, ?, ?, ?)",
+                    (sid, username, now, now + self.refresh_ttl)
+                )
+                token = self._issue_refresh(conn, sid, now)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return sid, token
+
+    def rotate(self, refresh_token: str) -> Tuple[str, str, str]:
+        """
+        Consome um refresh token e emite o próximo da cadeia.
+
+        Returns:
+            Tuple[str, str, str]: (sid, username, novo_refresh_token)
+
+        Raises:
+            RefreshTokenReuse: O token já havia sido usado (a sessão é revogada)
+            InvalidRefreshToken: Token desconhecido, expirado ou de sessão revogada
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT t.sid, t.expira_em, t.usado, s.username, s.revogada, s.expira_em "
+                    "FROM refresh_tokens t JOIN sessoes s ON s.sid = t.sid WHERE t.token_hash = ?",
+                    (_hash_token(refresh_token),)
+                ).fetchone()
+                if row is None:
+                    raise InvalidRefreshToken("Refresh token desconhecido")
+                sid, token_exp, usado, username, revogada, sessao_exp = row
+                if usado:
+                    self._revoke_locked(conn, "sid = ?", (sid,))
+                    conn.execute("COMMIT")
+                    self._revoked.add(sid)
+                    raise RefreshTokenReuse(sid, username)
+                if revogada or token_exp <= now or sessao_exp <= now:
+                    raise InvalidRefreshToken("Refresh token expirado ou sessão revogada")
+                conn.execute("UPDATE refresh_tokens SET usado = 1 WHERE token_hash = ?", (_hash_token(refresh_token),))
+                # A sessão acompanha o último refresh emitido
+                conn.execute("UPDATE sessoes SET expira_em = ? WHERE sid = ?", (now + self.refresh_ttl, sid))
+                new_token = self._issue_refresh(conn, sid, now)
+                conn.execute("COMMIT")
+            except RefreshTokenReuse:
+                raise
+            except Exception:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+        return sid, username, new_token
+
+    def _revoke_locked(self, conn: sqlite3.Connection, where: str, params: tuple) -> List[str]:
+        sids = [r[0] for r in conn.execute(f"SELECT sid FROM sessoes WHERE revogada = 0 AND {where}", params)]
+        if sids:
+            conn.executemany("UPDATE sessoes SET revogada = 1 WHERE sid = ?", [(s,) for s in sids])
+        return sids
+
+    def _revoke(self, where: str, params: tuple) -> int:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                sids = self._revoke_locked(conn, where, params)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            self._revoked.update(sids)
+        return len(sids)
+
+    def revoke_session(self, sid: str) -> bool:
+        """Revoga uma sessão (logout); access tokens dela deixam de ser aceitos."""
+        return self._revoke("sid = ?", (sid,)) > 0
+
+    def revoke_user(self, username: str) -> int:
+        """Revoga todas as sessões ativas de um usuário e retorna quantas foram revogadas."""
+        return self._revoke("username = ?", (username,))
+
+    def purge_expired(self) -> int:
+        """Remove sessões e refresh tokens expirados, mantendo o banco e o conjunto compactos."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM refresh_tokens WHERE expira_em <= ? OR sid IN (SELECT sid FROM sessoes WHERE expira_em <= ?)", (now, now))
+                removed = conn.execute("DELETE FROM sessoes WHERE expira_em <= ?", (now,)).rowcount
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            self._sync_revoked(force=True)
+        return removed
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+                self._data_version = None
+
+
+# Instância padrão usada pela aplicação
+session_store = SessionStore(
+    db_path=settings.SESSIONS_DB,
+    refresh_ttl_seconds=settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400,
+    sync_interval=settings.SESSION_REVOCATION_SYNC_SECONDS,
+)
@@ -0,0 +1,84 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call(Generic[T]):
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[T] = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalescência de chamadas síncronas concorrentes (threads) para a mesma chave.
+
+    A primeira chamada para uma chave executa `fn`; as que chegarem enquanto ela estiver em
+    andamento aguardam e recebem o mesmo resultado (ou a mesma exceção). Terminada a
+    execução a chave é liberada, então chamadas posteriores executam `fn` novamente.
+    O resultado é compartilhado: deve ser tratado como somente leitura pelos chamadores.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
+
+
+class AsyncSingleFlight:
+    """
+    Variante para corrotinas: chamadas concorrentes para a mesma chave aguardam a mesma tarefa.
+
+    A operação roda em uma tarefa própria, de forma que o cancelamento de um dos chamadores
+    (ex.: cliente desconectado) não cancela a operação para os demais.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, "asyncio.Future[Any]"] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t, k=key: self._release(k, t))
+        return await asyncio.shield(task)
+
+    def _release(self, key: Hashable, task: "asyncio.Future[Any]") -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Evita o aviso de exceção não recuperada quando todos os chamadores desistiram
+            task.exception()
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
@@ -0,0 +1,202 @@
+import gzip
+import logging
+import mimetypes
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, PlainTextResponse, Response
+from starlette.types import Receive, Scope, Send
+
+from app.utils.compression import codificacoes_aceitas
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Codificações na ordem de preferência e extensão dos arquivos pré-comprimidos gerados no build
+CODIFICACOES: Tuple[Tuple[str, str], ...] = (("br", ".br"), ("gzip", ".gz"))
+
+# Tipos que valem a pena comprimir (imagens, fontes woff2 etc. já são comprimidos)
+_COMPRIMIVEIS = ("text/", "application/javascript", "application/json", "application/xml", "image/svg+xml", "application/wasm", "application/manifest+json")
+# Arquivos menores que isso não são comprimidos: o ganho não paga o Content-Encoding
+COMPRESSAO_MIN_BYTES = 1024
+
+# Assets com hash no nome gerados pelo Vite (ex.: assets/index-B9x3kQ_d.js)
+_HASHEADO = re.compile(r"(^|/)assets/.+-[A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$")
+CACHE_IMUTAVEL = "public, max-age=31536000, immutable"
+CACHE_REVALIDAR = "no-cache"
+
+
+def comprimivel(content_type: str) -> bool:
+    return content_type.startswith(_COMPRIMIVEIS)
+
+
+def comprimir(dados: bytes, codificacao: str, nivel_maximo: bool = False) -> Optional[bytes]:
+    """Comprime `dados`; `None` se a codificação não estiver disponível (brotli é opcional)."""
+    if codificacao == "gzip":
+        return gzip.compress(dados, compresslevel=9 if nivel_maximo else 6, mtime=0)
+    if codificacao == "br" and brotli is not None:
+        return brotli.compress(dados, quality=11 if nivel_maximo else 5)
+    return None
+
+
+class _Variante:
+    __slots__ = ("etag", "tamanho", "corpo", "caminho")
+
+    def __init__(self, etag: str, tamanho: int, corpo: Optional[bytes] = None, caminho: Optional[str] = None):
+        self.etag = etag
+        self.tamanho = tamanho
+        self.corpo = corpo
+        self.caminho = caminho
+
+
+class _Arquivo:
+    __slots__ = ("content_type", "cache_control", "mtime", "last_modified", "variantes")
+
+    def __init__(self, content_type: str, cache_control: str, mtime: int, variantes: Dict[str, _Variante]):
+        self.content_type = content_type
+        self.cache_control = cache_control
+        self.mtime = mtime
+        self.last_modified = formatdate(mtime, usegmt=True)
+        # "identity" mais as codificações disponíveis
+        self.variantes = variantes
+
+
+class PrecompressedStaticFiles:
+    """
+    Serve um build estático (ex.: `frontend/dist`) a partir de um índice montado na inicialização.
+
+    Para cada arquivo o índice guarda tipo, ETag, Last-Modified e política de cache, de forma que
+    nenhuma requisição faz `stat` e requisições condicionais (`If-None-Match`/`If-Modified-Since`)
+    são respondidas com 304 sem tocar o disco. Arquivos de texto recebem versões br/gzip: as
+    geradas no build (`app/scripts/precompress_frontend.py`, irmãos `.br`/`.gz`) são servidas do
+    disco; na falta delas, são comprimidos na inicialização e mantidos em memória. Arquivos até
+    `memoria_max_bytes` também ficam em memória sem compressão. Assets com hash no nome
+    (`assets/*-<hash>.*`) recebem `Cache-Control: immutable`; os demais (ex.: `index.html`)
+    são revalidados a cada uso. Como `StaticFiles(html=True)`, diretórios servem `index.html`
+    e caminhos inexistentes servem `404.html`, se houver. Alterações no diretório só são
+    vistas após reiniciar o processo (um novo deploy).
+    """
+
+    def __init__(self, directory: str, html: bool = True, memoria_max_bytes: int = 64 * 1024):
+        self.directory = os.path.realpath(directory)
+        self.html = html
+        self.memoria_max_bytes = memoria_max_bytes
+        self.arquivos: Dict[str, _Arquivo] = {}
+        self._indexar()
+
+    def _indexar(self) -> None:
+        bytes_memoria = 0
+        for raiz, _, nomes in os.walk(self.directory):
+            for nome in nomes:
+                caminho = os.path.join(raiz, nome)
+                relativo = os.path.relpath(caminho, self.directory).replace(os.sep, "/")
+                base, ext = os.path.splitext(caminho)
+                if ext in (".br", ".gz") and os.path.exists(base):
+                    continue  # variante pré-comprimida de outro arquivo
+                arquivo = self._indexar_arquivo(caminho, relativo)
+                self.arquivos[relativo] = arquivo
+                bytes_memoria += sum(len(v.corpo) for v in arquivo.variantes.values() if v.corpo is not None)
+        logger.info(f"Frontend estático indexado: {len(self.arquivos)} arquivos, {bytes_memoria} bytes em memória")
+
+    def _indexar_arquivo(self, caminho: str, relativo: str) -> _Arquivo:
+        st = os.stat(caminho)
+        etag = f"{st.st_mtime_ns:x}-{st.st_size:x}"
+        content_type = mimetypes.guess_type(caminho)[0] or "application/octet-stream"
+        if content_type.startswith("text/") or content_type == "application/javascript":
+            content_type += "; charset=utf-8"
+        corpo: Optional[bytes] = None
+        if st.st_size <= self.memoria_max_bytes:
+            with open(caminho, "rb") as f:
+                corpo = f.read()
+        variantes = {"identity": _Variante(f'"{etag}"', st.st_size, corpo=corpo, caminho=None if corpo is not None else caminho)}
+
+        if comprimivel(content_type) and st.st_size >= COMPRESSAO_MIN_BYTES:
+            original = corpo
+            for codificacao, sufixo in CODIFICACOES:
+                irmao = caminho + sufixo
+                etag_variante = f'"{etag}-{codificacao}"'
+                if os.path.exists(irmao) and os.stat(irmao).st_mtime_ns >= st.st_mtime_ns:
+                    variantes[codificacao] = _Variante(etag_variante, os.path.getsize(irmao), caminho=irmao)
+                    continue
+                if original is None:
+                    with open(caminho, "rb") as f:
+                        original = f.read()
+                comprimido = comprimir(original, codificacao)
+                if comprimido is not None and len(comprimido) < len(original):
+                    variantes[codificacao] = _Variante(etag_variante, len(comprimido), corpo=comprimido)
+
+        cache_control = CACHE_IMUTAVEL if _HASHEADO.search(relativo) else CACHE_REVALIDAR
+        return _Arquivo(content_type, cache_control, int(st.st_mtime), variantes)
+
+    def _resolver(self, path: str) -> Tuple[Optional[_Arquivo], int]:
+        relativo = path.lstrip("/")
+        if ".." in relativo.split("/"):
+            return None, 404
+        arquivo = self.arquivos.get(relativo)
+        if arquivo is None and self.html:
+            arquivo = self.arquivos.get((relativo.rstrip("/") + "/index.html").lstrip("/"))
+        if arquivo is not None:
+            return arquivo, 200
+        if self.html and "404.html" in self.arquivos:
+            return self.arquivos["404.html"], 404
+        return None, 404
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        assert scope["type"] == "http"
+        if scope["method"] not in ("GET", "HEAD"):
+            response: Response = PlainTextResponse("Method Not Allowed", status_code=405, headers={"Allow": "GET, HEAD"})
+            await response(scope, receive, send)
+            return
+        path = scope.get("path", "/")
+        root_path = scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        arquivo, status_code = self._resolver(path)
+        if arquivo is None:
+            await PlainTextResponse("Not Found", status_code=404)(scope, receive, send)
+            return
+        await self._responder(arquivo, status_code, Headers(scope=scope))(scope, receive, send)
+
+    def _responder(self, arquivo: _Arquivo, status_code: int, request_headers: Headers) -> Response:
+        aceitas = codificacoes_aceitas(request_headers.get("accept-encoding", ""))
+        codificacao = next((c for c, _ in CODIFICACOES if c in arquivo.variantes and c in aceitas), "identity")
+        variante = arquivo.variantes[codificacao]
+        headers = {
+            "cache-control": arquivo.cache_control,
+            "etag": variante.etag,
+            "last-modified": arquivo.last_modified,
+            "content-type": arquivo.content_type,
+        }
+        if len(arquivo.variantes) > 1:
+            headers["vary"] = "Accept-Encoding"
+        if codificacao != "identity":
+            headers["content-encoding"] = codificacao
+
+        if status_code == 200 and self._nao_modificado(arquivo, request_headers):
+            headers.pop("content-type")
+            return Response(status_code=304, headers=headers)
+        if variante.corpo is None:
+            return FileResponse(variante.caminho, status_code=status_code, headers=headers, media_type=arquivo.content_type)
+        return Response(content=variante.corpo, status_code=status_code, headers=headers)
+
+    @staticmethod
+    def _nao_modificado(arquivo: _Arquivo, request_headers: Headers) -> bool:
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            etags = {v.etag for v in arquivo.variantes.values()}
+            pedidas = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+            return "*" in pedidas or bool(etags & pedidas)
+        if_modified_since = request_headers.get("if-modified-since")
+        if if_modified_since is None:
+            return False
+        try:
+            return parsedate_to_datetime(if_modified_since).timestamp() >= arquivo.mtime
+        except (TypeError, ValueError):
+            return False
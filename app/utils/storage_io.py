@@ -0,0 +1,45 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from app.config import settings
+
+T = TypeVar("T")
+
+_executor_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.STORAGE_IO_THREADS,
+                    thread_name_prefix="storage-io",
+                )
+    return _executor
+
+
+async def run_io(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Executa uma operação de armazenamento bloqueante no pool de threads de I/O.
+
+    O pool é separado do executor padrão do asyncio (usado por `asyncio.to_thread` e por
+    dependências síncronas do FastAPI), de forma que um volume lento ocupa apenas as threads
+    de I/O e não atrasa requisições que não tocam o disco no mesmo worker.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), functools.partial(fn, *args, **kwargs))
+
+
+def shutdown() -> None:
+    """Aguarda as operações pendentes e encerra o pool (chamado no desligamento da aplicação)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
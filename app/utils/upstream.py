@@ -0,0 +1,37 @@
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.config import settings
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_upstream_client() -> httpx.AsyncClient:
+    """Cliente HTTP compartilhado (pool de conexões) para os backends das ferramentas."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(timeout=settings.PROXY_TIMEOUT_SECONDS, follow_redirects=False)
+    return _client
+
+
+async def close_upstream_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def upstream_base(tool: Dict[str, Any]) -> Optional[str]:
+    """
+    URL do backend de uma ferramenta do catálogo.
+
+    `url_base` absolutas são usadas como estão; relativas (ex.: `/tools/ferramenta_x`, rotas
+    do próprio gateway) só são proxyadas se `TOOLS_UPSTREAM_BASE_URL` estiver configurada.
+    """
+    url_base = tool.get("url_base") or ""
+    if url_base.startswith(("http://", "https://")):
+        return url_base
+    if url_base and settings.TOOLS_UPSTREAM_BASE_URL:
+        return settings.TOOLS_UPSTREAM_BASE_URL.rstrip("/") + "/" + url_base.lstrip("/")
+    return None
@@ -213,9 +213,20 @@ def manage_test_data_files():
         print("Criando arquivo de solicitações vazio...")
         with open(WORKING_REQUESTS_FILE, 'w') as f:
             json.dump(fallback_requests, f, indent=2)
+
+    # Guarda o estado inicial para restaurá-lo ao fim do teste (arquivos de trabalho são versionados)
+    with open(WORKING_RBAC_FILE, 'rb') as f:
+        initial_rbac_bytes = f.read()
+    with open(WORKING_REQUESTS_FILE, 'rb') as f:
+        initial_requests_bytes = f.read()
             
     yield
 
+    with open(WORKING_RBAC_FILE, 'wb') as f:
+        f.write(initial_rbac_bytes)
+    with open(WORKING_REQUESTS_FILE, 'wb') as f:
+        f.write(initial_requests_bytes)
+
 
 @pytest.fixture(scope="session", autouse=True)
 def verify_test_data():
@@ -266,3 +277,11 @@ def auth_token_for_user(client: TestClient):
             print(f"Falha ao obter token. Resposta: {response.text}")
             return None
     return _get_token
+
+
+@pytest.fixture(autouse=True)
+def reset_login_guard():
+    """Contadores de tentativas de login não passam de um teste para outro."""
+    from app.utils.login_guard import login_guard
+    login_guard.reset()
+    yield
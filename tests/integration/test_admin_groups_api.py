@@ -592,3 +592,17 @@ def test_remove_tool_from_group_tool_not_in_group(client: TestClient, auth_token
 
 # TODO: Add tests for tool management by group admins.
 # TODO: Add tests for GET /grupos/disponivel
+
+
+def test_rename_and_delete_group_with_membership_only_on_user_side(client: TestClient, auth_token_for_user):
+    token = auth_token_for_user("globaladmin", "password_global")
+    headers = {"Authorization": f"Bearer {token}"}
+    client.post("/tools/grupos", headers=headers, json={"nome": "gx", "descricao": "temp"})
+    # PUT /usuarios só registra a associação do lado do usuário
+    assert client.put("/tools/usuarios/plainuser", headers=headers, json={"grupos": ["gx"], "ferramentas_disponiveis": []}).status_code == 200
+
+    assert client.put("/tools/grupos/gx", headers=headers, json={"nome": "gy"}).status_code == 200
+    assert load_rbac_data(WORKING_RBAC_FILE)["usuarios"]["plainuser"]["grupos"] == ["gy"]
+
+    assert client.delete("/tools/grupos/gy", headers=headers).status_code == 200
+    assert load_rbac_data(WORKING_RBAC_FILE)["usuarios"]["plainuser"]["grupos"] == []
@@ -0,0 +1,40 @@
+# mcp-server/tests/integration/test_audit_api.py
+from fastapi.testclient import TestClient
+
+
+def test_tool_execution_is_audited(client: TestClient, auth_token_for_user):
+    user_token = auth_token_for_user("testuser1", "password123")
+    admin_token = auth_token_for_user("globaladmin", "password_global")
+    assert user_token and admin_token
+
+    client.get("/tools/ferramenta_z", headers={"Authorization": f"Bearer {user_token}"})
+
+    response = client.get(
+        "/tools/auditoria/",
+        params={"usuario": "testuser1", "ferramenta": "ferramenta_z"},
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 200
+    eventos = response.json()
+    assert eventos, "Nenhum evento de auditoria retornado"
+    assert eventos[0]["usuario"] == "testuser1"
+    assert eventos[0]["ferramenta"] == "ferramenta_z"
+    assert eventos[0]["evento"] in ("ferramenta_executada", "acesso_negado")
+
+
+def test_admin_action_is_audited(client: TestClient, auth_token_for_user):
+    admin_token = auth_token_for_user("globaladmin", "password_global")
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    response = client.post("/tools/grupos", headers=headers, json={"nome": "grupo_auditado"})
+    assert response.status_code == 200
+
+    response = client.get("/tools/auditoria/", params={"evento": "grupo_criado"}, headers=headers)
+    assert response.status_code == 200
+    assert any(e["alvo"] == "grupo_auditado" and e["usuario"] == "globaladmin" for e in response.json())
+
+
+def test_audit_query_forbidden_for_regular_user(client: TestClient, auth_token_for_user):
+    token = auth_token_for_user("testuser1", "password123")
+    response = client.get("/tools/auditoria/", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 403
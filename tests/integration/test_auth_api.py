@@ -79,3 +79,40 @@ def test_refresh_token_malformed_jwt(client: TestClient):
     response = client.post("/tools/refresh-token", headers=headers)
     assert response.status_code == 401
     assert response.json().get("detail") == "Token inválido"
+
+
+def test_login_lockout_enforced_before_password_check(client: TestClient, monkeypatch):
+    from app.config import settings
+    from app.groups import routes
+
+    for _ in range(settings.LOGIN_GUARD_MAX_FAILURES_USER):
+        assert client.post("/tools/login", json={"username": "testuser1", "password": "errada"}).status_code == 401
+
+    chamadas = []
+    monkeypatch.setattr(routes, "authenticate_user", lambda *args: chamadas.append(args))
+    response = client.post("/tools/login", json={"username": "testuser1", "password": "password123"})
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) > 0
+    assert chamadas == []
+    # Outro usuário do mesmo IP não é afetado
+    monkeypatch.undo()
+    assert client.post("/tools/login", json={"username": "globaladmin", "password": "password_global"}).status_code == 200
+
+
+def test_login_rehashes_legacy_password_and_reports_bcrypt_cost(client: TestClient, auth_token_for_user):
+    from app.config import settings
+    from app.utils.dependencies import get_rbac_data
+
+    assert client.post("/tools/login", json={"username": "plainuser", "password": "plainpassword"}).status_code == 200
+    senha = get_rbac_data(settings.RBAC_FILE)["usuarios"]["plainuser"]["senha"]
+    assert senha.startswith(f"$2b${settings.BCRYPT_ROUNDS:02d}$")
+    # O login segue funcionando com o hash novo
+    assert client.post("/tools/login", json={"username": "plainuser", "password": "plainpassword"}).status_code == 200
+
+    token = auth_token_for_user("globaladmin", "password_global")
+    response = client.get("/tools/admin/bcrypt", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    dados = response.json()
+    assert dados["custo"] == settings.BCRYPT_ROUNDS
+    assert dados["origem"] == "configurado"
+    assert dados["rehashes"] >= 1
@@ -0,0 +1,41 @@
+# mcp-server/tests/integration/test_cors_api.py
+from fastapi.testclient import TestClient
+
+from app.config import settings
+
+PREFLIGHT = {
+    "Origin": "http://localhost:5173",
+    "Access-Control-Request-Method": "GET",
+    "Access-Control-Request-Headers": "authorization",
+}
+
+
+def test_preflight_allowed_origin_with_long_max_age(client: TestClient):
+    response = client.options("/tools/ferramenta_x", headers=PREFLIGHT)
+    assert response.status_code == 200
+    assert response.headers["access-control-allow-origin"] == "http://localhost:5173"
+    assert response.headers["access-control-max-age"] == str(settings.CORS_MAX_AGE)
+    assert response.headers["access-control-allow-credentials"] == "true"
+
+    # Mesma combinação: resposta pré-computada, idêntica
+    repetida = client.options("/tools/usuarios", headers=PREFLIGHT)
+    assert repetida.status_code == 200 and dict(repetida.headers) == dict(response.headers)
+
+
+def test_preflight_rejects_unknown_origin(client: TestClient):
+    response = client.options("/tools/ferramenta_x", headers={**PREFLIGHT, "Origin": "http://malicioso.exemplo"})
+    assert response.status_code == 400
+    assert "access-control-allow-origin" not in response.headers
+
+    simples = client.get("/tools/health", headers={"Origin": "http://malicioso.exemplo"})
+    assert "access-control-allow-origin" not in simples.headers
+    assert client.get("/tools/health", headers={"Origin": "http://localhost:3000"}).headers["access-control-allow-origin"] == "http://localhost:3000"
+
+
+def test_plain_options_answered_for_any_route(client: TestClient):
+    response = client.options("/tools/ferramenta_x")
+    assert response.status_code == 204
+    assert response.headers["allow"] == "GET, OPTIONS"
+    # Rotas com parâmetros (ex.: proxy das ferramentas do catálogo) também
+    assert client.options("/tools/proxy/tool_x/itens").headers["allow"] == "GET, OPTIONS"
+    assert client.options("/tools/grupos/group1").headers["allow"] == "DELETE, OPTIONS, PUT"
@@ -0,0 +1,99 @@
+# mcp-server/tests/integration/test_introspect_api.py
+import threading
+
+from fastapi.testclient import TestClient
+
+from app.groups import introspect_routes
+
+
+def test_introspect_batch_claims_and_decisions(client: TestClient, auth_token_for_user):
+    user_token = auth_token_for_user("testuser1", "password123")
+    admin_token = auth_token_for_user("globaladmin", "password_global")
+    assert user_token and admin_token
+
+    response = client.post("/tools/introspect", json={"itens": [
+        {"token": user_token, "ferramenta": "tool_x"},
+        {"token": user_token, "ferramenta": "tool_y"},
+        {"token": admin_token, "ferramenta": "tool_y"},
+        {"token": user_token},
+    ]})
+    assert response.status_code == 200
+    resultados = response.json()["resultados"]
+    assert len(resultados) == 4
+
+    assert resultados[0]["ativo"] and resultados[0]["usuario"] == "testuser1"
+    assert resultados[0]["autorizado"] is True
+    assert resultados[1]["autorizado"] is False
+    assert resultados[2]["papel"] == "global_admin" and resultados[2]["autorizado"] is True
+    assert resultados[3]["grupos"] == ["group1"] and resultados[3]["autorizado"] is None
+
+
+def test_introspect_validates_distinct_tokens_off_event_loop(client: TestClient, auth_token_for_user, monkeypatch):
+    user_token = auth_token_for_user("testuser1", "password123")
+    threads = []
+    validar = introspect_routes._validar
+
+    def _espiao(token):
+        threads.append(threading.current_thread().name)
+        return validar(token)
+    monkeypatch.setattr(introspect_routes, "_validar", _espiao)
+
+    response = client.post("/tools/introspect", json={"itens": [{"token": user_token}, {"token": user_token}, {"token": "x"}]})
+    assert response.status_code == 200
+    assert len(threads) == 2
+    assert all(nome.startswith("storage-io") for nome in threads)
+
+
+def test_introspect_invalid_token_is_inactive(client: TestClient):
+    response = client.post("/tools/introspect", json={"itens": [{"token": "nao.e.um.token", "ferramenta": "tool_x"}]})
+    assert response.status_code == 200
+    resultado = response.json()["resultados"][0]
+    assert resultado["ativo"] is False
+    assert resultado["erro"] == "Token inválido"
+    assert resultado["autorizado"] is False
+
+
+def test_introspect_reflects_rbac_changes(client: TestClient, auth_token_for_user):
+    user_token = auth_token_for_user("testuser1", "password123")
+    admin_token = auth_token_for_user("globaladmin", "password_global")
+    item = {"itens": [{"token": user_token, "ferramenta": "tool_y"}]}
+    assert client.post("/tools/introspect", json=item).json()["resultados"][0]["autorizado"] is False
+
+    response = client.post(
+        "/tools/grupos/group1/ferramentas",
+        headers={"Authorization": f"Bearer {admin_token}"},
+        json={"tool_id": "tool_y"}
+    )
+    assert response.status_code == 200
+    assert client.post("/tools/introspect", json=item).json()["resultados"][0]["autorizado"] is True
+
+
+def test_group_removal_applies_to_existing_token(client: TestClient, auth_token_for_user):
+    user_token = auth_token_for_user("testuser1", "password123")
+    admin_token = auth_token_for_user("globaladmin", "password_global")
+    item = {"itens": [{"token": user_token, "ferramenta": "tool_x"}]}
+    assert client.post("/tools/introspect", json=item).json()["resultados"][0]["autorizado"] is True
+
+    response = client.delete(
+        "/tools/grupos/group1/usuarios/testuser1",
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 200
+
+    # O token emitido antes da remoção deixa de conceder o grupo sem precisar expirar
+    resultado = client.post("/tools/introspect", json=item).json()["resultados"][0]
+    assert resultado["ativo"] is True
+    assert resultado["grupos"] == []
+    assert resultado["autorizado"] is False
+
+
+def test_token_of_deleted_user_is_rejected(client: TestClient, auth_token_for_user):
+    user_token = auth_token_for_user("plainuser", "plainpassword")
+    admin_token = auth_token_for_user("globaladmin", "password_global")
+    assert user_token
+
+    response = client.delete("/tools/usuarios/plainuser", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 200
+
+    resultado = client.post("/tools/introspect", json={"itens": [{"token": user_token}]}).json()["resultados"][0]
+    assert resultado["ativo"] is False
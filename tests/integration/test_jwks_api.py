@@ -0,0 +1,42 @@
+# mcp-server/tests/integration/test_jwks_api.py
+import jwt
+from fastapi.testclient import TestClient
+
+
+def test_jwks_publishes_token_kid(client: TestClient, auth_token_for_user):
+    token = auth_token_for_user("testuser1", "password123")
+    assert token
+    kid = jwt.get_unverified_header(token)["kid"]
+
+    response = client.get("/.well-known/jwks.json")
+    assert response.status_code == 200
+    assert "max-age" in response.headers["cache-control"]
+    chaves = response.json()["keys"]
+    assert any(k["kid"] == kid for k in chaves)
+    assert all("d" not in k for k in chaves), "JWKS não pode expor material privado"
+
+
+def test_rotation_keeps_old_tokens_valid(client: TestClient, auth_token_for_user):
+    admin_token = auth_token_for_user("globaladmin", "password_global")
+    old_kid = jwt.get_unverified_header(admin_token)["kid"]
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    response = client.post("/tools/admin/jwt/rotacionar", headers=headers)
+    assert response.status_code == 200
+    new_kid = response.json()["kid"]
+    assert new_kid != old_kid
+
+    # Token assinado pela chave anterior continua aceito
+    response = client.get("/tools/grupos", headers=headers)
+    assert response.status_code == 200
+
+    new_token = auth_token_for_user("globaladmin", "password_global")
+    assert jwt.get_unverified_header(new_token)["kid"] == new_kid
+    kids = {k["kid"] for k in client.get("/.well-known/jwks.json").json()["keys"]}
+    assert {old_kid, new_kid} <= kids
+
+
+def test_rotation_forbidden_for_regular_user(client: TestClient, auth_token_for_user):
+    token = auth_token_for_user("testuser1", "password123")
+    response = client.post("/tools/admin/jwt/rotacionar", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 403
@@ -0,0 +1,214 @@
+# mcp-server/tests/integration/test_proxy_api.py
+import gzip
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.utils import upstream
+from app.utils.rbac_store import update_rbac
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    chamadas = []
+
+    def _handler(request: httpx.Request):
+        chamadas.append(str(request.url))
+        if request.url.path.endswith("/falha"):
+            raise httpx.ConnectError("backend fora do ar", request=request)
+        return httpx.Response(200, json={"path": request.url.path, "q": request.url.query.decode()}, headers={"ETag": "v1", "X-Interno": "nao-repassar"})
+
+    def _url_base(rbac):
+        rbac["ferramentas"]["tool_x"]["url_base"] = "http://backend.interno/api/x"
+    update_rbac(_url_base)
+    monkeypatch.setattr(upstream, "_client", httpx.AsyncClient(transport=httpx.MockTransport(_handler)))
+    return chamadas
+
+
+def test_proxy_forwards_get_for_allowed_tool(client: TestClient, auth_token_for_user, backend):
+    token = auth_token_for_user("testuser1", "password123")
+    response = client.get("/tools/proxy/tool_x/itens/1?detalhe=sim", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert response.json() == {"path": "/api/x/itens/1", "q": "detalhe=sim"}
+    assert response.headers["etag"] == "v1"
+    assert "x-interno" not in response.headers
+    assert backend == ["http://backend.interno/api/x/itens/1?detalhe=sim"]
+
+
+def test_proxy_denies_tool_outside_user_groups(client: TestClient, auth_token_for_user, backend):
+    token = auth_token_for_user("testuser1", "password123")
+    response = client.get("/tools/proxy/tool_y/itens", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 403
+    assert backend == []
+
+
+def test_proxy_relative_url_base_and_upstream_errors(client: TestClient, auth_token_for_user, backend):
+    token = auth_token_for_user("globaladmin", "password_global")
+    # url_base relativa sem TOOLS_UPSTREAM_BASE_URL: não há backend HTTP para proxy
+    assert client.get("/tools/proxy/tool_y/", headers={"Authorization": f"Bearer {token}"}).status_code == 404
+    assert client.get("/tools/proxy/tool_x/falha", headers={"Authorization": f"Bearer {token}"}).status_code == 502
+
+
+def test_proxy_batch_streams_results_per_call(client: TestClient, auth_token_for_user, backend):
+    token = auth_token_for_user("testuser1", "password123")
+    chamadas = [
+        {"ferramenta": "tool_x", "path": "itens/1"},
+        {"ferramenta": "tool_y", "path": "itens"},
+        {"ferramenta": "tool_x", "path": "falha"},
+        {"ferramenta": "tool_x", "path": "itens/2", "query": {"detalhe": "sim"}},
+    ]
+    response = client.post("/tools/proxy/lote", json={"chamadas": chamadas}, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    resultados = {r["indice"]: r for r in map(json.loads, response.text.splitlines())}
+    assert sorted(resultados) == [0, 1, 2, 3]
+    assert resultados[0]["status"] == 200 and json.loads(resultados[0]["corpo"])["path"] == "/api/x/itens/1"
+    assert resultados[1]["status"] == 403
+    assert resultados[2]["status"] == 502
+    assert json.loads(resultados[3]["corpo"])["q"] == "detalhe=sim"
+    # A chamada negada não chega ao backend
+    assert sorted(backend) == sorted([
+        "http://backend.interno/api/x/itens/1",
+        "http://backend.interno/api/x/falha",
+        "http://backend.interno/api/x/itens/2?detalhe=sim",
+    ])
+
+
+def test_proxy_batch_limits(client: TestClient, auth_token_for_user, backend, monkeypatch):
+    token = auth_token_for_user("testuser1", "password123")
+    monkeypatch.setattr(settings, "PROXY_BATCH_MAX_CALLS", 2)
+    chamadas = [{"ferramenta": "tool_x"}] * 3
+    response = client.post("/tools/proxy/lote", json={"chamadas": chamadas}, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 413
+    assert client.post("/tools/proxy/lote", json={"chamadas": []}, headers={"Authorization": f"Bearer {token}"}).status_code == 422
+
+
+def test_proxy_streams_sse_and_unsized_responses(client: TestClient, auth_token_for_user, monkeypatch):
+    async def _eventos():
+        for i in range(3):
+            yield f"data: evento {i}\n\n".encode()
+
+    def _handler(request: httpx.Request):
+        if request.url.path.endswith("/eventos"):
+            return httpx.Response(200, content=_eventos(), headers={"Content-Type": "text/event-stream"})
+        return httpx.Response(200, content=_eventos(), headers={"Content-Type": "application/octet-stream"})
+
+    def _url_base(rbac):
+        rbac["ferramentas"]["tool_x"]["url_base"] = "http://backend.interno/api/x"
+    update_rbac(_url_base)
+    monkeypatch.setattr(upstream, "_client", httpx.AsyncClient(transport=httpx.MockTransport(_handler)))
+    token = auth_token_for_user("testuser1", "password123")
+
+    with client.stream("GET", "/tools/proxy/tool_x/eventos", headers={"Authorization": f"Bearer {token}"}) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert response.headers["x-accel-buffering"] == "no"
+        assert [linha for linha in response.iter_lines() if linha] == ["data: evento 0", "data: evento 1", "data: evento 2"]
+
+    # Sem Content-Length: transmitido em vez de bufferizado
+    response = client.get("/tools/proxy/tool_x/bruto", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert "content-length" not in response.headers
+    assert response.text.count("evento") == 3
+
+    # No lote o corpo é embutido no NDJSON, então respostas transmitidas são limitadas
+    monkeypatch.setattr(settings, "PROXY_BUFFER_MAX_BYTES", 20)
+    response = client.post("/tools/proxy/lote", json={"chamadas": [{"ferramenta": "tool_x", "path": "bruto"}]}, headers={"Authorization": f"Bearer {token}"})
+    resultado = json.loads(response.text)
+    assert resultado["truncado"] is True and len(resultado["corpo"]) == 20
+
+
+def test_proxy_passes_through_upstream_encoded_stream(client: TestClient, auth_token_for_user, monkeypatch):
+    corpo = gzip.compress(b'{"itens": []}' * 500)
+
+    async def _blocos():
+        yield corpo
+
+    def _handler(request: httpx.Request):
+        return httpx.Response(200, content=_blocos(), headers={"Content-Type": "application/json", "Content-Encoding": "gzip"})
+
+    def _url_base(rbac):
+        rbac["ferramentas"]["tool_x"]["url_base"] = "http://backend.interno/api/x"
+    update_rbac(_url_base)
+    monkeypatch.setattr(upstream, "_client", httpx.AsyncClient(transport=httpx.MockTransport(_handler)))
+    token = auth_token_for_user("testuser1", "password123")
+
+    with client.stream("GET", "/tools/proxy/tool_x/itens", headers={"Authorization": f"Bearer {token}", "Accept-Encoding": "gzip"}) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        assert b"".join(response.iter_raw()) == corpo
+    # Cliente sem gzip recebe o corpo decodificado
+    response = client.get("/tools/proxy/tool_x/itens", headers={"Authorization": f"Bearer {token}", "Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.content == b'{"itens": []}' * 500
+
+
+@pytest.mark.parametrize("path", ["a/../../segredo", "a/%2e%2e/%2e%2e/segredo", "..%2F..%2Fsegredo", "%252e%252e/segredo", "./itens", "a\\..\\..\\segredo"])
+def test_proxy_rejects_paths_escaping_url_base(client: TestClient, auth_token_for_user, backend, path):
+    token = auth_token_for_user("testuser1", "password123")
+    headers = {"Authorization": f"Bearer {token}"}
+    # O cliente HTTP pode normalizar o caminho antes de enviar; o backend nunca vê nada fora de url_base
+    response = client.get(f"/tools/proxy/tool_x/{path}", headers=headers)
+    assert response.status_code in (200, 400, 404)
+    assert all(url.startswith("http://backend.interno/api/x/") for url in backend)
+
+    response = client.post("/tools/proxy/lote", json={"chamadas": [{"ferramenta": "tool_x", "path": path}]}, headers=headers)
+    assert [json.loads(linha)["status"] for linha in response.text.splitlines()] == [400]
+    assert all(url.startswith("http://backend.interno/api/x/") for url in backend)
+
+
+def test_proxy_http_rejects_encoded_dot_segments(client: TestClient, auth_token_for_user, backend):
+    token = auth_token_for_user("testuser1", "password123")
+    response = client.get("/tools/proxy/tool_x/a/%2e%2e/%2e%2e/segredo", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 400
+    assert backend == []
+
+
+def test_proxy_keeps_encoded_query_and_fragment_chars_in_path(client: TestClient, auth_token_for_user, backend):
+    token = auth_token_for_user("testuser1", "password123")
+    response = client.get("/tools/proxy/tool_x/itens%3Fadmin=1%23x", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    # "%3F"/"%23" continuam no caminho: o backend não recebe query nem fragmento injetados
+    assert response.json() == {"path": "/api/x/itens?admin=1#x", "q": ""}
+    assert backend == ["http://backend.interno/api/x/itens%3Fadmin%3D1%23x"]
+
+    response = client.post("/tools/proxy/lote", json={"chamadas": [{"ferramenta": "tool_x", "path": "itens?admin=1"}]}, headers={"Authorization": f"Bearer {token}"})
+    assert json.loads(json.loads(response.text)["corpo"]) == {"path": "/api/x/itens?admin=1", "q": ""}
+
+
+def _backend_interrompido(monkeypatch):
+    async def _eventos():
+        yield b"data: evento 0\n\n"
+        raise httpx.ReadError("conexão com o backend perdida")
+
+    def _handler(request: httpx.Request):
+        tipo = "text/event-stream" if request.url.path.endswith("/eventos") else "application/octet-stream"
+        return httpx.Response(200, content=_eventos(), headers={"Content-Type": tipo})
+
+    def _url_base(rbac):
+        rbac["ferramentas"]["tool_x"]["url_base"] = "http://backend.interno/api/x"
+    update_rbac(_url_base)
+    monkeypatch.setattr(upstream, "_client", httpx.AsyncClient(transport=httpx.MockTransport(_handler)))
+
+
+def test_proxy_upstream_failure_mid_stream(client: TestClient, auth_token_for_user, monkeypatch):
+    _backend_interrompido(monkeypatch)
+    token = auth_token_for_user("testuser1", "password123")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    # SSE: o cliente recebe um evento de erro no lugar do fim silencioso
+    with client.stream("GET", "/tools/proxy/tool_x/eventos", headers=headers) as response:
+        linhas = [linha for linha in response.iter_lines() if linha]
+    assert linhas[-2] == "event: error"
+    assert json.loads(linhas[-1][len("data: "):])["status"] == 502
+
+    # Demais corpos: a transmissão é abortada em vez de terminar como um 200 completo
+    with pytest.raises(Exception):
+        with client.stream("GET", "/tools/proxy/tool_x/bruto", headers=headers) as response:
+            response.read()
+
+    response = client.post("/tools/proxy/lote", json={"chamadas": [{"ferramenta": "tool_x", "path": "bruto"}]}, headers=headers)
+    assert json.loads(response.text)["status"] == 502
@@ -0,0 +1,85 @@
+# mcp-server/tests/integration/test_sessions_api.py
+from fastapi.testclient import TestClient
+
+
+def _login(client: TestClient, username: str, password: str) -> dict:
+    response = client.post("/tools/login", json={"username": username, "password": password})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_login_returns_refresh_token(client: TestClient):
+    data = _login(client, "testuser1", "password123")
+    assert data["refresh_token"]
+    assert data["expires_in"] > 0
+
+
+def test_refresh_token_rotation(client: TestClient):
+    data = _login(client, "testuser1", "password123")
+
+    response = client.post("/tools/token/refresh", json={"refresh_token": data["refresh_token"]})
+    assert response.status_code == 200
+    novo = response.json()
+    assert novo["refresh_token"] != data["refresh_token"]
+    assert novo["access_token"] != data["access_token"]
+
+    response = client.get("/tools/user_tools", headers={"Authorization": f"Bearer {novo['access_token']}"})
+    assert response.status_code == 200
+
+
+def test_refresh_token_reuse_revokes_session(client: TestClient):
+    data = _login(client, "testuser1", "password123")
+    primeiro = client.post("/tools/token/refresh", json={"refresh_token": data["refresh_token"]}).json()
+
+    # Reapresentar o token já rotacionado derruba a sessão inteira
+    response = client.post("/tools/token/refresh", json={"refresh_token": data["refresh_token"]})
+    assert response.status_code == 401
+
+    response = client.post("/tools/token/refresh", json={"refresh_token": primeiro["refresh_token"]})
+    assert response.status_code == 401
+    response = client.get("/tools/user_tools", headers={"Authorization": f"Bearer {primeiro['access_token']}"})
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Sessão revogada"
+
+
+def test_logout_revokes_access_token(client: TestClient):
+    data = _login(client, "testuser1", "password123")
+    headers = {"Authorization": f"Bearer {data['access_token']}"}
+
+    assert client.post("/tools/logout", headers=headers).status_code == 200
+    assert client.get("/tools/user_tools", headers=headers).status_code == 401
+    assert client.post("/tools/token/refresh", json={"refresh_token": data["refresh_token"]}).status_code == 401
+
+
+def test_admin_revokes_user_sessions(client: TestClient):
+    user = _login(client, "testuser1", "password123")
+    admin = _login(client, "globaladmin", "password_global")
+
+    response = client.post(
+        "/tools/usuarios/testuser1/sessoes/revogar",
+        headers={"Authorization": f"Bearer {admin['access_token']}"}
+    )
+    assert response.status_code == 200
+    assert response.json()["revogadas"] >= 1
+    assert client.get("/tools/user_tools", headers={"Authorization": f"Bearer {user['access_token']}"}).status_code == 401
+
+
+def test_legacy_refresh_requires_active_session(client: TestClient):
+    from app.auth import create_jwt_for_user
+    from app.utils.session_store import session_store
+
+    data = _login(client, "testuser1", "password123")
+    headers = {"Authorization": f"Bearer {data['access_token']}"}
+    assert client.post("/tools/refresh-token", headers=headers).status_code == 200
+
+    # Sessão expirada: o access token ainda é válido, mas não pode mais ser renovado
+    sid = session_store._connect().execute(
+        "SELECT sid FROM sessoes WHERE username = ? ORDER BY criada_em DESC LIMIT 1", ("testuser1",)
+    ).fetchone()[0]
+    session_store._connect().execute("UPDATE sessoes SET expira_em = 0 WHERE sid = ?", (sid,))
+    assert client.post("/tools/refresh-token", headers=headers).status_code == 401
+
+    # Token sem sessão não é renovável
+    sem_sessao = create_jwt_for_user("testuser1")
+    response = client.post("/tools/refresh-token", headers={"Authorization": f"Bearer {sem_sessao}"})
+    assert response.status_code == 401
@@ -0,0 +1,61 @@
+# mcp-server/tests/integration/test_tools_api.py
+from fastapi.testclient import TestClient
+
+
+def test_list_global_tools(client: TestClient, auth_token_for_user):
+    token = auth_token_for_user("testuser1", "password123")
+    response = client.get("/tools/ferramentas", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    ferramentas = {f["id"]: f for f in response.json()}
+    assert ferramentas["tool_x"] == {
+        "id": "tool_x",
+        "nome": "Ferramenta X",
+        "url_base": "/tools/ferramenta_x",
+        "descricao": "Ferramenta de Teste X"
+    }
+
+
+def test_user_tools_follow_rbac_changes(client: TestClient, auth_token_for_user):
+    user_token = auth_token_for_user("testuser1", "password123")
+    admin_token = auth_token_for_user("globaladmin", "password_global")
+    headers = {"Authorization": f"Bearer {user_token}"}
+
+    response = client.get("/tools/user_tools", headers=headers)
+    assert response.status_code == 200
+    assert [f["id"] for f in response.json()] == ["tool_x"]
+
+    response = client.post(
+        "/tools/grupos/group1/ferramentas",
+        headers={"Authorization": f"Bearer {admin_token}"},
+        json={"tool_id": "tool_y"}
+    )
+    assert response.status_code == 200
+
+    # A resposta pré-serializada é descartada quando o RBAC muda
+    response = client.get("/tools/user_tools", headers=headers)
+    assert [f["id"] for f in response.json()] == ["tool_x", "tool_y"]
+
+
+def test_user_tools_cache_ignores_group_order(client: TestClient, auth_token_for_user):
+    from app.utils.rbac_index import get_rbac_index
+    from app.utils.rbac_store import update_rbac
+
+    def _mutate(rbac):
+        rbac["grupos"]["group_for_request"]["ferramentas"] = ["tool_y"]
+        rbac["usuarios"]["testuser1"]["grupos"] = ["group1", "group_for_request"]
+        rbac["usuarios"]["plainuser"]["grupos"] = ["group_for_request", "group1"]
+    update_rbac(_mutate)
+
+    ordens = []
+    for username, password in (("testuser1", "password123"), ("plainuser", "plainpassword")):
+        token = auth_token_for_user(username, password)
+        response = client.get("/tools/user_tools", headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 200
+        ordens.append([f["id"] for f in response.json()])
+
+    # A resposta segue a ordem dos grupos de cada usuário; o cache é compartilhado
+    assert ordens == [["tool_x", "tool_y"], ["tool_y", "tool_x"]]
+    assert [chave for chave in get_rbac_index()._respostas if chave[0] == "user_tools"] == [
+        ("user_tools", ("group1", "group_for_request"))
+    ]
@@ -0,0 +1,32 @@
+# Testes do pipeline de auditoria (buffer em memória + gravação em lote)
+import asyncio
+
+from app.utils.audit import AuditLog
+
+
+def test_flush_and_query_finish_under_continuous_traffic(tmp_path):
+    async def _cenario():
+        audit = AuditLog(str(tmp_path), batch_size=10, flush_interval=0.01)
+        await audit.start()
+        parar = asyncio.Event()
+
+        async def _produtor():
+            i = 0
+            while not parar.is_set():
+                await audit.record("execucao", usuario=f"u{i}")
+                i += 1
+                await asyncio.sleep(0)
+
+        produtor = asyncio.create_task(_produtor())
+        await audit.record("login", usuario="alvo")
+        try:
+            # A fila nunca esvazia, mas a consulta só espera o que já estava enfileirado
+            eventos = await asyncio.wait_for(audit.query(usuario="alvo"), timeout=5)
+        finally:
+            parar.set()
+            await produtor
+            await audit.stop()
+        return eventos
+
+    eventos = asyncio.run(_cenario())
+    assert [e["evento"] for e in eventos] == ["login"]
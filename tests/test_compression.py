@@ -0,0 +1,103 @@
+# Testes do middleware de compressão negociada das respostas
+import asyncio
+import gzip
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.utils import compression
+from app.utils.compression import BrotliResponder, CompressionMiddleware, codificacoes_aceitas
+
+USUARIOS = [{"username": f"usuario_{i}", "papel": "user", "grupos": ["group1", "group2"]} for i in range(200)]
+
+
+async def _listar(request):
+    return JSONResponse(USUARIOS)
+
+
+async def _pequena(request):
+    return JSONResponse({"ok": True})
+
+
+async def _transmitida(request):
+    async def _blocos():
+        for usuario in USUARIOS:
+            yield (str(usuario) + "\n").encode()
+    return StreamingResponse(_blocos(), media_type="application/x-ndjson")
+
+
+async def _ja_comprimida(request):
+    return Response(gzip.compress(b"x" * 5000), headers={"Content-Encoding": "gzip"}, media_type="text/plain")
+
+
+async def _zip(request):
+    return Response(b"PK" + b"\x00" * 5000, media_type="application/zip")
+
+
+@pytest.fixture
+def client():
+    app = Starlette(routes=[
+        Route("/usuarios", _listar), Route("/pequena", _pequena), Route("/transmitida", _transmitida),
+        Route("/ja-comprimida", _ja_comprimida), Route("/zip", _zip),
+    ])
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+    return TestClient(app)
+
+
+def test_large_responses_compressed_small_ones_not(client):
+    response = client.get("/usuarios", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert int(response.headers["content-length"]) * 5 < len(response.content)
+    assert response.json() == USUARIOS
+
+    assert "content-encoding" not in client.get("/pequena", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/usuarios", headers={"Accept-Encoding": "identity"}).headers
+
+
+def test_streaming_compressed_and_encoded_payloads_untouched(client):
+    response = client.get("/transmitida", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text.count("usuario_") == len(USUARIOS)
+
+    # Corpo já codificado (ex.: repassado do backend) e tipos já comprimidos passam intactos
+    response = client.get("/ja-comprimida", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip" and response.text == "x" * 5000
+    assert "content-encoding" not in client.get("/zip", headers={"Accept-Encoding": "gzip"}).headers
+
+
+def test_brotli_preferred_when_available(client):
+    pytest.importorskip("brotli")
+    response = client.get("/usuarios", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+    assert response.json() == USUARIOS
+
+
+def test_brotli_large_chunks_compressed_off_event_loop(client, monkeypatch):
+    pytest.importorskip("brotli")
+    blocos = []
+    comprimir = BrotliResponder._comprimir
+
+    def _espiao(self, body, more_body):
+        try:
+            asyncio.get_running_loop()
+            blocos.append((len(body), True))
+        except RuntimeError:
+            blocos.append((len(body), False))
+        return comprimir(self, body, more_body)
+    monkeypatch.setattr(BrotliResponder, "_comprimir", _espiao)
+    monkeypatch.setattr(compression, "LIMIAR_THREADPOOL", 64)
+
+    response = client.get("/transmitida", headers={"Accept-Encoding": "br"})
+    assert response.headers["content-encoding"] == "br"
+    assert response.text.count("usuario_") == len(USUARIOS)
+    # Blocos a partir do limiar não são comprimidos na thread do event loop
+    grandes = [no_event_loop for tamanho, no_event_loop in blocos if tamanho >= 64]
+    assert grandes and not any(grandes)
+
+
+def test_accept_encoding_parsing():
+    assert codificacoes_aceitas("gzip, deflate, br;q=0") == ["gzip", "deflate"]
+    assert codificacoes_aceitas("") == []
@@ -0,0 +1,42 @@
+# Testes do codec JSON (orjson com fallback para a biblioteca padrão)
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from app.utils import json_codec
+
+DADOS = {"grupos": {"ação": {"users": ["joão"], "ferramentas": []}}, "versao": 3, "ts": datetime(2024, 1, 2, tzinfo=timezone.utc)}
+
+
+@pytest.fixture(params=["stdlib", "orjson"])
+def backend(request, monkeypatch):
+    if request.param == "orjson" and json_codec.orjson is None:
+        pytest.skip("orjson não instalado")
+    monkeypatch.setattr(json_codec, "BACKEND", request.param)
+    return request.param
+
+
+def test_roundtrip_bytes_utf8_and_datetime(backend):
+    raw = json_codec.dumps(DADOS)
+    assert isinstance(raw, bytes)
+    assert "joão".encode("utf-8") in raw
+    assert json_codec.loads(raw) == {**DADOS, "ts": "2024-01-02T00:00:00+00:00"}
+
+
+def test_backends_produce_equivalent_documents(backend):
+    assert json.loads(json_codec.dumps(DADOS, pretty=True)) == json.loads(json_codec.dumps(DADOS))
+    assert b"\n  " in json_codec.dumps(DADOS, pretty=True)
+
+
+def test_decode_error_is_stdlib_compatible(backend):
+    with pytest.raises(json.JSONDecodeError):
+        json_codec.loads(b"{corrompido")
+
+
+def test_backend_selection_falls_back_to_stdlib(monkeypatch):
+    assert json_codec._select_backend("stdlib") == "stdlib"
+    assert json_codec._select_backend("desconhecido") in ("orjson", "stdlib")
+    monkeypatch.setattr(json_codec, "orjson", None)
+    assert json_codec._select_backend("orjson") == "stdlib"
+    assert json_codec._select_backend("auto") == "stdlib"
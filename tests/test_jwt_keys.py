@@ -0,0 +1,30 @@
+# Testes do key ring de chaves assimétricas do JWT
+import time
+
+import jwt
+import pytest
+
+from app.utils.jwt_keys import KeyRing
+
+
+def test_unknown_kid_only_reloads_when_directory_changes(tmp_path, monkeypatch):
+    keyring = KeyRing(str(tmp_path), "EdDSA")
+    token = keyring.encode({"sub": "alice"})
+    assert keyring.decode(token)["sub"] == "alice"
+
+    recargas = []
+    original = keyring._reload
+    monkeypatch.setattr(keyring, "_reload", lambda: (recargas.append(1), original())[1])
+    forjado = jwt.encode({"sub": "alice"}, "x", algorithm="HS256", headers={"kid": "inexistente"})
+    for _ in range(5):
+        with pytest.raises(jwt.InvalidTokenError):
+            keyring.decode(forjado)
+    assert recargas == []
+
+    # Chave criada por outro worker: o diretório muda e o kid novo passa a ser aceito
+    time.sleep(0.02)  # granularidade do mtime do diretório
+    outro = KeyRing(str(tmp_path), "EdDSA")
+    kid = outro.rotate()
+    token = jwt.encode({"sub": "bob"}, outro._private_keys[kid], algorithm="EdDSA", headers={"kid": kid})
+    assert keyring.decode(token)["sub"] == "bob"
+    assert recargas == [1]
@@ -0,0 +1,112 @@
+# Testes da proteção do login contra força bruta (contadores em janela deslizante)
+from app.utils.login_guard import LoginGuard
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 1000.0
+
+    def __call__(self):
+        return self.agora
+
+
+def _guard(relogio, **kwargs):
+    params = dict(janela=60, max_falhas_usuario=3, max_falhas_ip=5, bloqueio_base=10, bloqueio_max=25)
+    params.update(kwargs)
+    return LoginGuard(relogio=relogio, **params)
+
+
+def test_user_lockout_is_progressive_and_reset_on_success():
+    relogio = Relogio()
+    guard = _guard(relogio)
+    for _ in range(3):
+        assert guard.bloqueio("alvo", "10.0.0.1") == 0
+        guard.registrar_falha("alvo", "10.0.0.1")
+    assert guard.bloqueio("alvo", "10.0.0.2") == 10
+    # Outros usuários do mesmo IP seguem liberados (limite por IP é maior)
+    assert guard.bloqueio("outro", "10.0.0.1") == 0
+
+    relogio.agora += 11
+    assert guard.bloqueio("alvo", None) == 0
+    for _ in range(3):
+        guard.registrar_falha("alvo", None)
+    assert guard.bloqueio("alvo", None) == 20
+    relogio.agora += 21
+    for _ in range(3):
+        guard.registrar_falha("alvo", None)
+    assert guard.bloqueio("alvo", None) == 25  # limitado a bloqueio_max
+
+    relogio.agora += 26
+    guard.registrar_sucesso("alvo")
+    guard.registrar_falha("alvo", None)
+    assert guard.bloqueio("alvo", None) == 0
+
+
+def test_sliding_window_forgets_old_failures_and_ip_limit():
+    relogio = Relogio()
+    guard = _guard(relogio)
+    guard.registrar_falha("u", None)
+    guard.registrar_falha("u", None)
+    # Duas janelas depois as falhas antigas não contam mais
+    relogio.agora += 120
+    guard.registrar_falha("u", None)
+    assert guard.bloqueio("u", None) == 0
+
+    for i in range(5):
+        guard.registrar_falha(f"usuario_{i}", "10.0.0.9")
+    assert guard.bloqueio("qualquer", "10.0.0.9") == 10
+
+
+def test_inactive_keys_are_evicted():
+    relogio = Relogio()
+    guard = _guard(relogio, max_chaves=3)
+    for i in range(5):
+        guard.registrar_falha(f"u{i}", None)
+    assert len(guard) == 3
+    relogio.agora += 200
+    guard.bloqueio("u4", None)
+    assert len(guard) == 0
+
+
+def test_failure_counts_in_window_where_it_happened():
+    relogio = Relogio()
+    guard = _guard(relogio, max_falhas_usuario=2)
+    guard.registrar_falha("alvo", None)
+
+    # Duas janelas depois a falha antiga não conta mais, mas as novas contam inteiras
+    relogio.agora += 130
+    guard.registrar_falha("alvo", None)
+    assert guard.bloqueio("alvo", None) == 0
+    relogio.agora += 1
+    guard.registrar_falha("alvo", None)
+    assert guard.bloqueio("alvo", None) == 10
+
+
+def test_locked_counters_survive_key_flood():
+    relogio = Relogio()
+    guard = _guard(relogio, max_chaves=4)
+    for _ in range(3):
+        guard.registrar_falha("alvo", None)
+    assert guard.bloqueio("alvo", None) == 10
+
+    for i in range(20):
+        guard.registrar_falha(f"spray{i}", None)
+    assert len(guard) <= 5
+    assert guard.bloqueio("alvo", None) == 10
+
+
+def test_locked_keys_are_capped_and_released_in_expiry_order():
+    relogio = Relogio()
+    guard = _guard(relogio, max_falhas_usuario=1, max_chaves=2, max_bloqueadas=2)
+    for nome in ("a", "b", "c"):
+        guard.registrar_falha(nome, None)
+        relogio.agora += 1
+    # Acima do limite de bloqueadas, sai a que terminaria primeiro
+    assert guard.bloqueio("a", None) == 0
+    assert guard.bloqueio("b", None) > 0 and guard.bloqueio("c", None) > 0
+    assert len(guard) <= 4
+
+    # Terminado o bloqueio, as chaves voltam à ordem normal e expiram por inatividade
+    relogio.agora += 200
+    assert guard.bloqueio("b", None) == 0
+    assert len(guard) == 0
@@ -0,0 +1,165 @@
+# Testes do manifesto MCP gerado a partir do catálogo de ferramentas do RBAC
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httpx
+import mcp.types as types
+import pytest
+
+from app.config import settings
+from app.utils.dependencies import get_rbac_data
+from app.auth import create_jwt_for_user
+from app.utils import mcp_manifest, upstream
+from app.utils.mcp_manifest import PUBLICO, ToolManifest
+from app.utils.rbac_index import RBACIndex
+from app.utils.rbac_store import update_rbac
+
+ESTATICA = types.Tool(name="health_tools_health_get", inputSchema={"type": "object"})
+
+
+def _nomes(tools):
+    return [t.name for t in tools]
+
+
+def test_scopes_follow_group_permissions():
+    index = RBACIndex(get_rbac_data())
+    manifest = ToolManifest([ESTATICA])
+
+    assert _nomes(manifest.tools_for("global_admin", (), index)) == ["health_tools_health_get", "tool_x", "tool_y"]
+    assert _nomes(manifest.tools_for("user", ["group1"], index)) == ["health_tools_health_get", "tool_x"]
+    assert _nomes(manifest.tools_for("user", [], index)) == ["health_tools_health_get"]
+    # Mesmo escopo: a lista em cache é devolvida sem nova montagem
+    assert manifest.tools_for("user", ["group1", "g2"], index) is manifest.tools_for("user", ["g2", "group1"], index)
+
+
+def test_static_tools_filtered_by_requirement():
+    index = RBACIndex(get_rbac_data())
+    estaticas = [types.Tool(name=n, inputSchema={"type": "object"}) for n in ("publica", "comum", "admin", "global", "fx")]
+    requisitos = {"publica": PUBLICO, "admin": ("papel", "admin"), "global": ("papel", "global_admin"), "fx": ("ferramenta", "tool_x")}
+    manifest = ToolManifest(estaticas, requisitos)
+
+    assert _nomes(manifest.tools_for(None, ["group1"], index)) == ["publica"]
+    assert _nomes(manifest.tools_for("user", [], index)) == ["publica", "comum"]
+    assert _nomes(manifest.tools_for("user", ["group1"], index)) == ["publica", "comum", "fx", "tool_x"]
+    assert _nomes(manifest.tools_for("admin", ["group1"], index)) == ["publica", "comum", "admin", "fx", "tool_x"]
+    assert _nomes(manifest.tools_for("global_admin", [], index)) == ["publica", "comum", "admin", "global", "fx", "tool_x", "tool_y"]
+
+
+def test_manifest_is_regenerated_incrementally():
+    rbac = get_rbac_data()
+    manifest = ToolManifest()
+    manifest.tools_for("global_admin", (), RBACIndex(rbac))
+    assert manifest.geracoes == 2
+
+    rbac["ferramentas"]["tool_z"] = {"nome": "Ferramenta Z", "url_base": "http://z", "descricao": "Nova"}
+    rbac["ferramentas"]["tool_y"]["descricao"] = "Descrição alterada"
+    del rbac["ferramentas"]["tool_x"]
+    tools = manifest.tools_for("global_admin", (), RBACIndex(rbac))
+
+    assert _nomes(tools) == ["tool_y", "tool_z"]
+    assert tools[0].description == "Ferramenta Y: Descrição alterada"
+    # Apenas tool_y (alterada) e tool_z (nova) foram regeradas
+    assert manifest.geracoes == 4
+
+    rbac["ferramentas"]["tool_x"] = {"nome": "Ferramenta X", "url_base": "/tools/ferramenta_x", "descricao": "Ferramenta de Teste X"}
+    manifest.tools_for("global_admin", (), RBACIndex(rbac))
+    # Ferramenta removida e reincluída é gerada de novo
+    assert manifest.geracoes == 5
+
+
+def _listar(doc_mcp):
+    async def _chamar():
+        handler = doc_mcp.server.request_handlers[types.ListToolsRequest]
+        return await handler(types.ListToolsRequest(method="tools/list"))
+
+    return _nomes(asyncio.run(_chamar()).root.tools)
+
+
+def test_installed_manifest_lists_tools_per_caller(monkeypatch):
+    from app.main import doc_mcp
+
+    def _como(username):
+        token = create_jwt_for_user(username) if username else None
+        headers = {"authorization": f"Bearer {token}"} if token else {}
+        monkeypatch.setattr(mcp_manifest, "_request_headers", lambda _: headers)
+        return _listar(doc_mcp)
+
+    global_admin = _como("globaladmin")
+    assert "tool_x" in global_admin and "tool_y" in global_admin
+    assert set(doc_mcp.operation_map) <= set(global_admin)
+
+    usuario = _como("testuser1")
+    assert "tool_x" in usuario and "tool_y" not in usuario
+    assert "listar_grupos_tools_grupos_get" not in usuario
+    assert "get_admin_requests_tools_requests_admin_get" not in usuario
+    assert "ferramenta_x_tools_ferramenta_x_get" not in usuario
+    assert "get_my_requests_tools_requests_me_get" in usuario
+
+    admin = _como("admin_group1")
+    assert "get_admin_requests_tools_requests_admin_get" in admin
+    assert "listar_grupos_tools_grupos_get" not in admin
+
+    anonimo = _como(None)
+    assert "tool_x" not in anonimo and "health_tools_health_get" in anonimo
+    assert "get_my_requests_tools_requests_me_get" not in anonimo
+
+
+def test_batch_tool_runs_calls_through_proxy(monkeypatch):
+    from app.main import doc_mcp
+
+    def _url_base(rbac):
+        rbac["ferramentas"]["tool_x"]["url_base"] = "http://backend.interno/x"
+    update_rbac(_url_base)
+    monkeypatch.setattr(upstream, "_client", httpx.AsyncClient(transport=httpx.MockTransport(
+        lambda request: httpx.Response(200, text=request.url.path))))
+    headers = {"authorization": f"Bearer {create_jwt_for_user('testuser1')}"}
+    monkeypatch.setattr(mcp_manifest, "_request_headers", lambda _: headers)
+
+    async def _chamar():
+        handler = doc_mcp.server.request_handlers[types.CallToolRequest]
+        chamadas = [{"ferramenta": "tool_x", "path": "a"}, {"ferramenta": "tool_y"}, {"ferramenta": "tool_x", "path": "b"}]
+        return await handler(types.CallToolRequest(
+            method="tools/call",
+            params=types.CallToolRequestParams(name="proxy_lote_tools_proxy_lote_post", arguments={"chamadas": chamadas}),
+        ))
+
+    resultado = asyncio.run(_chamar()).root
+    itens = [json.loads(c.text) for c in resultado.content]
+    assert [(r["indice"], r["status"]) for r in itens] == [(0, 200), (1, 403), (2, 200)]
+    assert itens[2]["corpo"] == "/x/b"
+    assert not resultado.isError
+
+
+def test_catalog_tool_rejects_path_escaping_url_base(monkeypatch):
+    from app.main import doc_mcp
+
+    def _url_base(rbac):
+        rbac["ferramentas"]["tool_x"]["url_base"] = "http://backend.interno/x"
+    update_rbac(_url_base)
+    chamadas = []
+    monkeypatch.setattr(upstream, "_client", httpx.AsyncClient(transport=httpx.MockTransport(
+        lambda request: chamadas.append(request.url.path) or httpx.Response(200, text=request.url.path))))
+    headers = {"authorization": f"Bearer {create_jwt_for_user('testuser1')}"}
+    monkeypatch.setattr(mcp_manifest, "_request_headers", lambda _: headers)
+
+    async def _chamar(path):
+        handler = doc_mcp.server.request_handlers[types.CallToolRequest]
+        return await handler(types.CallToolRequest(
+            method="tools/call",
+            params=types.CallToolRequestParams(name="tool_x", arguments={"path": path}),
+        ))
+
+    assert asyncio.run(_chamar("a/../../segredo")).root.isError
+    assert asyncio.run(_chamar("%2e%2e/segredo")).root.isError
+    assert chamadas == []
+    assert not asyncio.run(_chamar("itens")).root.isError
+    assert chamadas == ["/x/itens"]
+
+
+def test_http_transport_mode_is_configured_or_fails_loudly():
+    from app.main import configurar_transporte_mcp, doc_mcp
+
+    assert doc_mcp._http_transport.json_response is (not settings.MCP_HTTP_SSE)
+    with pytest.raises(RuntimeError):
+        configurar_transporte_mcp(SimpleNamespace(), sse=True)
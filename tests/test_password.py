@@ -0,0 +1,48 @@
+# Testes do custo bcrypt (calibração e rehash no login)
+import bcrypt
+import pytest
+
+from app.utils import password
+
+
+@pytest.fixture
+def custo(monkeypatch):
+    """Fixa o custo atual sem calibrar."""
+    def _fixar(valor):
+        monkeypatch.setitem(password._bcrypt, "custo", valor)
+        monkeypatch.setitem(password._bcrypt, "origem", "configurado")
+    return _fixar
+
+
+def test_calibration_picks_cost_within_target_and_bounds(monkeypatch):
+    # Cada unidade de custo dobra o tempo: 8 -> 10 ms, então 12 -> 160 ms e 13 -> 320 ms
+    monkeypatch.setattr(password, "_medir_ms", lambda c, amostras=1: 10.0 * 2 ** (c - 8))
+    assert password.calibrar_custo_bcrypt(250, minimo=4, maximo=31) == 12
+    assert password.calibrar_custo_bcrypt(320, minimo=4, maximo=31) == 13
+    assert password.calibrar_custo_bcrypt(250, minimo=4, maximo=11) == 11
+    assert password.calibrar_custo_bcrypt(1, minimo=10, maximo=16) == 10
+
+
+def test_hash_uses_current_cost_and_rehash_only_upwards(custo):
+    custo(5)
+    h = password.hash_password("Senha@123")
+    assert password.custo_do_hash(h) == 5
+    assert bcrypt.checkpw(b"Senha@123", h.encode())
+
+    assert password.precisa_rehash("texto-plano")
+    assert password.precisa_rehash(bcrypt.hashpw(b"x", bcrypt.gensalt(rounds=4)).decode())
+    assert not password.precisa_rehash(h)
+    assert not password.precisa_rehash("$2b$12$vNigeVwdz9D/8x9YQm2RzeK42z9k5aGIDtutY1766N5eZx/ub3azO")
+
+
+def test_rehash_skips_concurrently_changed_password(custo):
+    from app.utils.dependencies import get_rbac_data
+    from app.config import settings
+
+    custo(4)
+    assert not password.rehash_password("plainuser", "plainpassword", "senha-antiga")
+    assert get_rbac_data(settings.RBAC_FILE)["usuarios"]["plainuser"]["senha"] == "plainpassword"
+    assert password.rehash_password("plainuser", "plainpassword", "plainpassword")
+    novo = get_rbac_data(settings.RBAC_FILE)["usuarios"]["plainuser"]["senha"]
+    assert password.custo_do_hash(novo) == 4
+    assert bcrypt.checkpw(b"plainpassword", novo.encode())
@@ -0,0 +1,68 @@
+# Testes da matriz de permissões com IDs internados e bitmaps
+from app.utils.dependencies import get_rbac_data
+from app.utils.rbac_index import RBACIndex
+
+
+def _rbac_com_varios_grupos():
+    rbac = get_rbac_data()
+    rbac["ferramentas"]["tool_orfa"] = {"nome": "Órfã", "url_base": "/tools/orfa", "descricao": ""}
+    rbac["grupos"]["group2"] = {"admins": [], "users": ["testuser1"], "ferramentas": ["tool_y", "tool_x", "tool_fora_do_catalogo"]}
+    rbac["usuarios"]["testuser1"]["grupos"].append("group2")
+    return rbac
+
+
+def test_bitmap_matches_set_based_index():
+    rbac = _rbac_com_varios_grupos()
+    por_conjuntos = RBACIndex(rbac, use_bitmap=False)
+    por_bitmap = RBACIndex(rbac, use_bitmap=True)
+    ferramentas = list(rbac["ferramentas"]) + ["tool_fora_do_catalogo", "inexistente"]
+
+    for username, (papel, grupos) in por_conjuntos.usuarios.items():
+        assert por_bitmap.ferramentas_permitidas(grupos) == por_conjuntos.ferramentas_permitidas(grupos)
+        assert set(por_bitmap.ferramentas_efetivas(grupos)) == set(por_conjuntos.ferramentas_efetivas(grupos))
+        for ferramenta in ferramentas:
+            assert por_bitmap.pode_usar(papel, grupos, ferramenta) == por_conjuntos.pode_usar(papel, grupos, ferramenta)
+
+
+def test_user_bitmap_matches_set_based_index():
+    rbac = _rbac_com_varios_grupos()
+    por_conjuntos = RBACIndex(rbac, use_bitmap=False)
+    por_bitmap = RBACIndex(rbac, use_bitmap=True)
+    ferramentas = list(rbac["ferramentas"]) + ["tool_fora_do_catalogo", "inexistente"]
+
+    matriz = por_bitmap.matriz
+    assert matriz.user_tools_bitmap("testuser1") == matriz.tools_bitmap(["group1", "group2"])
+    assert matriz.user_tools_bitmap("desconhecido") == 0
+    # Na ordem dos grupos: as ferramentas do primeiro grupo vêm antes das do segundo
+    primeiro, segundo = matriz.tool_names_for(matriz.tools_bitmap(["group2"])), matriz.tool_names_for(matriz.tools_bitmap(["group1"]))
+    assert matriz.tool_names_by_group(["group2", "group1"])[:len(primeiro)] == primeiro
+    assert set(matriz.tool_names_by_group(["group2", "group1"])) == set(primeiro) | set(segundo)
+    for username, (papel, grupos) in por_conjuntos.usuarios.items():
+        user = {"username": username, "papel": papel, "grupos": list(grupos)}
+        assert set(por_bitmap.ferramentas_do_usuario(username, grupos)) == set(por_conjuntos.ferramentas_do_usuario(username, grupos))
+        assert por_bitmap.grupos_do_usuario(username) == por_conjuntos.grupos_do_usuario(username) & set(rbac["grupos"])
+        for grupo in rbac["grupos"]:
+            assert por_bitmap.pertence(username, grupo) == por_conjuntos.pertence(username, grupo)
+        for ferramenta in ferramentas:
+            assert por_bitmap.usuario_pode_usar(user, ferramenta) == por_conjuntos.usuario_pode_usar(user, ferramenta)
+
+
+def test_bitmap_replaces_set_indexes_and_memory_report():
+    rbac = _rbac_com_varios_grupos()
+    por_conjuntos = RBACIndex(rbac, use_bitmap=False)
+    index = RBACIndex(rbac, use_bitmap=True)
+
+    # Com a matriz, as relações não são duplicadas em conjuntos por grupo e por usuário
+    assert index.ferramentas_por_grupo == {}
+    assert index._grupos_por_usuario == {}
+    assert all(index.existe_grupo(g) for g in rbac["grupos"])
+    assert not index.existe_grupo("inexistente")
+
+    relatorio = index.memory_report()
+    assert set(relatorio["matriz"]) == {
+        "ids_ferramentas", "ids_grupos", "ids_usuarios", "bitmap_grupo_ferramenta", "bitmap_usuario_grupo"
+    }
+    assert all(v > 0 for v in relatorio["matriz"].values())
+    referencia = por_conjuntos.memory_report()
+    assert relatorio["ferramentas_por_grupo"] < referencia["ferramentas_por_grupo"]
+    assert relatorio["usuarios"] < referencia["usuarios"]
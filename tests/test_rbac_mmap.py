@@ -0,0 +1,65 @@
+# Testes do leitor RBAC por índice binário mapeado em memória
+import json
+
+import pytest
+
+from app.config import settings
+from app.utils import rbac_mmap
+from app.utils.rbac_mmap import RBACMmapReader, get_rbac_grupo, get_rbac_usuario, sidecar_path
+from app.utils.rbac_store import update_rbac
+
+
+def _rbac(n_usuarios):
+    usuarios = {f"user_{i:04d}": {"senha": f"hash{i}", "grupos": ["g_par" if i % 2 == 0 else "g_impar"], "papel": "user"} for i in range(n_usuarios)}
+    usuarios["joão"] = {"senha": "x", "grupos": [], "papel": "user"}
+    grupos = {
+        "g_par": {"admins": [], "users": [u for u, d in usuarios.items() if "g_par" in d["grupos"]], "ferramentas": ["tool_x"]},
+        "g_impar": {"admins": ["user_0001"], "users": [u for u, d in usuarios.items() if "g_impar" in d["grupos"]], "ferramentas": []},
+    }
+    return {"grupos": grupos, "usuarios": usuarios, "ferramentas": {}, "versao": 7}
+
+
+@pytest.fixture
+def rbac_file(tmp_path):
+    path = tmp_path / "rbac.json"
+    path.write_text(json.dumps(_rbac(500)), encoding="utf-8")
+    return path
+
+
+def test_lookup_matches_json_records(rbac_file):
+    dados = json.loads(rbac_file.read_text(encoding="utf-8"))
+    reader = RBACMmapReader(str(rbac_file))
+
+    for username in ("user_0000", "user_0250", "user_0499", "joão"):
+        assert reader.get_usuario(username) == dados["usuarios"][username]
+    assert reader.get_grupo("g_impar") == dados["grupos"]["g_impar"]
+    assert reader.get_usuario("inexistente") is None
+    assert reader.get_grupo("user_0000") is None
+    assert reader.versao == 7
+    assert sidecar_path(str(rbac_file)).exists()
+
+
+def test_external_edit_rebuilds_index(rbac_file):
+    reader = RBACMmapReader(str(rbac_file))
+    assert reader.get_usuario("novo") is None
+
+    dados = json.loads(rbac_file.read_text(encoding="utf-8"))
+    dados["usuarios"]["novo"] = {"senha": "y", "grupos": [], "papel": "admin"}
+    rbac_file.write_text(json.dumps(dados), encoding="utf-8")
+
+    assert reader.get_usuario("novo")["papel"] == "admin"
+
+
+def test_writes_refresh_index_without_rereading_json(rbac_file, monkeypatch):
+    monkeypatch.setattr(settings, "RBAC_MMAP_INDEX", True)
+    monkeypatch.setattr(rbac_mmap, "_readers", {})
+    assert get_rbac_grupo("g_par", str(rbac_file))["ferramentas"] == ["tool_x"]
+
+    def _mutate(rbac):
+        rbac["grupos"]["g_par"]["ferramentas"].append("tool_y")
+    update_rbac(_mutate, rbac_file=str(rbac_file))
+
+    # O índice já foi regravado na escrita; a consulta não precisa reconstruí-lo
+    monkeypatch.setattr(rbac_mmap, "get_rbac_data", lambda *_: pytest.fail("JSON relido"))
+    assert get_rbac_grupo("g_par", str(rbac_file))["ferramentas"] == ["tool_x", "tool_y"]
+    assert get_rbac_usuario("user_0002", str(rbac_file))["grupos"] == ["g_par"]
@@ -0,0 +1,69 @@
+# Testes do modelo tipado do RBAC (associações em conjuntos)
+import copy
+
+from app.models.rbac import RBACModel
+from app.utils.dependencies import get_rbac_data
+from app.utils.rbac_store import update_rbac_model
+
+
+def test_roundtrip_preserves_json_shape():
+    rbac = get_rbac_data()
+    rbac["grupos"]["group1"]["members"] = ["testuser1"]
+    rbac["usuarios"]["admin_group1"]["admin_de_grupos"] = ["group1"]
+    original = copy.deepcopy(rbac)
+
+    assert RBACModel.from_dict(rbac).to_dict() == original
+
+
+def test_membership_operations_keep_both_sides_consistent():
+    model = RBACModel.from_dict(get_rbac_data())
+
+    assert model.add_member("group1", "plainuser")
+    assert not model.add_member("group1", "plainuser")
+    assert "plainuser" in model.grupos["group1"].users
+    assert "group1" in model.usuarios["plainuser"].grupos
+
+    assert model.remove_member("group1", "admin_group1")
+    assert "admin_group1" not in model.grupos["group1"].admins
+    assert model.usuarios["admin_group1"].papel == "user"
+    assert not model.remove_member("group1", "admin_group1")
+
+
+def test_update_rbac_model_persists_lists():
+    update_rbac_model(lambda rbac: rbac.add_member("group_for_request", "requesteruser"))
+
+    rbac = get_rbac_data()
+    assert rbac["grupos"]["group_for_request"]["users"] == ["admin_group_for_request", "requesteruser"]
+    assert rbac["usuarios"]["requesteruser"]["grupos"] == ["group_for_request"]
+
+
+def test_rename_and_remove_group_update_only_members():
+    rbac = get_rbac_data()
+    rbac["usuarios"]["admin_group1"]["admin_de_grupos"] = ["group1"]
+    model = RBACModel.from_dict(rbac)
+    membros = set(model.grupos["group1"].users) | set(model.grupos["group1"].admins)
+
+    assert model.rename_group("group1", "group1_renomeado") == len(membros)
+    assert "group1" not in model.grupos
+    for nome in membros:
+        assert "group1_renomeado" in model.usuarios[nome].grupos
+        assert "group1" not in model.usuarios[nome].grupos
+    assert model.usuarios["admin_group1"].extra["admin_de_grupos"] == ["group1_renomeado"]
+
+    assert model.remove_group("group1_renomeado") == len(membros)
+    assert "group1_renomeado" not in model.grupos
+    assert all("group1_renomeado" not in u.grupos for u in model.usuarios.values())
+    assert model.usuarios["admin_group1"].extra["admin_de_grupos"] == []
+    assert model.usuarios["admin_group1"].papel == rbac["usuarios"]["admin_group1"]["papel"]
+
+
+def test_group_cascade_covers_memberships_recorded_only_on_user_side():
+    rbac = get_rbac_data()
+    rbac["grupos"]["gx"] = {"descricao": "", "admins": [], "users": [], "ferramentas": []}
+    rbac["usuarios"]["plainuser"]["grupos"] = ["gx"]
+    model = RBACModel.from_dict(rbac)
+
+    assert model.rename_group("gx", "gy") == 1
+    assert model.usuarios["plainuser"].grupos.to_list() == ["gy"]
+    assert model.remove_group("gy") == 1
+    assert model.usuarios["plainuser"].grupos.to_list() == []
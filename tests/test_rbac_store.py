@@ -0,0 +1,75 @@
+# Testes do armazenamento RBAC com escrita otimista (compare-and-swap)
+import json
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app.config import settings
+from app.utils.dependencies import get_rbac_data
+from app.utils.rbac_store import (
+    RBACVersionConflict,
+    get_rbac_version,
+    save_rbac_data,
+    update_rbac,
+)
+
+
+def test_save_rejects_stale_version():
+    rbac = get_rbac_data()
+    version = get_rbac_version(rbac)
+    save_rbac_data(rbac, version)
+
+    # Cópia lida antes da última escrita continua apontando para a versão antiga
+    stale = get_rbac_data()
+    stale["versao"] = version
+    with pytest.raises(RBACVersionConflict):
+        save_rbac_data(stale, version)
+
+
+def test_update_retries_mutation_on_conflict():
+    calls = []
+
+    def _mutate(rbac):
+        calls.append(get_rbac_version(rbac))
+        if len(calls) == 1:
+            # Simula outra requisição escrevendo entre a leitura e a escrita desta
+            concurrent = get_rbac_data()
+            save_rbac_data(concurrent, get_rbac_version(concurrent))
+        rbac["grupos"]["grupo_cas"] = {"descricao": "", "admins": [], "users": [], "ferramentas": []}
+
+    update_rbac(_mutate)
+
+    assert len(calls) == 2
+    assert calls[1] == calls[0] + 1
+    with open(settings.RBAC_FILE, 'r', encoding='utf-8') as f:
+        persisted = json.load(f)
+    assert "grupo_cas" in persisted["grupos"]
+    assert persisted["versao"] == calls[0] + 2
+
+
+def test_concurrent_updates_do_not_lose_writes():
+    def _add_group(nome):
+        def _mutate(rbac):
+            rbac["grupos"][nome] = {"descricao": "", "admins": [], "users": [], "ferramentas": []}
+        update_rbac(_mutate, max_retries=50)
+
+    threads = [threading.Thread(target=_add_group, args=(f"grupo_concorrente_{i}",)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    grupos = get_rbac_data()["grupos"]
+    for i in range(8):
+        assert f"grupo_concorrente_{i}" in grupos
+
+
+def test_update_gives_up_after_max_retries():
+    def _always_conflicts(rbac):
+        concurrent = get_rbac_data()
+        save_rbac_data(concurrent, get_rbac_version(concurrent))
+
+    with pytest.raises(HTTPException) as exc:
+        update_rbac(_always_conflicts, max_retries=2)
+    assert exc.value.status_code == 409
@@ -0,0 +1,91 @@
+# Testes do log de alterações (write-ahead) e snapshots do RBAC
+import json
+import time
+from datetime import datetime, timezone
+
+from app.config import settings
+from app.utils.dependencies import get_rbac_data
+from app.utils.rbac_store import update_rbac
+from app.utils import rbac_wal
+from app.utils.rbac_wal import apply_entry, compute_diff, replay_rbac, wal_dir_for
+
+
+def _make_rbac_file(tmp_path):
+    rbac_file = tmp_path / "rbac.json"
+    rbac_file.write_text(json.dumps({
+        "grupos": {"g1": {"descricao": "", "admins": [], "users": ["alice"], "ferramentas": []}},
+        "usuarios": {"alice": {"senha": "x", "grupos": ["g1"], "papel": "user"}},
+        "ferramentas": {}
+    }), encoding='utf-8')
+    return str(rbac_file)
+
+
+def _add_group(nome):
+    def _mutate(rbac):
+        rbac["grupos"][nome] = {"descricao": "", "admins": [], "users": [], "ferramentas": []}
+    return _mutate
+
+
+def test_diff_roundtrip():
+    before = {"grupos": {"a": {"users": []}, "b": {"users": []}}, "usuarios": {}, "extra": 1}
+    after = {"grupos": {"a": {"users": ["u"]}}, "usuarios": {"u": {"grupos": ["a"]}}, "outro": True}
+    entry = {"versao": 7, **compute_diff(before, after)}
+
+    assert entry["set"]["grupos"] == {"a": {"users": ["u"]}}
+    assert entry["del"]["grupos"] == ["b"]
+    rebuilt = apply_entry(json.loads(json.dumps(before)), entry)
+    assert rebuilt == {**after, "versao": 7}
+
+
+def test_replay_reconstructs_latest_state(tmp_path):
+    rbac_file = _make_rbac_file(tmp_path)
+    update_rbac(_add_group("g2"), rbac_file=rbac_file)
+    update_rbac(_add_group("g3"), rbac_file=rbac_file)
+
+    assert wal_dir_for(rbac_file).exists()
+    assert replay_rbac(rbac_file) == get_rbac_data(rbac_file)
+
+
+def test_replay_until_timestamp(tmp_path):
+    rbac_file = _make_rbac_file(tmp_path)
+    update_rbac(_add_group("g2"), rbac_file=rbac_file)
+    time.sleep(0.01)
+    instante = datetime.now(timezone.utc)
+    time.sleep(0.01)
+    update_rbac(_add_group("g3"), rbac_file=rbac_file)
+
+    estado = replay_rbac(rbac_file, instante)
+    assert "g2" in estado["grupos"]
+    assert "g3" not in estado["grupos"]
+    assert estado["versao"] == 1
+
+
+def test_snapshot_compaction_and_recovery(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "RBAC_SNAPSHOT_INTERVAL", 2)
+    rbac_file = _make_rbac_file(tmp_path)
+    for i in range(5):
+        update_rbac(_add_group(f"grupo_{i}"), rbac_file=rbac_file)
+
+    snapshots = sorted(p.name for p in wal_dir_for(rbac_file).glob("snapshot-*.json"))
+    assert len(snapshots) == 3  # base (v0) + compactações nas versões 2 e 4
+    esperado = get_rbac_data(rbac_file)
+
+    # Arquivo principal perdido: a leitura reconstrói a partir do snapshot + cauda do log
+    (tmp_path / "rbac.json").unlink()
+    assert get_rbac_data(rbac_file) == esperado
+
+
+def test_stale_segment_cache_from_other_worker_does_not_force_snapshot(tmp_path):
+    rbac_file = _make_rbac_file(tmp_path)
+    update_rbac(_add_group("g2"), rbac_file=rbac_file)
+    chave = str(wal_dir_for(rbac_file))
+    estado_deste_worker = rbac_wal._segment_state[chave]
+
+    # Outro worker estende o log; o cache deste processo fica para trás
+    update_rbac(_add_group("g3"), rbac_file=rbac_file)
+    rbac_wal._segment_state[chave] = estado_deste_worker
+    update_rbac(_add_group("g4"), rbac_file=rbac_file)
+
+    assert len(list(wal_dir_for(rbac_file).glob("snapshot-*.json"))) == 1
+    assert rbac_wal._segment_state[chave][1:3] == (3, 3)
+    assert replay_rbac(rbac_file) == get_rbac_data(rbac_file)
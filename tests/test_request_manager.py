@@ -0,0 +1,131 @@
+# Testes dos índices em memória do armazenamento de solicitações
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from app.models.requests import RequestStatus
+from app.utils import request_manager
+
+
+@pytest.fixture
+def requests_file(tmp_path, monkeypatch):
+    path = tmp_path / "requests.json"
+    path.write_text(json.dumps({"requests": []}), encoding="utf-8")
+    monkeypatch.setattr(request_manager, "REQUESTS_FILE", path)
+    monkeypatch.setattr(request_manager, "_index", None)
+    monkeypatch.setattr(request_manager, "_index_signature", None)
+    return path
+
+
+def test_admin_inbox_only_lists_administered_groups(requests_file):
+    r1 = request_manager.create_access_request("requesteruser", "group1", "Preciso da ferramenta X")
+    r2 = request_manager.create_access_request("requesteruser", "group_for_request", "Preciso do grupo")
+
+    inbox = request_manager.get_pending_requests_by_admin("admin_group1")
+    assert [r.request_id for r in inbox] == [r1.request_id]
+
+    inbox_global = request_manager.get_pending_requests_by_admin("globaladmin")
+    assert [r.request_id for r in inbox_global] == [r1.request_id, r2.request_id]
+
+
+def test_review_removes_request_from_inbox(requests_file):
+    r1 = request_manager.create_access_request("requesteruser", "group1", "Preciso da ferramenta X")
+    request_manager.review_access_request(r1.request_id, "admin_group1", RequestStatus.REJECTED, "Não")
+
+    assert request_manager.get_pending_requests_by_admin("admin_group1") == []
+    assert request_manager.get_request_by_id(r1.request_id).status == RequestStatus.REJECTED
+    # Uma nova solicitação para o mesmo grupo volta a ser possível
+    r2 = request_manager.create_access_request("requesteruser", "group1", "Agora com justificativa")
+    assert r2.request_id != r1.request_id
+
+
+def test_index_follows_external_changes(requests_file):
+    r1 = request_manager.create_access_request("requesteruser", "group1", "Preciso da ferramenta X")
+    data = json.loads(requests_file.read_text(encoding="utf-8"))
+    data["requests"][0]["status"] = "approved"
+    requests_file.write_text(json.dumps(data) + "\n", encoding="utf-8")
+
+    assert request_manager.get_pending_requests_by_admin("admin_group1") == []
+    assert request_manager.get_requests_by_user("requesteruser")[0].request_id == r1.request_id
+
+
+def test_group_rename_and_removal_update_only_group_requests(requests_file):
+    r1 = request_manager.create_access_request("requesteruser", "group1", "Preciso da ferramenta X")
+    request_manager.review_access_request(r1.request_id, "admin_group1", RequestStatus.REJECTED, "Não")
+    r2 = request_manager.create_access_request("requesteruser", "group1", "De novo")
+    r3 = request_manager.create_access_request("requesteruser", "group_for_request", "Outro grupo")
+
+    assert request_manager.rename_group_requests("group1", "group1_renomeado") == 2
+    assert request_manager.rename_group_requests("inexistente", "x") == 0
+    assert {r.grupo for r in request_manager.get_requests_by_user("requesteruser")} == {"group1_renomeado", "group_for_request"}
+    # A pendente continua única para (usuário, grupo) com o novo nome
+    assert request_manager.create_access_request("requesteruser", "group1_renomeado", "Repetida").request_id == r2.request_id
+
+    assert request_manager.close_group_requests("group1_renomeado", "globaladmin") == 1
+    fechada = request_manager.get_request_by_id(r2.request_id)
+    assert fechada.status == RequestStatus.REJECTED
+    assert fechada.reviewed_by == "globaladmin"
+    assert [r.request_id for r in request_manager.get_pending_requests_by_admin("globaladmin")] == [r3.request_id]
+
+    # O arquivo reflete as alterações (recarregado do zero)
+    request_manager._index = None
+    assert request_manager.get_request_by_id(r1.request_id).grupo == "group1_renomeado"
+
+
+def test_failed_write_raises_and_discards_in_memory_changes(requests_file, monkeypatch):
+    r1 = request_manager.create_access_request("requesteruser", "group1", "Preciso da ferramenta X")
+    monkeypatch.setattr(request_manager, "_save_requests", lambda data: False)
+
+    with pytest.raises(HTTPException) as exc:
+        request_manager.create_access_request("requesteruser", "group_for_request", "Outro grupo")
+    assert exc.value.status_code == 500
+    with pytest.raises(HTTPException) as exc:
+        request_manager.review_access_request(r1.request_id, "admin_group1", RequestStatus.APPROVED)
+    assert exc.value.status_code == 500
+
+    # Nada foi gravado: o índice volta a refletir o disco
+    assert [r.grupo for r in request_manager.get_requests_by_user("requesteruser")] == ["group1"]
+    assert request_manager.get_request_by_id(r1.request_id).status == RequestStatus.PENDING
+
+
+def test_failed_group_cascade_is_retried_and_reconciled_on_next_load(requests_file, monkeypatch):
+    r1 = request_manager.create_access_request("requesteruser", "group1", "Preciso da ferramenta X")
+    monkeypatch.setattr(request_manager, "CASCADE_RETRIES", 2)
+    monkeypatch.setattr(request_manager.time, "sleep", lambda s: None)
+    monkeypatch.setattr(request_manager, "_cascatas_pendentes", [])
+    salvar = request_manager._save_requests
+    monkeypatch.setattr(request_manager, "_save_requests", lambda data: False)
+
+    assert request_manager.rename_group_requests("group1", "group1_renomeado") == 0
+    assert len(request_manager._cascatas_pendentes) == 1
+
+    monkeypatch.setattr(request_manager, "_save_requests", salvar)
+    assert request_manager.get_request_by_id(r1.request_id).grupo == "group1_renomeado"
+    assert request_manager._cascatas_pendentes == []
+    assert json.loads(requests_file.read_text(encoding="utf-8"))["requests"][0]["grupo"] == "group1_renomeado"
+
+
+def test_reload_reads_file_outside_index_lock(requests_file, monkeypatch):
+    import threading
+
+    r1 = request_manager.create_access_request("requesteruser", "group1", "Preciso da ferramenta X")
+    lock_livre = []
+    original = request_manager._load_requests
+
+    def _load():
+        # Outro thread consegue o lock enquanto o arquivo é lido
+        def _tentar():
+            obtido = request_manager._index_lock.acquire(blocking=False)
+            lock_livre.append(obtido)
+            if obtido:
+                request_manager._index_lock.release()
+        t = threading.Thread(target=_tentar)
+        t.start()
+        t.join()
+        return original()
+
+    monkeypatch.setattr(request_manager, "_load_requests", _load)
+    requests_file.write_text(requests_file.read_text(encoding="utf-8") + "\n", encoding="utf-8")
+    assert request_manager.get_request_by_id(r1.request_id).request_id == r1.request_id
+    assert lock_livre == [True]
@@ -0,0 +1,103 @@
+# Testes da coalescência de chamadas concorrentes (single-flight)
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.utils.single_flight import AsyncSingleFlight, SingleFlight
+
+
+def test_concurrent_threads_share_one_call():
+    flight = SingleFlight()
+    execucoes = []
+    resultados = []
+
+    def _carregar():
+        execucoes.append(1)
+        time.sleep(0.1)
+        return {"versao": 1}
+
+    threads = [threading.Thread(target=lambda: resultados.append(flight.do("rbac", _carregar))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(execucoes) == 1
+    assert len(resultados) == 8 and all(r is resultados[0] for r in resultados)
+    # Chave liberada: a próxima chamada executa de novo
+    flight.do("rbac", _carregar)
+    assert len(execucoes) == 2
+
+
+def test_errors_are_shared_and_not_cached():
+    flight = SingleFlight()
+
+    def _falhar():
+        raise ValueError("falhou")
+
+    with pytest.raises(ValueError):
+        flight.do("k", _falhar)
+    assert flight.do("k", lambda: 42) == 42
+
+
+def test_async_callers_share_task_and_survive_cancellation():
+    async def _cenario():
+        flight = AsyncSingleFlight()
+        execucoes = 0
+
+        async def _buscar():
+            nonlocal execucoes
+            execucoes += 1
+            await asyncio.sleep(0.05)
+            return b"corpo"
+
+        primeiro = asyncio.create_task(flight.do(("tool_x", "/a"), _buscar))
+        await asyncio.sleep(0)
+        demais = [asyncio.create_task(flight.do(("tool_x", "/a"), _buscar)) for _ in range(5)]
+        outra_chave = asyncio.create_task(flight.do(("tool_x", "/b"), _buscar))
+        # O chamador que iniciou a busca desiste; os demais ainda recebem o resultado
+        primeiro.cancel()
+        resultados = await asyncio.gather(*demais, outra_chave)
+        return execucoes, resultados, flight.in_flight(("tool_x", "/a"))
+
+    execucoes, resultados, pendente = asyncio.run(_cenario())
+    assert execucoes == 2
+    assert resultados == [b"corpo"] * 6
+    assert pendente is False
+
+
+def test_cancelled_proxy_leader_closes_upstream_stream(monkeypatch):
+    import httpx
+
+    from app.groups import proxy_routes
+    from app.utils import upstream
+
+    fechados = []
+
+    class _Corpo(httpx.AsyncByteStream):
+        async def __aiter__(self):
+            yield b"dados"
+
+        async def aclose(self):
+            fechados.append(True)
+
+    async def _cenario():
+        liberar = asyncio.Event()
+
+        async def _handler(request):
+            await liberar.wait()
+            return httpx.Response(200, stream=_Corpo(), headers={"Content-Type": "text/event-stream"})
+
+        monkeypatch.setattr(upstream, "_client", httpx.AsyncClient(transport=httpx.MockTransport(_handler)))
+        chamada = asyncio.ensure_future(proxy_routes._executar("tool_x", "http://backend.interno/api/x", "eventos", ""))
+        await asyncio.sleep(0.01)
+        chamada.cancel()
+        liberar.set()
+        for _ in range(10):
+            await asyncio.sleep(0)
+        return chamada.cancelled()
+
+    assert asyncio.run(_cenario()) is True
+    assert fechados == [True]
@@ -0,0 +1,72 @@
+# Testes do servidor do frontend estático com versões pré-comprimidas e índice em memória
+import gzip
+import os
+
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.testclient import TestClient
+
+from app.utils.static_files import CACHE_IMUTAVEL, PrecompressedStaticFiles
+
+JS = ("console.log('portal');\n" * 200).encode()
+
+
+@pytest.fixture
+def dist(tmp_path):
+    (tmp_path / "assets").mkdir()
+    (tmp_path / "index.html").write_text("<html>portal</html>")
+    (tmp_path / "assets" / "index-B9x3kQ_d.js").write_bytes(JS)
+    (tmp_path / "assets" / "logo.png").write_bytes(b"\x89PNG" + b"\x00" * 4000)
+    return tmp_path
+
+
+def _cliente(directory, **kwargs):
+    return TestClient(Starlette(routes=[Mount("/", PrecompressedStaticFiles(str(directory), **kwargs))]))
+
+
+def test_serves_compressed_hashed_asset_with_immutable_cache(dist):
+    client = _cliente(dist)
+    response = client.get("/assets/index-B9x3kQ_d.js", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["cache-control"] == CACHE_IMUTAVEL
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(JS)
+    assert response.content == JS  # o cliente de teste descomprime
+
+    sem_compressao = client.get("/assets/index-B9x3kQ_d.js", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in sem_compressao.headers
+    assert sem_compressao.content == JS
+    # Binários não são comprimidos
+    assert "content-encoding" not in client.get("/assets/logo.png", headers={"Accept-Encoding": "gzip"}).headers
+
+
+def test_conditional_requests_answered_from_index(dist):
+    client = _cliente(dist)
+    response = client.get("/")
+    assert response.text == "<html>portal</html>"
+    assert response.headers["cache-control"] == "no-cache"
+
+    # Índice montado na inicialização: a requisição condicional não depende do disco
+    os.remove(dist / "index.html")
+    assert client.get("/", headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+    assert client.get("/index.html", headers={"If-Modified-Since": response.headers["last-modified"]}).status_code == 304
+    assert client.get("/nao-existe.js").status_code == 404
+    assert client.post("/").status_code == 405
+
+
+def test_build_time_variants_and_disk_files(dist):
+    caminho = dist / "assets" / "index-B9x3kQ_d.js"
+    (dist / "assets" / "index-B9x3kQ_d.js.gz").write_bytes(gzip.compress(JS, compresslevel=9))
+    client = _cliente(dist, memoria_max_bytes=0)
+    app_static = client.app.routes[0].app
+    variantes = app_static.arquivos["assets/index-B9x3kQ_d.js"].variantes
+    assert variantes["gzip"].caminho == str(caminho) + ".gz"
+    assert variantes["identity"].corpo is None
+    assert "assets/index-B9x3kQ_d.js.gz" not in app_static.arquivos
+
+    response = client.get("/assets/index-B9x3kQ_d.js", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.content == JS
+    assert client.get("/assets/index-B9x3kQ_d.js", headers={"Accept-Encoding": "identity"}).content == JS
@@ -0,0 +1,46 @@
+# Testes do pool de I/O de armazenamento usado pelos handlers assíncronos
+import asyncio
+import threading
+import time
+
+from app.utils import storage_io
+from app.utils.dependencies import get_rbac_data_async
+from app.utils.rbac_store import get_rbac_version, update_rbac_async
+
+
+def test_slow_storage_does_not_block_event_loop():
+    async def _cenario():
+        ticks = 0
+
+        async def _ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        tarefa = asyncio.create_task(_ticker())
+        # Simula um volume lento: a leitura bloqueia a thread de I/O, não o loop
+        thread = await storage_io.run_io(lambda: (time.sleep(0.2), threading.current_thread().name)[1])
+        tarefa.cancel()
+        return ticks, thread
+
+    ticks, thread = asyncio.run(_cenario())
+    assert ticks >= 5
+    assert thread.startswith("storage-io")
+
+
+def test_async_rbac_update_roundtrip():
+    async def _cenario():
+        antes = get_rbac_version(await get_rbac_data_async())
+
+        def _mutate(rbac):
+            rbac["grupos"]["group1"]["descricao"] = "Alterada via pool de I/O"
+            return threading.current_thread().name
+
+        thread = await update_rbac_async(_mutate)
+        return antes, thread, await get_rbac_data_async()
+
+    antes, thread, depois = asyncio.run(_cenario())
+    assert thread.startswith("storage-io")
+    assert get_rbac_version(depois) == antes + 1
+    assert depois["grupos"]["group1"]["descricao"] == "Alterada via pool de I/O"